@@ -3,18 +3,69 @@ from hashlib import sha256
 from transaction.transaction_parser import TransactionParser
 from serialization.serializer import Serializer, Deserializer
 
+# Block is frozen when it's signed or parsed, so its bytes and hash are calculated only once
+# fields of frozen block can't be reassigned and its lists become tuples, so cached bytes and hash never go stale
+# lazily parsed block decodes only its header, transactions are decoded from raw on first access
 class Block:
+    __slots__ = ("raw", "hash", "frozen", "timestamp", "prev_hashes", "parsed_system_txs", "parsed_payment_txs",
+                 "body_offset")
 
     def __init__(self):
+        self.raw = None  # packed block, kept only when block is frozen
+        self.hash = None
+        self.frozen = False
         self.timestamp = None
         self.prev_hashes = []
+        self.body_offset = None  # offset of transactions in raw which are not decoded yet
         self.system_txs = []
         self.payment_txs = []
 
+    # raised rather than asserted, so cached raw bytes and hash can't go stale when asserts are stripped with -O
+    def __setattr__(self, name, value):
+        if getattr(self, "frozen", False):
+            raise AttributeError("Block can't be modified after it is signed")
+        object.__setattr__(self, name, value)
+
+    # raw is wire data of parsed block, so it doesn't have to be packed again
+    def freeze(self, raw=None):
+        object.__setattr__(self, "frozen", False)
+        self.prev_hashes = tuple(self.prev_hashes)
+        if self.body_offset is None:
+            self.system_txs = tuple(self.system_txs)
+            self.payment_txs = tuple(self.payment_txs)
+        if raw is None:
+            raw = self.pack()
+        self.raw = raw
+        self.hash = sha256(raw).digest()
+        self.frozen = True
+
+    @property
+    def system_txs(self):
+        if self.body_offset is not None:
+            self.parse_body()
+        return self.parsed_system_txs
+
+    @system_txs.setter
+    def system_txs(self, system_txs):
+        self.parsed_system_txs = system_txs
+
+    @property
+    def payment_txs(self):
+        if self.body_offset is not None:
+            self.parse_body()
+        return self.parsed_payment_txs
+
+    @payment_txs.setter
+    def payment_txs(self, payment_txs):
+        self.parsed_payment_txs = payment_txs
+
     def get_hash(self):
+        if self.frozen:
+            return self.hash
         return sha256(self.pack()).digest()
 
-    def parse(self, raw_data):
+    # lazy parsing needs raw data to contain exactly one block, since block end isn't found without decoding transactions
+    def parse(self, raw_data, lazy=False):
         deserializer = Deserializer(raw_data)
 
         self.timestamp = deserializer.parse_u32()
@@ -26,36 +77,82 @@ class Block:
             prev_hash = deserializer.read_and_move(32)
             self.prev_hashes.append(prev_hash)
 
+        if lazy:
+            self.body_offset = deserializer.get_len()
+            self.freeze(bytes(raw_data))
+            return
+
+        self.system_txs, self.payment_txs = self.parse_txs(deserializer)
+        self.freeze(bytes(raw_data[:deserializer.get_len()]))
+
+    # decodes transactions of lazily parsed block, block stays frozen
+    def parse_body(self):
+        system_txs, payment_txs = self.parse_txs(Deserializer(self.raw, self.body_offset))
+        object.__setattr__(self, "parsed_system_txs", tuple(system_txs))
+        object.__setattr__(self, "parsed_payment_txs", tuple(payment_txs))
+        object.__setattr__(self, "body_offset", None)
+
+    # decodes transactions of lazily parsed block received from network before block is accepted
+    # decoded transactions are packed back and compared with raw data, so malformed or truncated body is never accepted
+    # returns False if body is malformed
+    def decode_body(self):
+        if self.body_offset is None:
+            return True
+        raw_body = self.raw[self.body_offset:]
+        try:
+            system_txs, payment_txs = self.parse_txs(Deserializer(raw_body))
+            serializer = Serializer(len(raw_body))
+            Block.pack_txs(serializer, system_txs, payment_txs)
+            if serializer.get_bytes() != raw_body:
+                return False
+        except Exception:  # anything may come from network, so every decoding error means malformed body
+            return False
+        object.__setattr__(self, "parsed_system_txs", tuple(system_txs))
+        object.__setattr__(self, "parsed_payment_txs", tuple(payment_txs))
+        object.__setattr__(self, "body_offset", None)
+        return True
+
+    @staticmethod
+    def parse_txs(deserializer):
         system_tx_count = deserializer.parse_u8()
-        self.system_txs = []
+        system_txs = []
         for i in range(0, system_tx_count):
-            tx = TransactionParser.parse(deserializer.data) # TODO: (is) Better to deserialize passing deserializer directly
-            self.system_txs.append(tx)
-            deserializer.read_and_move(tx.get_len() + 1)  # one byte for type
+            tx = TransactionParser.parse_from(deserializer)
+            system_txs.append(tx)
 
         payment_tx_count = deserializer.parse_u8()
-        self.payment_txs = []
+        payment_txs = []
         for i in range(0, payment_tx_count):
-            tx = TransactionParser.parse(deserializer.data) # TODO: (is) Better to deserialize passing deserializer directly
-            self.payment_txs.append(tx)
-            deserializer.read_and_move(tx.get_len() + 1)  # one byte for type
+            tx = TransactionParser.parse_from(deserializer)
+            payment_txs.append(tx)
+
+        return system_txs, payment_txs
 
     def pack(self):
-        raw_block = Serializer.write_u32(self.timestamp)
+        if self.frozen:
+            return self.raw
+
+        # header size is exact, transactions usually fit in estimate, otherwise buffer grows
+        capacity = 8 + 32 * len(self.prev_hashes) + 256 * (len(self.system_txs) + len(self.payment_txs))
+        serializer = Serializer(capacity)
+        serializer.put_u32(self.timestamp)
 
-        raw_block += Serializer.write_u16(len(self.prev_hashes))
+        serializer.put_u16(len(self.prev_hashes))
         for prev_hash in self.prev_hashes:
-            raw_block += prev_hash
+            serializer.put_bytes(prev_hash)
 
-        raw_block += Serializer.write_u8(len(self.system_txs))
-        for tx in self.system_txs:
-            raw_block += TransactionParser.pack(tx)
+        Block.pack_txs(serializer, self.system_txs, self.payment_txs)
+        return serializer.get_bytes()
 
-        raw_block += Serializer.write_u8(len(self.payment_txs))
-        for tx in self.payment_txs:
-            raw_block += TransactionParser.pack(tx)
+    @staticmethod
+    def pack_txs(serializer, system_txs, payment_txs):
+        serializer.put_u8(len(system_txs))
+        for tx in system_txs:
+            TransactionParser.pack_into(serializer, tx)
 
-        return raw_block
+        serializer.put_u8(len(payment_txs))
+        for tx in payment_txs:
+            TransactionParser.pack_into(serializer, tx)
 
     def __hash__(self):
         return self.get_hash()
\ No newline at end of file
@@ -0,0 +1,201 @@
+import mmap
+import struct
+import zlib
+from bisect import bisect_left
+
+from chain.signed_block import SignedBlock
+
+# Single file container of many signed blocks for archiving, bulk sync and benchmark fixtures
+# Archive layout
+#   header   - [magic][version][compression][block count][segment count][table offset]
+#   segments - SignedBlock.pack() of consecutive blocks grouped into segments, every segment optionally compressed
+#   table    - block entries [block hash][block number][segment number][offset in segment][length] in writing order
+#              segment entries [file offset][stored length][compression]
+#              hash entries [block hash][block index] sorted by hash for binary search
+# Segment is kept uncompressed when compression doesn't make it smaller
+# Writer streams segments to file and writes table and header when closed, so only one segment is kept in memory
+# Reader mmaps the file and reads only table entries and the segment of requested block
+
+MAGIC = b"PBXA"
+VERSION = 1
+
+HEADER = struct.Struct("<4sBBIIQ")  # magic, version, compression, block count, segment count, table offset
+BLOCK_ENTRY = struct.Struct("<32sIIII")  # block hash, block number, segment number, offset in segment, length
+SEGMENT_ENTRY = struct.Struct("<QIB")  # file offset, stored length, compression
+HASH_ENTRY = struct.Struct("<32sI")  # block hash, block index
+
+DEFAULT_SEGMENT_SIZE = 1024 * 1024  # bytes of packed blocks per segment before compression
+
+
+class Compression:
+    NONE = 0
+    ZLIB = 1
+
+
+class BlockArchiveWriter:
+
+    def __init__(self, path, compression=Compression.NONE, segment_size=DEFAULT_SEGMENT_SIZE):
+        assert compression in (Compression.NONE, Compression.ZLIB), "Unknown compression"
+        self.compression = compression
+        self.segment_size = segment_size
+        self.file = open(path, "wb")
+        self.file.write(bytes(HEADER.size))  # real header is written on close
+
+        self.block_entries = []
+        self.segment_entries = []
+        self.block_hashes = set()
+        self.segment = bytearray()
+
+    def append(self, block_number, signed_block):
+        block_hash = signed_block.get_hash()
+        assert block_hash not in self.block_hashes, "Trying to archive block which is already archived"
+        raw_signed_block = signed_block.pack()
+
+        if self.segment and len(self.segment) + len(raw_signed_block) > self.segment_size:
+            self.write_segment()
+
+        self.block_entries.append((block_hash, block_number, len(self.segment_entries),
+                                   len(self.segment), len(raw_signed_block)))
+        self.block_hashes.add(block_hash)
+        self.segment += raw_signed_block
+
+    # archives every block of dag except its root, ordered by block number, so parents precede children
+    # archive of pruned dag can be restored only into dag restored from the same checkpoint
+    def append_dag(self, dag):
+        root_hash = dag.get_root_hash()
+        for block_number, block_list in sorted(dag.blocks_by_number.items()):
+            for block in block_list:
+                if block.get_hash() != root_hash:
+                    self.append(block_number, block)
+
+    def close(self):
+        if self.segment:
+            self.write_segment()
+
+        table_offset = self.file.tell()
+        for block_entry in self.block_entries:
+            self.file.write(BLOCK_ENTRY.pack(*block_entry))
+        for segment_entry in self.segment_entries:
+            self.file.write(SEGMENT_ENTRY.pack(*segment_entry))
+        hash_entries = sorted((entry[0], index) for index, entry in enumerate(self.block_entries))
+        for hash_entry in hash_entries:
+            self.file.write(HASH_ENTRY.pack(*hash_entry))
+
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.compression, len(self.block_entries),
+                                    len(self.segment_entries), table_offset))
+        self.file.close()
+
+    def write_segment(self):
+        data = bytes(self.segment)
+        compression = Compression.NONE
+        if self.compression == Compression.ZLIB:
+            compressed_data = zlib.compress(data)
+            if len(compressed_data) < len(data):
+                data = compressed_data
+                compression = Compression.ZLIB
+        self.segment_entries.append((self.file.tell(), len(data), compression))
+        self.file.write(data)
+        self.segment = bytearray()
+
+
+class BlockArchive:
+
+    def __init__(self, path):
+        with open(path, "rb") as archive_file:
+            self.map = mmap.mmap(archive_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.compression, self.block_count, self.segment_count, table_offset = \
+            HEADER.unpack_from(self.map, 0)
+        assert magic == MAGIC, "File is not a block archive"
+        assert version == VERSION, "Unsupported block archive version"
+
+        self.block_entries_offset = table_offset
+        self.segment_entries_offset = self.block_entries_offset + self.block_count * BLOCK_ENTRY.size
+        self.hash_entries_offset = self.segment_entries_offset + self.segment_count * SEGMENT_ENTRY.size
+
+        # decompressed segment is kept, since neighbour blocks are usually read together
+        self.cached_segment_number = None
+        self.cached_segment = None
+
+    def get_block_count(self):
+        return self.block_count
+
+    # returns (block hash, block number) of block at given index
+    def get_block_info(self, index):
+        block_hash, block_number, _, _, _ = self.get_block_entry(index)
+        return block_hash, block_number
+
+    def get_block(self, index):
+        _, _, segment_number, offset, length = self.get_block_entry(index)
+        segment = self.get_segment(segment_number)
+        return SignedBlock().parse(segment[offset:offset + length], lazy=True)
+
+    def has_block(self, block_hash):
+        return self.find_block_index(block_hash) is not None
+
+    def get_block_by_hash(self, block_hash):
+        index = self.find_block_index(block_hash)
+        assert index is not None, "No block with such hash archived"
+        return self.get_block(index)
+
+    # yields (block number, signed block) tuples in writing order
+    def get_blocks(self):
+        for index in range(self.block_count):
+            _, block_number = self.get_block_info(index)
+            yield block_number, self.get_block(index)
+
+    def restore(self, dag):
+        for block_number, signed_block in self.get_blocks():
+            if signed_block.get_hash() not in dag.blocks_by_hash:
+                dag.add_signed_block(block_number, signed_block)
+
+    def close(self):
+        if isinstance(self.cached_segment, memoryview):
+            self.cached_segment.release()  # mmap can't be closed while its memory is exported
+        self.cached_segment_number = None
+        self.cached_segment = None
+        self.map.close()
+
+    # ------------------------------
+    # internal methods
+    # ------------------------------
+    def get_block_entry(self, index):
+        assert 0 <= index < self.block_count, "Block index is out of archive"
+        return BLOCK_ENTRY.unpack_from(self.map, self.block_entries_offset + index * BLOCK_ENTRY.size)
+
+    def get_segment(self, segment_number):
+        if segment_number == self.cached_segment_number:
+            return self.cached_segment
+        offset, length, compression = SEGMENT_ENTRY.unpack_from(self.map, self.segment_entries_offset +
+                                                                 segment_number * SEGMENT_ENTRY.size)
+        if compression == Compression.ZLIB:
+            segment = zlib.decompress(self.map[offset:offset + length])
+        else:
+            segment = memoryview(self.map)[offset:offset + length]
+        self.cached_segment_number = segment_number
+        self.cached_segment = segment
+        return segment
+
+    # binary search over sorted hash entries right in the mmapped file
+    def find_block_index(self, block_hash):
+        index = bisect_left(HashEntries(self), block_hash)
+        if index < self.block_count:
+            found_hash, block_index = self.get_hash_entry(index)
+            if found_hash == block_hash:
+                return block_index
+        return None
+
+    def get_hash_entry(self, index):
+        return HASH_ENTRY.unpack_from(self.map, self.hash_entries_offset + index * HASH_ENTRY.size)
+
+
+# sequence view of archive hash entries, so bisect can search them without loading whole table
+class HashEntries:
+    def __init__(self, archive):
+        self.archive = archive
+
+    def __len__(self):
+        return self.archive.block_count
+
+    def __getitem__(self, index):
+        return self.archive.get_hash_entry(index)[0]
@@ -24,6 +24,7 @@ class BlockFactory:
 
     @staticmethod
     def sign_block(block, private):
+        block.freeze()
         block_hash = block.get_hash()
         signature = Private.sign(block_hash, private)
         signed_block = SignedBlock()
@@ -0,0 +1,443 @@
+import os
+import mmap
+import struct
+import zlib
+from bisect import bisect_left
+
+from chain.signed_block import SignedBlock
+
+# Append only persistent storage of signed blocks
+# Blocks are written in the order they were added to DAG, so parents always precede children
+# Every segment consists of two files
+#   blocks_XXXXX.dat - records of [crc32][block hash][block number][length][SignedBlock.pack()]
+#   blocks_XXXXX.idx - written once segment is finished
+#                      [block count][hash entries sorted by hash][number entries sorted by block number]
+# Index of finished segment is mmapped and searched with bisect, so startup and memory don't depend on history size
+# Only the last (active) segment has no index, its records are scanned on startup and kept in memory,
+# so the amount of materialized entries is bounded by segment size
+# Every record is checked against its crc32 on startup and on read, torn or corrupted tail of active segment is dropped
+# When dag is pruned, its checkpoint is written to checkpoint file as [crc32][block hash][height][segment][offset]
+# and only checkpoint and blocks written after it are restored into dag on startup,
+# older blocks stay on disk and are served by get_block_by_hash and get_blocks_by_number
+# state of root which can't be derived from restored blocks is kept in checkpoint state file
+# as [crc32][checkpoint hash][state], store doesn't interpret state itself, see CheckpointState
+
+CHECKSUM = struct.Struct("<I")  # crc32 of everything after it in record or checkpoint
+RECORD_HEADER = struct.Struct("<32sII")  # block hash, block number, packed block length
+INDEX_HEADER = struct.Struct("<I")  # block count
+HASH_ENTRY = struct.Struct("<32sII")  # block hash, block number, record offset
+NUMBER_ENTRY = struct.Struct("<II")  # block number, record offset
+CHECKPOINT = struct.Struct("<32sQII")  # block hash, height, segment number, record offset
+
+RECORD_PREFIX_SIZE = CHECKSUM.size + RECORD_HEADER.size
+
+DEFAULT_SEGMENT_SIZE = 16 * 1024 * 1024
+
+DATA_FILE_TEMPLATE = "blocks_%05d.dat"
+INDEX_FILE_TEMPLATE = "blocks_%05d.idx"
+CHECKPOINT_FILE = "checkpoint"
+CHECKPOINT_STATE_FILE = "checkpoint_state"
+
+
+class SyncPolicy:
+    NEVER = 0  # leave it to OS, data may be lost on power failure
+    SEGMENT = 1  # fsync when segment is full and next one is started
+    EVERY_BLOCK = 2  # fsync after every appended block
+
+
+class BlockStore:
+
+    def __init__(self, directory, sync_policy=SyncPolicy.SEGMENT, segment_size=DEFAULT_SEGMENT_SIZE):
+        self.directory = directory
+        self.sync_policy = sync_policy
+        self.segment_size = segment_size
+        self.dag = None
+
+        self.segment_indexes = []  # SegmentIndex of every finished segment, position is segment number
+        self.active_by_hash = {}  # key is block hash, value is (record offset, block number) in active segment
+        self.active_by_number = {}  # key is block number, value is list of record offsets in active segment
+
+        self.maps = {}  # key is segment number, value is mmap of its data file
+        self.segment_count = 0
+        self.data_file = None
+
+        os.makedirs(directory, exist_ok=True)
+        self.load_segments()
+        self.open_active_segment()
+
+    # restores stored blocks into dag and starts storing every new block added to it
+    def attach(self, dag):
+        self.restore(dag)
+        self.dag = dag
+        dag.subscribe_to_new_block_notification(self)
+        dag.subscribe_to_blocks_pruned_notification(self)
+
+    # stores only blocks pruned from dag, so store works as cold storage for finalized part of dag
+    def attach_for_spilling(self, dag):
+        self.dag = dag
+        dag.subscribe_to_blocks_pruned_notification(self)
+
+    # restores blocks starting from the last checkpoint dag was pruned at
+    # descendants of checkpoint are always stored after it, so records before it are never touched
+    def restore(self, dag):
+        segment, offset = 0, 0
+        checkpoint_number = 0
+        checkpoint = self.load_checkpoint()
+        if checkpoint:
+            checkpoint_hash, height, segment, offset = checkpoint
+            _, checkpoint_number, length = self.read_record_header(segment, offset)
+            dag.restore_checkpoint(checkpoint_number, self.read_block(segment, offset), height)
+            offset += RECORD_PREFIX_SIZE + length
+
+        for segment, offset, block_hash, block_number in self.iterate_records(segment, offset):
+            if block_hash in dag.blocks_by_hash:  # already restored block
+                continue
+            if block_number < checkpoint_number:  # fork pruned together with blocks before checkpoint
+                continue
+            dag.add_signed_block(block_number, self.read_block(segment, offset))
+
+    def on_new_block_added(self, block):
+        block_hash = block.get_hash()
+        if not self.has_block(block_hash):
+            self.append(self.dag.get_block_number(block_hash), block)
+
+    def on_blocks_pruned(self, pruned_blocks):
+        for block_number, block_list in sorted(pruned_blocks.items()):
+            for block in block_list:
+                block_hash = block.get_hash()
+                if block_hash == self.dag.genesis_hash():  # genesis is never signed
+                    continue
+                if not self.has_block(block_hash):
+                    self.append(block_number, block)
+
+        # checkpoint itself is stored only if store is attached to keep the whole dag
+        checkpoint_hash = self.dag.checkpoint_hash
+        location = self.find_location(checkpoint_hash)
+        if location:
+            segment, offset, _ = location
+            self.save_checkpoint(checkpoint_hash, self.dag.heights[checkpoint_hash], segment, offset)
+
+    # ------------------------------
+    # block methods
+    # ------------------------------
+    def append(self, block_number, signed_block):
+        block_hash = signed_block.get_hash()
+        assert not self.has_block(block_hash), "Trying to store block which is already stored"
+        raw_signed_block = signed_block.pack()
+
+        offset = self.data_file.tell()
+        if offset and offset + RECORD_PREFIX_SIZE + len(raw_signed_block) > self.segment_size:
+            self.start_next_segment()
+            offset = 0
+
+        raw_header = RECORD_HEADER.pack(block_hash, block_number, len(raw_signed_block))
+        checksum = zlib.crc32(raw_signed_block, zlib.crc32(raw_header))
+        self.data_file.write(CHECKSUM.pack(checksum) + raw_header + raw_signed_block)
+        # flush to OS anyway, so written data is visible through mmap
+        self.data_file.flush()
+        if self.sync_policy == SyncPolicy.EVERY_BLOCK:
+            self.sync()
+
+        self.add_active_location(block_hash, block_number, offset)
+
+    def has_block(self, block_hash):
+        return self.find_location(block_hash) is not None
+
+    def get_block_number(self, block_hash):
+        location = self.find_location(block_hash)
+        assert location, "No block with such hash stored"
+        return location[2]
+
+    def get_block_by_hash(self, block_hash):
+        location = self.find_location(block_hash)
+        assert location, "No block with such hash stored"
+        segment, offset, _ = location
+        return self.read_block(segment, offset)
+
+    # blocks are returned in the order they were stored
+    def get_blocks_by_number(self, block_number):
+        blocks = []
+        for segment, segment_index in enumerate(self.segment_indexes):
+            for offset in segment_index.get_offsets(block_number):
+                blocks.append(self.read_block(segment, offset))
+        active_segment = self.segment_count - 1
+        for offset in self.active_by_number.get(block_number, []):
+            blocks.append(self.read_block(active_segment, offset))
+        return blocks
+
+    # returns (segment number, record offset, block number) tuple or None if block is not stored
+    def find_location(self, block_hash):
+        if block_hash in self.active_by_hash:
+            offset, block_number = self.active_by_hash[block_hash]
+            return self.segment_count - 1, offset, block_number
+        for segment in reversed(range(len(self.segment_indexes))):
+            found = self.segment_indexes[segment].find(block_hash)
+            if found:
+                block_number, offset = found
+                return segment, offset, block_number
+        return None
+
+    def read_block(self, segment, offset):
+        checksum, = CHECKSUM.unpack_from(self.get_map(segment, offset + RECORD_PREFIX_SIZE), offset)
+        _, _, length = self.read_record_header(segment, offset)
+        end = offset + RECORD_PREFIX_SIZE + length
+        raw_record = self.get_map(segment, end)[offset + CHECKSUM.size:end]
+        assert zlib.crc32(raw_record) == checksum, "Stored block record is corrupted"
+        return SignedBlock().parse(raw_record[RECORD_HEADER.size:], lazy=True)
+
+    def sync(self):
+        self.data_file.flush()
+        os.fsync(self.data_file.fileno())
+
+    def close(self):
+        if self.sync_policy != SyncPolicy.NEVER:
+            self.sync()
+        self.data_file.close()
+        for segment_index in self.segment_indexes:
+            segment_index.close()
+        self.segment_indexes = []
+        for data_map in self.maps.values():
+            data_map.close()
+        self.maps = {}
+
+    # ------------------------------
+    # internal methods
+    # ------------------------------
+    def add_active_location(self, block_hash, block_number, offset):
+        self.active_by_hash[block_hash] = (offset, block_number)
+        self.active_by_number.setdefault(block_number, []).append(offset)
+
+    def get_path(self, template, segment):
+        return os.path.join(self.directory, template % segment)
+
+    # returns mmap of segment data file which is at least given size
+    # active segment grows, so it's remapped when requested part is not mapped yet
+    def get_map(self, segment, size):
+        data_map = self.maps.get(segment)
+        if data_map is None or len(data_map) < size:
+            if data_map is not None:
+                data_map.close()
+            with open(self.get_path(DATA_FILE_TEMPLATE, segment), "rb") as data_file:
+                data_map = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[segment] = data_map
+        return data_map
+
+    def drop_map(self, segment):
+        if segment in self.maps:
+            self.maps.pop(segment).close()
+
+    # returns (block hash, block number, packed block length) of record
+    def read_record_header(self, segment, offset):
+        return RECORD_HEADER.unpack_from(self.get_map(segment, offset + RECORD_PREFIX_SIZE), offset + CHECKSUM.size)
+
+    # yields (segment, offset, block hash, block number) of every record starting from given position in writing order
+    def iterate_records(self, segment, offset):
+        while segment < self.segment_count:
+            data_size = os.path.getsize(self.get_path(DATA_FILE_TEMPLATE, segment))
+            while offset + RECORD_PREFIX_SIZE <= data_size:
+                block_hash, block_number, length = self.read_record_header(segment, offset)
+                yield segment, offset, block_hash, block_number
+                offset += RECORD_PREFIX_SIZE + length
+            segment += 1
+            offset = 0
+
+    # finished segments are opened from their index, only the last one is scanned
+    # segment which was finished but whose index wasn't written because of crash gets its index rebuilt
+    def load_segments(self):
+        segment_count = 0
+        while os.path.exists(self.get_path(DATA_FILE_TEMPLATE, segment_count)):
+            segment_count += 1
+        self.segment_count = segment_count
+
+        for segment in range(segment_count):
+            segment_index = SegmentIndex.open(self.get_path(INDEX_FILE_TEMPLATE, segment))
+            if segment_index is None and segment == segment_count - 1:
+                self.load_active_segment(segment)
+                return
+            if segment_index is None:
+                self.load_active_segment(segment)
+                self.seal_segment(segment)
+                segment_index = SegmentIndex.open(self.get_path(INDEX_FILE_TEMPLATE, segment))
+            self.segment_indexes.append(segment_index)
+
+        # every segment is finished, new records go to the next one
+        self.segment_count += 1
+
+    # records are appended one after another, so everything after the first invalid record is a torn write
+    def load_active_segment(self, segment):
+        data_path = self.get_path(DATA_FILE_TEMPLATE, segment)
+        data_size = os.path.getsize(data_path)
+        offset = 0
+        while offset + RECORD_PREFIX_SIZE <= data_size:
+            data_map = self.get_map(segment, offset + RECORD_PREFIX_SIZE)
+            checksum, = CHECKSUM.unpack_from(data_map, offset)
+            block_hash, block_number, length = RECORD_HEADER.unpack_from(data_map, offset + CHECKSUM.size)
+            end = offset + RECORD_PREFIX_SIZE + length
+            if end > data_size:
+                break
+            if zlib.crc32(self.get_map(segment, end)[offset + CHECKSUM.size:end]) != checksum:
+                break
+            self.add_active_location(block_hash, block_number, offset)
+            offset = end
+
+        # drop partially written tail, so new records are appended right after last complete one
+        if offset != data_size:
+            self.drop_map(segment)
+            os.truncate(data_path, offset)
+
+    # writes index of active segment, it's written to temporary file and renamed, so it's never partially written
+    def seal_segment(self, segment):
+        hash_entries = sorted((block_hash, block_number, offset)
+                              for block_hash, (offset, block_number) in self.active_by_hash.items())
+        number_entries = sorted((block_number, offset)
+                                for block_number, offsets in self.active_by_number.items() for offset in offsets)
+        index_path = self.get_path(INDEX_FILE_TEMPLATE, segment)
+        with open(index_path + ".tmp", "wb") as index_file:
+            index_file.write(INDEX_HEADER.pack(len(hash_entries)))
+            for hash_entry in hash_entries:
+                index_file.write(HASH_ENTRY.pack(*hash_entry))
+            for number_entry in number_entries:
+                index_file.write(NUMBER_ENTRY.pack(*number_entry))
+            if self.sync_policy != SyncPolicy.NEVER:
+                index_file.flush()
+                os.fsync(index_file.fileno())
+        os.replace(index_path + ".tmp", index_path)
+        self.active_by_hash = {}
+        self.active_by_number = {}
+
+    # returns (block hash, height, segment, offset) or None if checkpoint is missing, corrupted
+    # or points to record which doesn't hold checkpoint block
+    def load_checkpoint(self):
+        checkpoint_path = os.path.join(self.directory, CHECKPOINT_FILE)
+        if not os.path.exists(checkpoint_path):
+            return None
+        with open(checkpoint_path, "rb") as checkpoint_file:
+            raw_checkpoint = checkpoint_file.read()
+        if len(raw_checkpoint) != CHECKSUM.size + CHECKPOINT.size:
+            return None
+        checksum, = CHECKSUM.unpack_from(raw_checkpoint)
+        if zlib.crc32(raw_checkpoint[CHECKSUM.size:]) != checksum:
+            return None
+        checkpoint_hash, height, segment, offset = CHECKPOINT.unpack_from(raw_checkpoint, CHECKSUM.size)
+        location = self.find_location(checkpoint_hash)
+        if location is None or location[:2] != (segment, offset):  # checkpoint block was lost in interrupted write
+            return None
+        return checkpoint_hash, height, segment, offset
+
+    # checkpoint is written to temporary file and renamed, so it's never partially written
+    def save_checkpoint(self, checkpoint_hash, height, segment, offset):
+        if self.sync_policy != SyncPolicy.NEVER:
+            self.sync()
+        raw_checkpoint = CHECKPOINT.pack(checkpoint_hash, height, segment, offset)
+        self.write_checksummed(CHECKPOINT_FILE, raw_checkpoint)
+
+    def save_checkpoint_state(self, checkpoint_hash, raw_state):
+        self.write_checksummed(CHECKPOINT_STATE_FILE, checkpoint_hash + raw_state)
+
+    # returns state saved for given checkpoint, None if it is missing, corrupted or saved for other checkpoint
+    def load_checkpoint_state(self, checkpoint_hash):
+        state_path = os.path.join(self.directory, CHECKPOINT_STATE_FILE)
+        if not os.path.exists(state_path):
+            return None
+        with open(state_path, "rb") as state_file:
+            raw_state = state_file.read()
+        if len(raw_state) < CHECKSUM.size + len(checkpoint_hash):
+            return None
+        checksum, = CHECKSUM.unpack_from(raw_state)
+        if zlib.crc32(raw_state[CHECKSUM.size:]) != checksum:
+            return None
+        if raw_state[CHECKSUM.size:CHECKSUM.size + len(checkpoint_hash)] != checkpoint_hash:
+            return None
+        return raw_state[CHECKSUM.size + len(checkpoint_hash):]
+
+    def write_checksummed(self, file_name, raw_data):
+        path = os.path.join(self.directory, file_name)
+        with open(path + ".tmp", "wb") as output_file:
+            output_file.write(CHECKSUM.pack(zlib.crc32(raw_data)) + raw_data)
+            if self.sync_policy != SyncPolicy.NEVER:
+                output_file.flush()
+                os.fsync(output_file.fileno())
+        os.replace(path + ".tmp", path)
+
+    def open_active_segment(self):
+        if self.segment_count == 0:
+            self.segment_count = 1
+        segment = self.segment_count - 1
+        self.data_file = open(self.get_path(DATA_FILE_TEMPLATE, segment), "ab")
+
+    def start_next_segment(self):
+        if self.sync_policy != SyncPolicy.NEVER:
+            self.sync()
+        self.data_file.close()
+        segment = self.segment_count - 1
+        self.seal_segment(segment)
+        self.segment_indexes.append(SegmentIndex.open(self.get_path(INDEX_FILE_TEMPLATE, segment)))
+        self.segment_count += 1
+        self.open_active_segment()
+
+
+# mmapped index of finished segment
+# hash entries are searched by block hash and number entries by block number right in the mapped file
+class SegmentIndex:
+
+    def __init__(self, index_map, block_count):
+        self.map = index_map
+        self.block_count = block_count
+        self.hash_entries_offset = INDEX_HEADER.size
+        self.number_entries_offset = self.hash_entries_offset + block_count * HASH_ENTRY.size
+
+    # returns None if index is missing or its size doesn't match block count in its header
+    @staticmethod
+    def open(path):
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as index_file:
+            index_map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(index_map) >= INDEX_HEADER.size:
+            block_count, = INDEX_HEADER.unpack_from(index_map, 0)
+            if len(index_map) == INDEX_HEADER.size + block_count * (HASH_ENTRY.size + NUMBER_ENTRY.size):
+                return SegmentIndex(index_map, block_count)
+        index_map.close()
+        return None
+
+    # returns (block number, record offset) or None if block is not in segment
+    def find(self, block_hash):
+        index = bisect_left(EntryKeys(self.map, self.hash_entries_offset, self.block_count, HASH_ENTRY), block_hash)
+        if index < self.block_count:
+            found_hash, block_number, offset = \
+                HASH_ENTRY.unpack_from(self.map, self.hash_entries_offset + index * HASH_ENTRY.size)
+            if found_hash == block_hash:
+                return block_number, offset
+        return None
+
+    # returns record offsets of blocks with given number in writing order
+    def get_offsets(self, block_number):
+        offsets = []
+        index = bisect_left(EntryKeys(self.map, self.number_entries_offset, self.block_count, NUMBER_ENTRY),
+                            block_number)
+        while index < self.block_count:
+            found_number, offset = \
+                NUMBER_ENTRY.unpack_from(self.map, self.number_entries_offset + index * NUMBER_ENTRY.size)
+            if found_number != block_number:
+                break
+            offsets.append(offset)
+            index += 1
+        return offsets
+
+    def close(self):
+        self.map.close()
+
+
+# sequence view of the first field of fixed width entries, so bisect can search them without loading whole table
+class EntryKeys:
+    def __init__(self, data, offset, count, entry):
+        self.data = data
+        self.offset = offset
+        self.count = count
+        self.entry = entry
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.entry.unpack_from(self.data, self.offset + index * self.entry.size)[0]
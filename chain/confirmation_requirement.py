@@ -8,11 +8,16 @@ class ConfirmationRequirement:
     def __init__(self, dag: Dag):
         self.dag = dag
         dag.subscribe_to_new_block_notification(self)
-        genesis_hash = dag.genesis_block().get_hash()
-        self.blocks = {genesis_hash : ZETA_MAX}
+        dag.subscribe_to_blocks_pruned_notification(self)
+        root_hash = dag.get_root_hash()
+        self.blocks = {root_hash : ZETA_MAX}
 
     def on_new_block_added(self, block):
         block_hash = block.get_hash()
+        # restored checkpoint, blocks it links to are pruned, so the highest requirement is assumed
+        if block_hash == self.dag.checkpoint_hash:
+            self.blocks[block_hash] = ZETA_MAX
+            return
 
         #TODO think if attack is possible here
         req = self.choose_next_best_requirement(block_hash)
@@ -26,6 +31,11 @@ class ConfirmationRequirement:
 
         self.blocks[block.get_hash()] = current_zeta
 
+    def on_blocks_pruned(self, pruned_blocks):
+        for block_list in pruned_blocks.values():
+            for block in block_list:
+                self.blocks.pop(block.get_hash(), None)
+
     def on_timeslot_changed(self, prev_timeslot, current_timeslot):
         pass
 
@@ -88,6 +98,8 @@ class ConfirmationRequirement:
     # finds if there is a sequence of uninterrupted same value requirements
     # returns True if next value should be increased by one
     def recursive_sequence_finder(self, block_hash, initial_req_value, lookback_count):
+        if block_hash == self.dag.checkpoint_hash:  # sequence can't be traced into pruned part of dag
+            return False
         block_number = self.dag.get_block_number(block_hash)
         for prev_hash in self.dag.get_links(block_hash):
             prev_block_number = self.dag.get_block_number(prev_hash)
@@ -15,7 +15,6 @@ class ConflictFinder:
             :return: top - hash of top block in current chain
                      conflicts - ordered hash list of conflict blocks
         """
-        all_conflicts = []
         # get ancestor
         ancestor_for_top = self.dag.get_common_ancestor(top_blocks)
         # get ancestor block number
@@ -26,9 +25,8 @@ class ConflictFinder:
         # get chosen top bock number
         top_block_number = self.dag.get_block_number(top_block_hash)
 
-        # append all conflicts by range from accessor to top block timeslot (include all blocks in top timeslot)
-        for block_number in range(ancestor_block_number + 1, top_block_number + 1):
-            all_conflicts.append(self.dag.blocks_by_number[block_number])
+        # all blocks by range from accessor to top block timeslot (include all blocks in top timeslot)
+        all_conflicts = self.dag.timeslots.get_hashes_in_range(ancestor_block_number + 1, top_block_number + 1)
 
         # filter conflicts from determined top logical chin blocks
         conflicts_list = self.check_conflicts_for_determined_top(top_block_hash=top_block_hash,
@@ -66,8 +64,7 @@ class ConflictFinder:
         max_length = 0
         max_length_index = 0
         for i in range(0, len(top_blocks)):
-            length = len(self.get_top_chain_block_hashes(from_hash=top_blocks[i],
-                                                         to_hash=ancestor_for_top))
+            length = self.dag.calculate_chain_length(top_blocks[i], ancestor_for_top)
             if length > max_length:
                 max_length = length
                 max_length_index = i
@@ -78,28 +75,13 @@ class ConflictFinder:
             with excluded selected top and top logical blocks
             :param top_block_hash: hash on determined block
             :param ancestor_for_top: ancestor (lower sampling limit)
-            :param conflicts: current total list of conflicts
+            :param conflicts: hashes of all blocks between ancestor and top
             :return: ready to use cleaned list of conflicts
         """
-        conflicts_list_result = []  # result
-        # make conflicts as list
-        for conflict in conflicts:
-            for block in conflict:
-                conflicts_list_result.append(block)
-
         # get all block hashes for determined top
-        top_chain_block_hashes = self.get_top_chain_block_hashes(from_hash=top_block_hash,
-                                                                 to_hash=ancestor_for_top)
-        conflicts_list_result_hashes = []
-        for conflict in conflicts_list_result:
-            conflicts_list_result_hashes.append(conflict.block.get_hash())
-
-        for block_hash in top_chain_block_hashes:
-            if block_hash:
-                if block_hash in conflicts_list_result_hashes:
-                    conflicts_list_result_hashes.remove(block_hash)
-
-        return conflicts_list_result_hashes
+        top_chain_block_hashes = set(self.get_top_chain_block_hashes(from_hash=top_block_hash,
+                                                                     to_hash=ancestor_for_top))
+        return [block_hash for block_hash in conflicts if block_hash not in top_chain_block_hashes]
 
     def get_top_chain_block_hashes(self, from_hash, to_hash):
         """ Method return list of logical block by block chain
@@ -122,7 +104,7 @@ class ConflictFinder:
             else:
                 block_hash = None
 
-        flat_chain.append(self.dag.blocks_by_hash[to_hash])
+        flat_chain.append(to_hash)
 
         return list(reversed(flat_chain))
 
@@ -4,6 +4,7 @@ class ConflictWatcher:
         self.dag = dag
         self.pubkeys_by_epochs = {}  # epoch number : public_key : block hashes list
         self.blocks = {}  # block hash : (public key, epoch_number)
+        dag.subscribe_to_blocks_pruned_notification(self)
 
     def on_new_block_by_validator(self, block_hash, epoch_number, public_key):
         self.blocks[block_hash] = (public_key, epoch_number)
@@ -17,6 +18,20 @@ class ConflictWatcher:
 
             # public_key : [block_hash]
 
+    def on_blocks_pruned(self, pruned_blocks):
+        for block_list in pruned_blocks.values():
+            for block in block_list:
+                block_hash = block.get_hash()
+                if block_hash not in self.blocks:  # genesis is not signed by validator
+                    continue
+                public_key, epoch_number = self.blocks.pop(block_hash)
+                pubkeys = self.pubkeys_by_epochs[epoch_number]
+                pubkeys[public_key].remove(block_hash)
+                if not pubkeys[public_key]:
+                    del pubkeys[public_key]
+                if not pubkeys:
+                    del self.pubkeys_by_epochs[epoch_number]
+
     def get_conflicts_by_block(self, block_hash):
         assert block_hash in self.blocks, "No block in conflict watcher with hash %r" % block_hash.hex()
         pubkey, epoch_number = self.blocks[block_hash]
@@ -37,11 +52,7 @@ class ConflictWatcher:
 
         merge_range = range(common_ancestor_number, latest_top_number + 1)
 
-        all_merge_blocks = []
-        for i in merge_range:
-            if i in self.dag.blocks_by_number:
-                for block in self.dag.blocks_by_number[i]:
-                    all_merge_blocks.append(block.get_hash())
+        all_merge_blocks = self.dag.timeslots.get_hashes_in_range(merge_range.start, merge_range.stop)
 
         explicit_conflicts = []  # conflicts for sure, to be ignored
         candidate_conflicts = []  # one of these should be chosen by longest chain rule
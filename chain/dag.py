@@ -2,8 +2,10 @@ import random
 from chain.block import Block
 from chain.signed_block import SignedBlock
 from chain.genesis import Genesis
+from chain.timeslot_index import TimeslotIndex
 from transaction.gossip_transaction import NegativeGossipTransaction, PositiveGossipTransaction, \
     PenaltyGossipTransaction
+from transaction.stake_transaction import PenaltyTransaction
 
 
 class Dag:
@@ -12,16 +14,28 @@ class Dag:
         self.blocks_by_hash = {}  # just hash map hash:block
         self.blocks_by_number = {}  # key is timeslot number, value is a list of blocks in this timeslot
         self.block_numbers_by_hash = {}
+        self.timeslots = TimeslotIndex()  # dense index of block hashes by timeslot for range queries
         self.transactions_by_hash = {}  # key is tx_hash, value is tx
         self.payments_by_hash = {}
-        self.existing_links = []
+        # secondary transaction indexes, values are dicts of tx_hash:tx, so tx included in several blocks is stored once
+        self.transactions_by_type = {}  # key is tx class
+        self.transactions_by_sender = {}  # key is sender pubkey
+        self.gossips_by_block_number = {}  # key is block number negative gossip is about
+        self.gossips_by_block_hash = {}  # key is block hash positive gossip is about
+        self.penalties_by_conflict = {}  # key is conflicting block hash or gossip hash penalty refers to
+        self.block_hashes_by_tx_hash = {}  # key is tx_hash, value is a set of hashes of blocks containing it
+        self.children_by_hash = {}  # reverse links, key is block hash, value is a set of hashes of blocks linking to it
+        self.heights = {}  # key is block hash, value is amount of non skipped blocks in first parent chain excluding genesis
+        self.ancestor_jumps = {}  # key is block hash, value is list of first parent ancestors 1, 2, 4, 8... steps back
         self.tops = {}
         self.new_block_listeners = []
         self.new_top_block_event_listeners = []
+        self.blocks_pruned_listeners = []
         self.genesis = Genesis(genesis_creation_time)
         signed_genesis_block = SignedBlock()
         signed_genesis_block.set_block(self.genesis)
         self.add_signed_block(0, signed_genesis_block)
+        self.checkpoint_hash = self.genesis.get_hash()  # earliest block kept in memory, everything before is pruned
 
     def genesis_block(self):
         return self.genesis
@@ -29,6 +43,11 @@ class Dag:
     def genesis_hash(self):
         return self.genesis.get_hash()
 
+    # genesis until dag is pruned or restored from checkpoint, then checkpoint block
+    # use it instead of genesis where chain walks stop, since genesis is not in dag anymore after pruning
+    def get_root_hash(self):
+        return self.checkpoint_hash
+
     # ------------------------------
     # block methods
     # ------------------------------
@@ -42,27 +61,61 @@ class Dag:
             self.blocks_by_number[index].append(block)
         else:
             self.blocks_by_number[index] = [block]
+        self.timeslots.add_block(index, block_hash, block.block.prev_hashes)
+        self.add_ancestor_jumps(block_hash, block.block.prev_hashes)
         
         # determine if block shadows previous top block
         prev_hashes = block.block.prev_hashes
         for prev_hash in prev_hashes:
             if prev_hash in self.tops:
                 del self.tops[prev_hash]
+            self.children_by_hash.setdefault(prev_hash, set()).add(block_hash)
 
-        # determine if block should be top block
-        self.existing_links += prev_hashes
-        if block_hash not in self.existing_links:
-            self.tops[block_hash] = block
-            for listener in self.new_top_block_event_listeners:
-                listener.on_top_block_added(block, block_hash)
+        # new block can't have children yet, since parents are always added before their children
+        self.children_by_hash[block_hash] = set()
+        self.tops[block_hash] = block
+        for listener in self.new_top_block_event_listeners:
+            listener.on_top_block_added(block, block_hash)
         
         # TODO move this to separate transaction holder by subscribing to on_block_added event
         self.add_txs_by_hash(block.block.system_txs)
         self.add_payments_by_hash(block.block.payment_txs)
+        self.add_tx_indexes(block_hash, block.block.system_txs)
+        self.add_tx_indexes(block_hash, block.block.payment_txs)
 
         for listener in self.new_block_listeners:
             listener.on_new_block_added(block)
     
+    # makes block dag was pruned at the root of new dag instead of genesis, so pruned dag can be restored from storage
+    # links of checkpoint point to pruned blocks, so they are not indexed
+    def restore_checkpoint(self, index, block, height):
+        assert len(self.blocks_by_hash) == 1, "Checkpoint can be restored only into new dag"
+        assert index > 0, "Checkpoint should be after genesis"
+        pruned_blocks = self.remove_blocks(0, 1)  # genesis
+        self.timeslots.remove_slots_before(index)
+
+        block_hash = block.get_hash()
+        self.blocks_by_hash[block_hash] = block
+        self.block_numbers_by_hash[block_hash] = index
+        self.blocks_by_number[index] = [block]
+        self.timeslots.add_block(index, block_hash, [])
+        self.heights[block_hash] = height
+        self.ancestor_jumps[block_hash] = []
+        self.children_by_hash[block_hash] = set()
+        self.checkpoint_hash = block_hash
+        self.tops[block_hash] = block
+        self.add_txs_by_hash(block.block.system_txs)
+        self.add_payments_by_hash(block.block.payment_txs)
+        self.add_tx_indexes(block_hash, block.block.system_txs)
+        self.add_tx_indexes(block_hash, block.block.payment_txs)
+
+        for listener in self.blocks_pruned_listeners:
+            listener.on_blocks_pruned(pruned_blocks)
+        for listener in self.new_top_block_event_listeners:
+            listener.on_top_block_added(block, block_hash)
+        for listener in self.new_block_listeners:
+            listener.on_new_block_added(block)
+
     def get_top_blocks(self):
         return self.tops
     
@@ -73,6 +126,9 @@ class Dag:
     def get_top_hashes(self):
         return self.get_top_blocks_hashes()
 
+    def is_top(self, block_hash):
+        return block_hash in self.tops
+
     def has_block_number(self, number):
         return number in self.blocks_by_number
 
@@ -80,13 +136,13 @@ class Dag:
         assert block_hash in self.block_numbers_by_hash
         return self.block_numbers_by_hash[block_hash]
 
+    # returns amount of non skipped blocks in first parent chain between two blocks, both ends included
+    # to_block should be first parent chain ancestor of from_block
     def calculate_chain_length(self, from_block, to_block):
-        chain_iter = ChainIter(self, from_block)
-        count = 0
-        for block in chain_iter:
-            if block:
-                count += 1
-        return count
+        to_height = self.heights[to_block]
+        assert self.get_ancestor_at_height(from_block, to_height) == to_block, \
+            "Chain length can be calculated only to first parent chain ancestor"
+        return self.heights[from_block] - to_height + 1
 
     def recursive_previous_block_count(self, block, count):
         count[0] += 1   # trick to emulate pass by reference
@@ -94,17 +150,35 @@ class Dag:
             block = self.blocks_by_hash[prev_hash]
             self.recursive_previous_block_count(block, count)
 
+    # block in first parent chain is found with ancestor jumps in logarithmic time
+    # otherwise searches all previous links, but never descends below timeslot of block we look for
+    # since ancestor always has smaller block number than its descendants
+    # every block is visited at most once, so merges don't multiply the amount of work
     def is_ancestor(self, block_hash, hash_to_find):
         if block_hash == hash_to_find:
             return True
-            
-        block = self.blocks_by_hash[block_hash]
-        result = False
-        for prev_hash in block.block.prev_hashes:
-            if prev_hash == hash_to_find:
-                return True
-            result = result or self.is_ancestor(prev_hash, hash_to_find)
-        return result
+
+        if hash_to_find not in self.block_numbers_by_hash:
+            return False
+        number_to_find = self.block_numbers_by_hash[hash_to_find]
+
+        if self.get_earliest_ancestor_not_below(block_hash, number_to_find) == hash_to_find:
+            return True
+
+        visited = set()
+        stack = [block_hash]
+        while stack:
+            block = self.blocks_by_hash[stack.pop()]
+            for prev_hash in block.block.prev_hashes:
+                if prev_hash == hash_to_find:
+                    return True
+                if prev_hash in visited:
+                    continue
+                visited.add(prev_hash)
+                # links of checkpoint block lead to pruned blocks
+                if self.block_numbers_by_hash.get(prev_hash, -1) >= number_to_find:
+                    stack.append(prev_hash)
+        return False
 
     # returns longest chain and chooses randomly if there are equal length longest chains
     def get_longest_chain_top(self, tops):
@@ -129,68 +203,142 @@ class Dag:
     def subscribe_to_new_top_block_notification(self, listener):
         self.new_top_block_event_listeners.append(listener)
 
+    def subscribe_to_blocks_pruned_notification(self, listener):
+        self.blocks_pruned_listeners.append(listener)
+
+    # returns hashes of blocks which link to given block (forward traversal)
     def collect_next_blocks(self, block_hash):
-        next_blocks = []
-        for block in self.blocks_by_hash:
-            if block_hash in block.block.prev_hashes:
-                next_blocks.append(block.get_hash())
-        return next_blocks
+        return list(self.children_by_hash.get(block_hash, ()))
 
+    # returns hashes of blocks in [start, end) range which are not linked by other blocks of this range
     def get_branches_for_timeslot_range(self, start, end):
-        all_blocks_in_range = {}
-        for i in range(start,end):
-            block_list = self.blocks_by_number.get(i,[])
-            for block in block_list:
-                all_blocks_in_range[block.block.get_hash()] = block.block
-
-        links = []
-        for block in all_blocks_in_range.values():
-            links += block.prev_hashes
-        
-        for link in links:
-            if link in all_blocks_in_range:
-                del all_blocks_in_range[link]
-
-        top_hashes = list(all_blocks_in_range.keys())
-
-        return top_hashes
+        return self.timeslots.get_tips_in_range(start, end)
 
     def get_links(self, block_hash):
         assert block_hash in self.blocks_by_hash, "No block with such hash found"
         return self.blocks_by_hash[block_hash].block.prev_hashes
 
-    #it should be named calculate since it is not quite instant action
+    # returns latest block which is present in first parent chains of all given blocks
     def get_common_ancestor(self, chain_list):
-        chains_blocks_lists = []
-        iters = []
-        length = len(chain_list)
-        for i in range(length):
-            chains_blocks_lists.append([])
-            iterator = ChainIter(self, chain_list[i])
-            iters.append(iterator)
-
-        while True:  # TODO sane exit condition
-            this_round_blocks = []
-            for i in range(length):
-                try:
-                    block = iters[i].next()
-                    if block:
-                        block_hash = block.get_hash()
-                        chains_blocks_lists.append(block_hash)
-                        this_round_blocks.append(block_hash)
-                except StopIteration:
-                    pass
-
-            for block in this_round_blocks:
-                count = 0
-                for block_list in chains_blocks_lists:
-                    if block in block_list:
-                        count += 1
-                if count == length:
-                    return block
-
-        assert False, "No common ancestor found"
-        return None
+        common_ancestor = chain_list[0]
+        for block_hash in chain_list[1:]:
+            common_ancestor = self.get_pair_common_ancestor(common_ancestor, block_hash)
+        return common_ancestor
+
+    def get_pair_common_ancestor(self, first_hash, second_hash):
+        first_height = self.heights[first_hash]
+        second_height = self.heights[second_hash]
+        if first_height > second_height:
+            first_hash = self.get_ancestor_at_height(first_hash, second_height)
+        elif second_height > first_height:
+            second_hash = self.get_ancestor_at_height(second_hash, first_height)
+
+        if first_hash == second_hash:
+            return first_hash
+
+        # both blocks stay on the same height, so their jump lists always have the same length
+        for i in reversed(range(len(self.ancestor_jumps[first_hash]))):
+            first_jumps = self.ancestor_jumps[first_hash]
+            second_jumps = self.ancestor_jumps[second_hash]
+            if i < len(first_jumps) and first_jumps[i] != second_jumps[i]:
+                first_hash = first_jumps[i]
+                second_hash = second_jumps[i]
+
+        return self.ancestor_jumps[first_hash][0]
+
+    # returns first parent chain ancestor of block which has given height
+    def get_ancestor_at_height(self, block_hash, height):
+        assert height <= self.heights[block_hash], "Requested height is above the block"
+        steps = self.heights[block_hash] - height
+        i = 0
+        while steps:
+            if steps & 1:
+                block_hash = self.ancestor_jumps[block_hash][i]
+            steps >>= 1
+            i += 1
+        return block_hash
+
+    # returns latest first parent chain ancestor (or block itself) which block number is not greater than given
+    def get_ancestor_by_block_number(self, block_hash, block_number):
+        assert block_number >= 0, "Block number can't be negative"
+        if self.block_numbers_by_hash[block_hash] <= block_number:
+            return block_hash
+
+        # descend to the earliest ancestor which is still above given block number
+        for i in reversed(range(len(self.ancestor_jumps[block_hash]))):
+            jumps = self.ancestor_jumps[block_hash]
+            if i < len(jumps) and self.block_numbers_by_hash[jumps[i]] > block_number:
+                block_hash = jumps[i]
+
+        assert self.ancestor_jumps[block_hash], "Requested block number is in pruned part of dag"
+        return self.ancestor_jumps[block_hash][0]
+
+    # returns earliest first parent chain ancestor (or block itself) which block number is not less than given
+    # unlike get_ancestor_by_block_number never leaves kept part of dag
+    def get_earliest_ancestor_not_below(self, block_hash, block_number):
+        for i in reversed(range(len(self.ancestor_jumps[block_hash]))):
+            jumps = self.ancestor_jumps[block_hash]
+            if i < len(jumps) and self.block_numbers_by_hash[jumps[i]] >= block_number:
+                block_hash = jumps[i]
+        return block_hash
+
+    # jump i points to first parent ancestor 2^i steps back
+    # it is found as jump i-1 of our jump i-1 ancestor
+    def add_ancestor_jumps(self, block_hash, prev_hashes):
+        if not prev_hashes:  # genesis block
+            self.heights[block_hash] = 0
+            self.ancestor_jumps[block_hash] = []
+            return
+
+        first_prev_hash = prev_hashes[0]
+        assert first_prev_hash in self.heights, "Trying to add block linking to unknown block"
+        self.heights[block_hash] = self.heights[first_prev_hash] + 1
+        jumps = [first_prev_hash]
+        while len(self.ancestor_jumps[jumps[-1]]) >= len(jumps):
+            jumps.append(self.ancestor_jumps[jumps[-1]][len(jumps) - 1])
+        self.ancestor_jumps[block_hash] = jumps
+
+    # removes every block older than checkpoint, so checkpoint becomes the new root of dag
+    # every block which stays in dag should have checkpoint in its first parent chain
+    # and no block except checkpoint should link to pruned part of dag (see Pruner)
+    def prune(self, checkpoint_hash):
+        checkpoint_number = self.get_block_number(checkpoint_hash)
+        previous_checkpoint_number = self.get_block_number(self.checkpoint_hash)
+        assert checkpoint_number >= previous_checkpoint_number, "Checkpoint can't be moved backwards"
+
+        pruned_blocks = self.remove_blocks(previous_checkpoint_number, checkpoint_number)
+
+        # cut jumps leading to pruned blocks, so checkpoint acts like genesis for the rest of dag
+        # jumps are ordered by distance, so pruned ones are always at the end of the list
+        for jumps in self.ancestor_jumps.values():
+            while jumps and jumps[-1] not in self.heights:
+                jumps.pop()
+
+        self.checkpoint_hash = checkpoint_hash
+        for listener in self.blocks_pruned_listeners:
+            listener.on_blocks_pruned(pruned_blocks)
+
+    # removes blocks of [start, end) timeslots from every index, returns them in the same form as blocks_by_number
+    def remove_blocks(self, start, end):
+        removed_blocks = {}
+        for block_number in range(start, end):
+            if block_number in self.blocks_by_number:
+                removed_blocks[block_number] = self.blocks_by_number.pop(block_number)
+
+        for block_list in removed_blocks.values():
+            for block in block_list:
+                block_hash = block.get_hash()
+                del self.blocks_by_hash[block_hash]
+                del self.block_numbers_by_hash[block_hash]
+                del self.heights[block_hash]
+                del self.ancestor_jumps[block_hash]
+                self.tops.pop(block_hash, None)
+                self.children_by_hash.pop(block_hash, None)
+                self.remove_tx_indexes(block_hash, block.block.system_txs)
+                self.remove_tx_indexes(block_hash, block.block.payment_txs)
+
+        self.timeslots.remove_slots_before(end)
+        return removed_blocks
 
     # ------------------------------
     # transaction methods
@@ -210,35 +358,90 @@ class Dag:
         assert result, ("Cant find tx by hash", tx_hash)  # TODO remove ?
         return result
 
+    # tx is indexed once, when the first block containing it is added
+    def add_tx_indexes(self, block_hash, txs):
+        for tx in txs:
+            tx_hash = tx.get_hash()
+            containing_blocks = self.block_hashes_by_tx_hash.setdefault(tx_hash, set())
+            containing_blocks.add(block_hash)
+            if len(containing_blocks) > 1:
+                continue
+            for index, key in self.get_tx_index_keys(tx):
+                index.setdefault(key, {})[tx_hash] = tx
+
+    # tx is removed from indexes when the last block containing it is pruned
+    def remove_tx_indexes(self, block_hash, txs):
+        for tx in txs:
+            tx_hash = tx.get_hash()
+            containing_blocks = self.block_hashes_by_tx_hash.get(tx_hash)
+            if containing_blocks is None:
+                continue
+            containing_blocks.discard(block_hash)
+            if containing_blocks:
+                continue
+            del self.block_hashes_by_tx_hash[tx_hash]
+            self.transactions_by_hash.pop(tx_hash, None)
+            self.payments_by_hash.pop(tx_hash, None)
+            for index, key in self.get_tx_index_keys(tx):
+                indexed_txs = index[key]
+                del indexed_txs[tx_hash]
+                if not indexed_txs:
+                    del index[key]
+
+    # returns (index, key) pairs under which tx should be stored
+    def get_tx_index_keys(self, tx):
+        keys = [(self.transactions_by_type, type(tx))]
+        pubkey = getattr(tx, "pubkey", None)  # gossips and stake transactions
+        if pubkey:
+            keys.append((self.transactions_by_sender, pubkey))
+        if isinstance(tx, NegativeGossipTransaction):
+            keys.append((self.gossips_by_block_number, tx.number_of_block))
+        elif isinstance(tx, PositiveGossipTransaction):
+            keys.append((self.gossips_by_block_hash, tx.block_hash))
+        elif isinstance(tx, (PenaltyGossipTransaction, PenaltyTransaction)):
+            for conflict in tx.conflicts:
+                keys.append((self.penalties_by_conflict, conflict))
+        return keys
+
+    # tx_type is transaction class, e.g. NegativeGossipTransaction
     def get_txs_by_type(self, tx_type):
-        result = []
-        for tx_hash, tx in self.transactions_by_hash:
-            if isinstance(tx_type, NegativeGossipTransaction):
-                if isinstance(tx, NegativeGossipTransaction):
-                    result.append(tx)
-            if isinstance(tx_type, PositiveGossipTransaction):
-                if isinstance(tx, PositiveGossipTransaction):
-                    result.append(tx)
-            if isinstance(tx_type, PenaltyGossipTransaction):
-                if isinstance(tx, PenaltyGossipTransaction):
-                    result.append(tx)
-        return result
+        return list(self.transactions_by_type.get(tx_type, {}).values())
+
+    # returns None if there is no tx of such type with given hash
+    def get_tx_by_type_and_hash(self, tx_type, tx_hash):
+        return self.transactions_by_type.get(tx_type, {}).get(tx_hash)
+
+    def get_txs_by_sender(self, pubkey):
+        return list(self.transactions_by_sender.get(pubkey, {}).values())
 
     def get_negative_gossips(self):
-        return self.get_txs_by_type(NegativeGossipTransaction())
+        return self.get_txs_by_type(NegativeGossipTransaction)
 
     def get_positive_gossips(self):
-        return self.get_txs_by_type(PositiveGossipTransaction())
+        return self.get_txs_by_type(PositiveGossipTransaction)
 
     def get_penalty_gossips(self):
-        return self.get_txs_by_type(PenaltyGossipTransaction())
+        return self.get_txs_by_type(PenaltyGossipTransaction)
+
+    def get_negative_gossips_by_block_number(self, block_number):
+        return list(self.gossips_by_block_number.get(block_number, {}).values())
+
+    def get_positive_gossips_by_block_hash(self, block_hash):
+        return list(self.gossips_by_block_hash.get(block_hash, {}).values())
+
+    # returns penalty gossips and penalty transactions which mention given block or gossip hash as conflict
+    def get_penalties_by_conflict(self, conflict_hash):
+        return list(self.penalties_by_conflict.get(conflict_hash, {}).values())
+
+    def get_block_hashes_by_tx_hash(self, tx_hash):
+        return list(self.block_hashes_by_tx_hash.get(tx_hash, ()))
 
 
 # iterator over DAG, which uses first children only principle when traversing
 # first argument is starting point
 # returns None if block is skipped in the chain and block if it's present
 # first call to next() is block with block_hash itself
-# last one is genesis block
+# last one is genesis block (or checkpoint block if dag was pruned)
 class ChainIter:
     def __init__(self, dag, block_hash):
         self.block_hash = block_hash
@@ -265,7 +468,7 @@ class ChainIter:
         block = self.dag.blocks_by_hash[self.block_hash]
         self.block_number = block_number
         
-        if block_number == 0:  # genesis block. Stop iteration on next()
+        if self.block_hash == self.dag.checkpoint_hash:  # genesis or checkpoint block. Stop iteration on next()
             self.time_to_stop = True
         else:
             self.block_hash = block.block.prev_hashes[0]
@@ -275,5 +478,24 @@ class ChainIter:
     def next(self):
         return self.__next__()
 
+    # returns block number of block (or None) which will be returned by next call to next()
+    def get_next_block_number(self):
+        if self.dag.get_block_number(self.block_hash) == self.block_number and not self.time_to_stop:
+            return self.block_number  # nothing was returned yet
+        return self.block_number - 1
+
+    # moves iterator backwards, so next call to next() returns block (or None) with given block number
+    # skipped part of the chain is not traversed
+    def seek(self, block_number):
+        assert block_number <= self.get_next_block_number(), "Chain iterator can only move backwards"
+        self.block_hash = self.dag.get_ancestor_by_block_number(self.block_hash, block_number)
+        self.block_number = block_number + 1
+
+    # yields blocks (or None) down to given block number inclusive
+    # use seek() first to iterate over reversed range
+    def iterate_down_to(self, block_number):
+        while not self.time_to_stop and self.get_next_block_number() >= block_number:
+            yield self.next()
+
 
 
@@ -1,21 +1,29 @@
 from tools.time import Time
 from crypto.sum_random import sum_random, calculate_validators_indexes
-from crypto.secret import decode_random
+from crypto.secret import decode_randoms
 from crypto.keys import Keys
 from crypto.entropy import Entropy
 from crypto.private import Private
 from transaction.secret_sharing_transactions import PrivateKeyTransaction, SplitRandomTransaction, PublicKeyTransaction
 from transaction.commit_transactions import CommitRandomTransaction, RevealRandomTransaction
 from chain.dag import ChainIter
-from chain.params import Round, ROUND_DURATION, BLOCK_TIME
+from chain.seed_cache import SeedCache, SeedRecord
+from chain.params import Round, ROUND_DURATION, BLOCK_TIME, ENTROPY_VERSION
 
 
 class Epoch:
 
-    def __init__(self, dag):
+    def __init__(self, dag, seed_cache=None):
         self.dag = dag
-        self.tops_and_epochs = {dag.genesis_block().get_hash(): dag.genesis_block().get_hash()}
+        self.tops_and_epochs = {dag.get_root_hash(): dag.get_root_hash()}
         self.dag.subscribe_to_new_top_block_notification(self)
+        self.dag.subscribe_to_new_block_notification(self)
+        self.dag.subscribe_to_blocks_pruned_notification(self)
+        self.epoch_hashes_by_block = {}  # key is block hash, value is epoch hash of that block
+        self.round_index = RoundIndex(dag)
+        # seeds are calculated once per epoch hash, pass SeedCache with path to keep them across restarts
+        self.seed_cache = SeedCache() if seed_cache is None else seed_cache
+        self.dag.subscribe_to_blocks_pruned_notification(self.seed_cache)
         self.current_epoch = 1
         self.genesis_timestamp = dag.genesis_block().timestamp
 
@@ -64,8 +72,12 @@ class Epoch:
     
     def calculate_validators_indexes(self, epoch_hash, validators_count, entropy_source):
         epoch_seed = self.calculate_epoch_seed(epoch_hash)
-        entropy = Entropy.get_nth_derivative(epoch_seed, entropy_source)
-        validators_list = calculate_validators_indexes(entropy, validators_count)
+        return Epoch.get_validators_indexes(epoch_seed, validators_count, entropy_source)
+
+    @staticmethod
+    def get_validators_indexes(epoch_seed, validators_count, entropy_source):
+        entropy = Entropy.get_nth_derivative(epoch_seed, entropy_source, ENTROPY_VERSION)
+        validators_list = calculate_validators_indexes(entropy, validators_count, ENTROPY_VERSION)
         return validators_list
 
     # returns traversable range
@@ -86,16 +98,12 @@ class Epoch:
         return round_start, round_end
 
     def get_private_keys_for_epoch(self, block_hash):
-        round_iter = RoundIter(self.dag, block_hash, Round.PRIVATE)
-
         private_keys = []
 
-        for block in round_iter:
-            if block and block.block.system_txs:
-                for tx in block.block.system_txs:
-                    if isinstance(tx, PrivateKeyTransaction):
-                        private_keys.append(tx.key)
-                        break  # only one private key transaction can exist and it should be signed by block signer
+        for txs in self.round_index.get_round_txs(block_hash, Round.PRIVATE):
+            if txs and txs.has_system_txs:
+                if txs.private_key is not None:
+                    private_keys.append(txs.private_key)  # only one private key transaction can exist
             else:
                 private_keys.append(None)
 
@@ -105,80 +113,105 @@ class Epoch:
 
     def get_public_keys_for_epoch(self, block_hash):
         public_keys = {}
-        round_iter = RoundIter(self.dag, block_hash, Round.PUBLIC)
-
-        for block in round_iter:
-            if block:
-                for tx in block.block.system_txs:
-                    if isinstance(tx, PublicKeyTransaction):
-                        public_keys[tx.pubkey_index] = tx.generated_pubkey
+        for txs in self.round_index.get_round_txs(block_hash, Round.PUBLIC):
+            if txs:
+                for pubkey_index, generated_pubkey in txs.public_keys:
+                    public_keys[pubkey_index] = generated_pubkey
 
         return public_keys
 
     def get_random_splits_for_epoch(self, block_hash):
         random_pieces_list = []
-        round_iter = RoundIter(self.dag, block_hash, Round.SECRETSHARE)
-        for block in round_iter:
-            if block:
-                for tx in block.block.system_txs:
-                    if isinstance(tx, SplitRandomTransaction):
-                        random_pieces_list.append(tx.pieces)
+        for txs in self.round_index.get_round_txs(block_hash, Round.SECRETSHARE):
+            if txs:
+                random_pieces_list += txs.splits
 
         random_pieces_list = list(reversed(random_pieces_list))
         return random_pieces_list
 
     def get_commits_for_epoch(self, block_hash):
         commits = {}
-        round_iter = RoundIter(self.dag, block_hash, Round.COMMIT)
-        for block in round_iter:
-            if block:
-                for tx in block.block.system_txs:
-                    if isinstance(tx, CommitRandomTransaction):
-                        commits[tx.get_hash()] = tx
+        for txs in self.round_index.get_round_txs(block_hash, Round.COMMIT):
+            if txs:
+                for tx in txs.commits:
+                    commits[tx.get_hash()] = tx
 
         return commits
 
     def get_reveals_for_epoch(self, block_hash):
         reveals = []
-        round_iter = RoundIter(self.dag, block_hash, Round.REVEAL)
-        for block in round_iter:
-            if block:
-                for tx in block.block.system_txs:
-                    if isinstance(tx, RevealRandomTransaction):
-                        reveals.append(tx)
+        for txs in self.round_index.get_round_txs(block_hash, Round.REVEAL):
+            if txs:
+                reveals += txs.reveals
         return reveals
 
     def calculate_epoch_seed(self, block_hash):
-        secret_shared_random = self.extract_shared_random(block_hash)
-        commited_random = self.reveal_commited_random(block_hash)
-        return sum_random([secret_shared_random, commited_random])
+        seed = self.seed_cache.get_seed(block_hash)
+        if seed is None:
+            record = self.calculate_seed_record(block_hash)
+            self.seed_cache.put(record)
+            seed = record.seed
+        return seed
+
+    # rounds before root of dag are pruned, so seed of restored root should be cached, see CheckpointState
+    def calculate_seed_record(self, block_hash):
+        if block_hash == self.dag.get_root_hash():
+            assert block_hash == self.dag.genesis_hash(), "Seed of restored root is unknown"
+            return SeedRecord(block_hash)
+
+        return Epoch.derive_seed_record(self.get_seed_inputs(block_hash), self.log)
+
+    # collects round transactions seed is derived from, so derivation itself doesn't need dag
+    def get_seed_inputs(self, block_hash):
+        inputs = SeedInputs()
+        inputs.epoch_hash = block_hash
+        inputs.private_keys = self.get_private_keys_for_epoch(block_hash)
+        inputs.public_keys = self.get_public_keys_for_epoch(block_hash)
+        inputs.random_pieces_list = self.get_random_splits_for_epoch(block_hash)
+        commits = self.get_commits_for_epoch(block_hash)
+        inputs.revealed_commits = []
+        for reveal in self.get_reveals_for_epoch(block_hash):
+            if reveal.commit_hash in commits:
+                inputs.revealed_commits.append((commits[reveal.commit_hash].rand, reveal.key))
+        return inputs
+
+    # decrypts and decodes randoms, can be run in worker process
+    @staticmethod
+    def derive_seed_record(inputs, log=lambda *args: None):
+        private_keys, shared_randoms = Epoch.decode_shared_randoms(inputs, log)
+        revealed_randoms = Epoch.decode_revealed_randoms(inputs)
+        seed = sum_random([sum_random(shared_randoms), sum_random(revealed_randoms)])
+        return SeedRecord(inputs.epoch_hash, seed, private_keys, shared_randoms, revealed_randoms)
 
     def reveal_commited_random(self, block_hash):
-        if block_hash == self.dag.genesis_block().get_hash():
+        if block_hash == self.dag.get_root_hash():
             return 0
-        
-        seed = 0
-        commits = self.get_commits_for_epoch(block_hash)
-        reveals = self.get_reveals_for_epoch(block_hash)
+
+        return sum_random(Epoch.decode_revealed_randoms(self.get_seed_inputs(block_hash)))
+
+    @staticmethod
+    def decode_revealed_randoms(inputs):
         randoms_list = []
-        
-        for reveal in reveals:
-            if reveal.commit_hash in commits:
-                commit = commits[reveal.commit_hash]
-                key = Keys.from_bytes(reveal.key)
-                revealed_data = Private.decrypt(commit.rand, key)
-                randoms_list.append(int.from_bytes(revealed_data, byteorder='big'))
-        seed = sum_random(randoms_list)
-        return seed
+        for rand, reveal_key in inputs.revealed_commits:
+            key = Keys.from_bytes(reveal_key)
+            revealed_data = Private.decrypt(rand, key)
+            randoms_list.append(int.from_bytes(revealed_data, byteorder='big'))
+        return randoms_list
 
     def extract_shared_random(self, block_hash):
-        if block_hash == self.dag.genesis_block().get_hash():
+        if block_hash == self.dag.get_root_hash():
             return 0
-        
-        private_keys = self.get_private_keys_for_epoch(block_hash)
-        public_keys = self.get_public_keys_for_epoch(block_hash)
-        published_private_keys = self.filter_out_skipped_public_keys(private_keys, public_keys)
-        random_pieces_list = self.get_random_splits_for_epoch(block_hash)
+
+        _, randoms_list = Epoch.decode_shared_randoms(self.get_seed_inputs(block_hash), self.log)
+        return sum_random(randoms_list)
+
+    # returns published private keys which match public keys and randoms decoded with them
+    @staticmethod
+    def decode_shared_randoms(inputs, log):
+        private_keys = inputs.private_keys
+        public_keys = inputs.public_keys
+        published_private_keys = Epoch.filter_out_skipped_public_keys(private_keys, public_keys)
+        random_pieces_list = inputs.random_pieces_list
 
         # self.log("pubkeys")
         # for _, public_key in public_keys.items():
@@ -197,12 +230,12 @@ class Epoch:
                 matching_keys_count += 1
 
         pubkey_count = len(public_keys)
-        self.log("pubkey count",
-                 pubkey_count,
-                 "privkey count",
-                 private_key_count,
-                 "of them matching",
-                 matching_keys_count)
+        log("pubkey count",
+            pubkey_count,
+            "privkey count",
+            private_key_count,
+            "of them matching",
+            matching_keys_count)
 
         half_of_pubkeys = int(pubkey_count / 2) + 1
         half_of_privkeys = int(private_key_count / 2) + 1
@@ -216,14 +249,11 @@ class Epoch:
         assert matching_keys_count >= half_of_privkeys, "Not enough matching keys in epoch"
 
         ordered_private_keys_count = len(private_keys) # total amount of both sent and unsent keys
-        randoms_list = []
         for random_pieces in random_pieces_list:
             assert ordered_private_keys_count >= len(random_pieces), "Amount of splits must match amount of public keys"
-            random = decode_random(random_pieces, Keys.list_from_bytes(published_private_keys))
-            randoms_list.append(random)
+        randoms_list = decode_randoms(random_pieces_list, Keys.list_from_bytes(published_private_keys))
 
-        seed = sum_random(randoms_list)
-        return seed
+        return published_private_keys, randoms_list
 
     @staticmethod
     def filter_out_skipped_public_keys(private_keys, public_keys):
@@ -250,16 +280,43 @@ class Epoch:
         epoch_start_block_number = Epoch.get_epoch_start_block_number(epoch_number)
         return global_block_number - epoch_start_block_number
     
+    # epoch hash is last block of previous epoch
+    # or latest block before it if last block of previous epoch is skipped
+    # it's derived from first parent when block is added, so lookup doesn't walk the chain
     def find_epoch_hash_for_block(self, block_hash):
-        chain_iter = ChainIter(self.dag, block_hash)
-        just_take_next_non_skipped_block = False
-        for block in chain_iter:
-            if self.is_last_block_of_epoch(chain_iter.block_number) or just_take_next_non_skipped_block:
-                if block:
-                    return block.get_hash()
-                else:
-                    just_take_next_non_skipped_block = True
-        return None
+        epoch_hash = self.epoch_hashes_by_block.get(block_hash)
+        if epoch_hash is None:
+            epoch_hash = self.calculate_epoch_hash_for_block(block_hash)
+            self.epoch_hashes_by_block[block_hash] = epoch_hash
+        return epoch_hash
+
+    def calculate_epoch_hash_for_block(self, block_hash):
+        block_number = self.dag.get_block_number(block_hash)
+        if self.is_last_block_of_epoch(block_number):
+            return block_hash
+
+        epoch_number = self.get_epoch_number(block_number)
+        previous_epoch_end = self.get_epoch_end_block_number(epoch_number - 1)
+        first_prev_hash = self.dag.get_links(block_hash)[0]
+        if first_prev_hash not in self.dag.blocks_by_hash:  # restored checkpoint, it stands in for pruned epoch hash
+            return block_hash
+        if self.dag.get_block_number(first_prev_hash) <= previous_epoch_end:
+            return first_prev_hash
+
+        # first parent is in the same epoch
+        if first_prev_hash in self.epoch_hashes_by_block:
+            return self.epoch_hashes_by_block[first_prev_hash]
+        # block was added before epoch subscribed to dag
+        return self.dag.get_ancestor_by_block_number(block_hash, previous_epoch_end)
+
+    def on_new_block_added(self, block):
+        self.find_epoch_hash_for_block(block.get_hash())
+
+    def on_blocks_pruned(self, pruned_blocks):
+        for block_list in pruned_blocks.values():
+            for block in block_list:
+                self.epoch_hashes_by_block.pop(block.get_hash(), None)
+                self.tops_and_epochs.pop(block.get_hash(), None)
     
     # returns top blocks hashes and their corresponding epoch seeds
     def get_epoch_hashes(self):
@@ -311,8 +368,8 @@ class RoundIter:
         
         self.round_end = round_start
         self.chain_iter = ChainIter(dag, block_hash)
-        while self.chain_iter.block_number > round_end + 1:
-            self.chain_iter.next()
+        if self.chain_iter.block_number > round_end + 1:
+            self.chain_iter.seek(round_end)
 
     def __iter__(self):
         return self
@@ -329,4 +386,122 @@ class RoundIter:
         return self.chain_iter.block_number
     
     def next(self):
-        return self.__next__()
\ No newline at end of file
+        return self.__next__()
+
+
+# round transactions of epoch needed to derive its seed
+class SeedInputs:
+    __slots__ = ("epoch_hash", "private_keys", "public_keys", "random_pieces_list", "revealed_commits")
+
+
+# round transactions of one block, extracted once when block is added
+class BlockRoundTxs:
+    __slots__ = ("has_system_txs", "private_key", "public_keys", "splits", "commits", "reveals")
+
+    def __init__(self, system_txs):
+        self.has_system_txs = bool(system_txs)
+        self.private_key = None
+        self.public_keys = []  # (pubkey index, generated pubkey) pairs
+        self.splits = []
+        self.commits = []
+        self.reveals = []
+        for tx in system_txs:
+            if isinstance(tx, PrivateKeyTransaction):
+                if self.private_key is None:
+                    self.private_key = tx.key
+            elif isinstance(tx, PublicKeyTransaction):
+                self.public_keys.append((tx.pubkey_index, tx.generated_pubkey))
+            elif isinstance(tx, SplitRandomTransaction):
+                self.splits.append(tx.pieces)
+            elif isinstance(tx, CommitRandomTransaction):
+                self.commits.append(tx)
+            elif isinstance(tx, RevealRandomTransaction):
+                self.reveals.append(tx)
+
+
+# node of persistent list of round timeslots going back from block along its first parent chain
+# skipped is amount of skipped timeslots between this block and next node (or round start)
+# blocks of one branch share the tail of the list, so adding block costs O(1)
+class RoundEntry:
+    __slots__ = ("txs", "skipped", "next")
+
+    def __init__(self, txs, skipped, next_entry):
+        self.txs = txs
+        self.skipped = skipped
+        self.next = next_entry
+
+
+# incremental index of round transactions for every block
+# every block keeps list of its round timeslots down to round start,
+# so round transactions are collected without walking the chain and checking every transaction
+# yields the same sequence as RoundIter, i.e. BlockRoundTxs for blocks and None for skipped timeslots
+class RoundIndex:
+
+    def __init__(self, dag):
+        self.dag = dag
+        self.entries = {}  # key is block hash, value is RoundEntry of the round block belongs to
+        dag.subscribe_to_new_block_notification(self)
+        dag.subscribe_to_blocks_pruned_notification(self)
+
+    def on_new_block_added(self, block):
+        self.get_entry(block.get_hash())
+
+    def on_blocks_pruned(self, pruned_blocks):
+        for block_list in pruned_blocks.values():
+            for block in block_list:
+                self.entries.pop(block.get_hash(), None)
+
+    # returns round timeslots for given round of epoch block belongs to, starting from latest one
+    def get_round_txs(self, block_hash, round_type):
+        block_number = self.dag.get_block_number(block_hash)
+        round_start, round_end = Epoch.get_round_bounds(Epoch.get_epoch_number(block_number), round_type)
+        if block_number < round_start:
+            return
+        if block_number <= round_end:
+            skipped, entry = 0, self.get_entry(block_hash)
+        elif block_number == round_end + 1:
+            # block right after round end is still included, same as RoundIter does
+            first_prev_hash = self.dag.get_links(block_hash)[0]
+            entry = RoundEntry(self.get_entry(block_hash).txs,
+                               *self.get_chain(round_end, first_prev_hash, round_start))
+            skipped = 0
+        else:
+            ancestor_hash = self.dag.get_ancestor_by_block_number(block_hash, round_end)
+            skipped, entry = self.get_chain(round_end, ancestor_hash, round_start)
+
+        yield from [None] * skipped
+        while entry:
+            yield entry.txs
+            yield from [None] * entry.skipped
+            entry = entry.next
+
+    # ------------------------------
+    # internal methods
+    # ------------------------------
+    def get_entry(self, block_hash):
+        entry = self.entries.get(block_hash)
+        if entry:
+            return entry
+
+        block = self.dag.blocks_by_hash[block_hash]
+        txs = BlockRoundTxs(block.block.system_txs)
+        prev_hashes = block.block.prev_hashes
+        if not prev_hashes or block_hash == self.dag.checkpoint_hash:
+            entry = RoundEntry(txs, 0, None)
+        else:
+            block_number = self.dag.get_block_number(block_hash)
+            epoch_number = Epoch.get_epoch_number(block_number)
+            round_type = Epoch.get_round_by_block_number(block_number)
+            round_start, _ = Epoch.get_round_bounds(epoch_number, round_type)
+            entry = RoundEntry(txs, *self.get_chain(block_number - 1, prev_hashes[0], round_start))
+        self.entries[block_hash] = entry
+        return entry
+
+    # returns (skipped timeslots count, entry) for timeslots from top number down to round start
+    # ancestor is the latest block of the chain not above top number
+    def get_chain(self, top_number, ancestor_hash, round_start):
+        ancestor_number = self.dag.get_block_number(ancestor_hash)
+        if ancestor_number < round_start:
+            return top_number - round_start + 1, None
+        return top_number - ancestor_number, self.get_entry(ancestor_hash)
+
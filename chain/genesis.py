@@ -2,13 +2,13 @@ from chain.block import Block
 from chain.transaction_factory import TransactionFactory
 
 class Genesis(Block):
+    __slots__ = ("precalculated_genesis_hash",)
+
     def __init__(self, creation_time):
+        Block.__init__(self)
         self.timestamp = creation_time
-        self.prev_hashes = []
-        self.system_txs = []
-        self.payment_txs = []
-
         self.precalculated_genesis_hash = Block.get_hash(self)
+        self.freeze()
     
     def get_hash(self):
         return self.precalculated_genesis_hash
@@ -68,7 +68,7 @@ class Immutability:
             chain_iter = ChainIter(self.dag, top)
             for block in chain_iter:
                 if chain_iter.block_number == block_number:  # if we counted enough
-                    if block.get_hash() == block_hash:  # if we counted on the branch including target block
+                    if block and block.get_hash() == block_hash:  # if we counted on the branch including target block
                         confirmations.append(branch_confirmations)
                     break
                 if block:
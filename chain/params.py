@@ -1,5 +1,7 @@
 from enum import IntEnum
 
+from crypto.entropy import EntropyVersion
+
 # blocks per round
 ROUND_DURATION = 3  # default 3
 # initial number ov validators
@@ -27,3 +29,10 @@ ZETA_MIN = 3
 ZETA_MAX = 5
 
 BLOCK_REWARD = 15
+
+# way of deriving validators order from epoch seed, must be the same for all validators of network
+# MERSENNE_TWISTER keeps orders calculated by previous versions, COUNTER changes every order, so it needs new network
+ENTROPY_VERSION = EntropyVersion.MERSENNE_TWISTER
+
+# amount of latest epochs always kept in memory, older finalized blocks are pruned from dag
+PRUNING_EPOCHS_TO_KEEP = 3
@@ -0,0 +1,88 @@
+from chain.epoch import Epoch
+from chain.params import PRUNING_EPOCHS_TO_KEEP
+
+# Keeps memory usage flat by dropping old finalized part of DAG
+# Block is chosen as checkpoint if
+#   it's in first parent chain of every top block and older than configured amount of epochs
+#   it received required amount of confirmations, so it can't be reverted anymore
+#   no block after it links to blocks before it
+# Everything before checkpoint is removed from DAG and from every component subscribed to pruning
+# Immutability and confirmation requirement are shared with the rest of the node,
+# confirmation requirement should be created right after DAG, so requirements are known for every block
+# if block store is given, state of new root is saved next to its checkpoint, so permissions survive restart
+
+
+class Pruner:
+    def __init__(self, epoch, immutability, confirmation_requirement, permissions=None,
+                 epochs_to_keep=PRUNING_EPOCHS_TO_KEEP, block_store=None):
+        # epoch hashes are calculated from blocks of previous epoch, so it should be kept as well
+        assert epochs_to_keep >= 2, "At least current and previous epochs should be kept"
+        self.epoch = epoch
+        self.dag = epoch.dag
+        self.permissions = permissions
+        self.block_store = block_store
+        self.epochs_to_keep = epochs_to_keep
+        self.immutability = immutability
+        self.confirmation_requirement = confirmation_requirement
+        self.last_pruned_epoch = 0
+
+    # cheap to call on every step, actual pruning is attempted once per epoch
+    # returns True if dag was pruned
+    def try_to_prune(self, current_block_number):
+        epoch_number = Epoch.get_epoch_number(current_block_number)
+        if epoch_number <= self.last_pruned_epoch:
+            return False
+        self.last_pruned_epoch = epoch_number
+
+        checkpoint_hash = self.find_checkpoint(epoch_number)
+        if not checkpoint_hash:
+            return False
+
+        # validators are calculated recursively from previous epochs, so do it while they are still in dag
+        if self.permissions:
+            for epoch_hash in set(self.epoch.get_epoch_hashes().values()):
+                self.permissions.get_validators(epoch_hash)
+
+        self.dag.prune(checkpoint_hash)
+        if self.block_store and self.permissions:
+            checkpoint_state = self.permissions.capture_checkpoint_state()
+            self.block_store.save_checkpoint_state(checkpoint_hash, checkpoint_state.pack())
+        return True
+
+    def find_checkpoint(self, epoch_number):
+        last_prunable_epoch = epoch_number - self.epochs_to_keep
+        if last_prunable_epoch < 1:
+            return None
+
+        checkpoint_number = self.dag.get_block_number(self.dag.checkpoint_hash)
+        last_prunable_block_number = Epoch.get_epoch_end_block_number(last_prunable_epoch)
+        if last_prunable_block_number <= checkpoint_number:
+            return None
+
+        common_ancestor = self.dag.get_common_ancestor(self.dag.get_top_hashes())
+        candidate = self.dag.get_ancestor_by_block_number(common_ancestor, last_prunable_block_number)
+        candidate = self.move_below_crossing_links(candidate)
+        if self.dag.get_block_number(candidate) <= checkpoint_number:
+            return None
+
+        confirmations = self.immutability.calculate_confirmations(candidate)
+        if confirmations < self.confirmation_requirement.get_confirmation_requirement(candidate):
+            return None
+
+        return candidate
+
+    # moves candidate down its first parent chain until no other block at or after it links below it
+    # otherwise such block would stay in dag with some of its links pruned
+    # only blocks between current checkpoint and candidate can be linked this way,
+    # so they are scanned downwards and candidate is moved below every crossing link found
+    def move_below_crossing_links(self, candidate):
+        candidate_number = self.dag.get_block_number(candidate)
+        checkpoint_number = self.dag.get_block_number(self.dag.checkpoint_hash)
+        for block_number in reversed(range(checkpoint_number, candidate_number)):
+            for block in self.dag.blocks_by_number.get(block_number, ()):
+                for child_hash in self.dag.collect_next_blocks(block.get_hash()):
+                    if child_hash != candidate and self.dag.get_block_number(child_hash) >= candidate_number:
+                        candidate = self.dag.get_ancestor_by_block_number(candidate, block_number)
+                        candidate_number = self.dag.get_block_number(candidate)
+                        break
+        return candidate
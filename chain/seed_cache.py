@@ -0,0 +1,164 @@
+import os
+import struct
+
+from serialization.serializer import Serializer, Deserializer
+
+# Cache of calculated epoch seeds keyed by epoch hash
+# seed is stored together with intermediate results it was derived from, so they can be inspected
+# or reused without decrypting anything again
+# when path is given, records are appended to that file and loaded back on startup,
+# so restarted node doesn't calculate seeds of known epochs again
+# File consists of records [record length][SeedRecord.pack()], partially written tail is dropped on load
+# epoch hashes are blocks, so records of pruned epoch hashes are dropped, which appends [record length][epoch hash]
+# file is compacted only when dropped records outnumber live ones, so pruning doesn't rewrite it every time
+# node starts from fresh dag, so loaded records may belong to blocks it never sees and which are never pruned,
+# loaded records which weren't used until the first prune are dropped then, so file doesn't grow across restarts
+
+RECORD_LENGTH = struct.Struct("<I")
+DROPPED_RECORD_LENGTH = 32  # dropped record is just epoch hash, any SeedRecord is longer
+MIN_DROPPED_TO_COMPACT = 256
+
+
+class SeedRecord:
+    __slots__ = ("epoch_hash", "seed", "private_keys", "shared_randoms", "revealed_randoms")
+
+    def __init__(self, epoch_hash=None, seed=0, private_keys=(), shared_randoms=(), revealed_randoms=()):
+        self.epoch_hash = epoch_hash
+        self.seed = seed
+        self.private_keys = list(private_keys)  # published private keys matching public keys, None if not published
+        self.shared_randoms = list(shared_randoms)  # randoms decoded from split random transactions
+        self.revealed_randoms = list(revealed_randoms)  # randoms revealed from commit transactions
+
+    def pack(self):
+        serializer = Serializer()
+        serializer.put_bytes(self.epoch_hash)
+        SeedRecord.put_int(serializer, self.seed)
+        serializer.put_u16(len(self.private_keys))
+        for private_key in self.private_keys:
+            serializer.put_private_key(private_key or b"")
+        for randoms in [self.shared_randoms, self.revealed_randoms]:
+            serializer.put_u16(len(randoms))
+            for random in randoms:
+                SeedRecord.put_int(serializer, random)
+        return serializer.get_bytes()
+
+    def parse(self, raw_data):
+        deserializer = Deserializer(raw_data)
+        self.epoch_hash = deserializer.parse_hash()
+        self.seed = SeedRecord.parse_int(deserializer)
+        private_key_count = deserializer.parse_u16()
+        self.private_keys = [deserializer.parse_private_key() or None for _ in range(private_key_count)]
+        shared_random_count = deserializer.parse_u16()
+        self.shared_randoms = [SeedRecord.parse_int(deserializer) for _ in range(shared_random_count)]
+        revealed_random_count = deserializer.parse_u16()
+        self.revealed_randoms = [SeedRecord.parse_int(deserializer) for _ in range(revealed_random_count)]
+        return deserializer.get_len()
+
+    # randoms are arbitrary non negative ints, so they are written as length prefixed big endian bytes
+    @staticmethod
+    def put_int(serializer, value):
+        serializer.put_encrypted_data(value.to_bytes((value.bit_length() + 7) // 8, byteorder="big"))
+
+    @staticmethod
+    def parse_int(deserializer):
+        return int.from_bytes(deserializer.parse_encrypted_data(), byteorder="big")
+
+
+class SeedCache:
+
+    def __init__(self, path=None):
+        self.records = {}  # key is epoch hash, value is SeedRecord
+        self.path = path
+        self.file = None
+        self.dropped_count = 0  # records in file which are dropped already, including records marking them dropped
+        self.unused_loaded_hashes = set()  # epoch hashes of loaded records not used since load, see on_blocks_pruned
+        if path:
+            self.load(path)
+            self.file = open(path, "ab")
+
+    def get(self, epoch_hash):
+        record = self.records.get(epoch_hash)
+        if record:
+            self.unused_loaded_hashes.discard(epoch_hash)
+        return record
+
+    def get_seed(self, epoch_hash):
+        record = self.get(epoch_hash)
+        return record.seed if record else None
+
+    def put(self, record):
+        if record.epoch_hash in self.records:
+            self.unused_loaded_hashes.discard(record.epoch_hash)
+            return
+        self.records[record.epoch_hash] = record
+        if self.file:
+            self.write_record(record.pack())
+            self.file.flush()
+
+    def on_blocks_pruned(self, pruned_blocks):
+        dropped_hashes = [block.get_hash() for block_list in pruned_blocks.values() for block in block_list]
+        # records of epochs node uses are read by the time it prunes anything, the rest are left from other runs
+        dropped_hashes += self.unused_loaded_hashes
+        self.unused_loaded_hashes = set()
+        removed = False
+        for block_hash in dropped_hashes:
+            if self.records.pop(block_hash, None) and self.file:
+                self.write_record(block_hash)
+                self.dropped_count += 2
+                removed = True
+        if not removed:
+            return
+        if self.dropped_count >= max(MIN_DROPPED_TO_COMPACT, len(self.records)):
+            self.rewrite()
+        else:
+            self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    # ------------------------------
+    # internal methods
+    # ------------------------------
+    def write_record(self, raw_record):
+        self.file.write(RECORD_LENGTH.pack(len(raw_record)) + raw_record)
+
+    # new file is written next to the old one and renamed, so records are never lost if we crash in between
+    def rewrite(self):
+        self.file.close()
+        with open(self.path + ".tmp", "wb") as seed_file:
+            for record in self.records.values():
+                raw_record = record.pack()
+                seed_file.write(RECORD_LENGTH.pack(len(raw_record)) + raw_record)
+        os.replace(self.path + ".tmp", self.path)
+        self.file = open(self.path, "ab")
+        self.dropped_count = 0
+
+    def load(self, path):
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as seed_file:
+            data = seed_file.read()
+
+        offset = 0
+        record_count = 0
+        while offset + RECORD_LENGTH.size <= len(data):
+            length, = RECORD_LENGTH.unpack_from(data, offset)
+            if offset + RECORD_LENGTH.size + length > len(data):
+                break
+            raw_record = data[offset + RECORD_LENGTH.size:offset + RECORD_LENGTH.size + length]
+            if length == DROPPED_RECORD_LENGTH:
+                self.records.pop(raw_record, None)
+            else:
+                record = SeedRecord()
+                record.parse(raw_record)
+                self.records[record.epoch_hash] = record
+            record_count += 1
+            offset += RECORD_LENGTH.size + length
+        self.dropped_count = record_count - len(self.records)
+        self.unused_loaded_hashes = set(self.records)
+
+        # drop partially written tail, so new records are appended right after last complete one
+        if offset != len(data):
+            os.truncate(path, offset)
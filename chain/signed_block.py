@@ -4,35 +4,56 @@ import chain
 from serialization.serializer import Serializer, Deserializer
 from crypto.public import Public
 
+# signed block of frozen block caches its bytes once packed or parsed,
+# after that signature and block can be changed only with set_signature and set_block, which reset cached bytes
 class SignedBlock:
+    __slots__ = ("signature", "block", "raw")
 
     def __init__(self):
+        self.raw = None  # packed signed block, reset when signature or block is changed
         self.signature = None
         self.block = None
 
+    # raised rather than asserted like in Block, so cached raw bytes can't go stale when asserts are stripped with -O
+    def __setattr__(self, name, value):
+        if name != "raw" and getattr(self, "raw", None) is not None:
+            raise AttributeError("Signed block can't be modified after it is packed, use set_signature or set_block")
+        object.__setattr__(self, name, value)
+
     def get_hash(self):
         return self.block.get_hash()
 
-    def parse(self, raw_data):
+    # lazy parsing leaves block transactions undecoded until they are accessed
+    def parse(self, raw_data, lazy=False):
+        self.raw = None
         deserializer = Deserializer(raw_data)
-        self.signatre = self.signature = deserializer.parse_signature()
+        self.signature = deserializer.parse_signature()
         block_length = deserializer.parse_u32()
         raw_block = deserializer.read_and_move(block_length)
         self.block = chain.block.Block()
-        self.block.parse(raw_block)
+        self.block.parse(raw_block, lazy)
+        self.raw = bytes(raw_data[:deserializer.get_len()])
         return self
 
     def pack(self):
+        if self.raw is not None:
+            return self.raw
         raw_block = self.block.pack()
-        raw_signed_block = Serializer.write_signature(self.signature)
-        raw_signed_block += Serializer.write_u32(len(raw_block))
-        raw_signed_block += raw_block
+        serializer = Serializer(1 + len(self.signature) + 4 + len(raw_block))
+        serializer.put_signature(self.signature)
+        serializer.put_u32(len(raw_block))
+        serializer.put_bytes(raw_block)
+        raw_signed_block = serializer.get_bytes()
+        if self.block.frozen:
+            self.raw = raw_signed_block
         return raw_signed_block
 
     def set_block(self, block):
+        self.raw = None
         self.block = block
 
     def set_signature(self, signature):
+        self.raw = None
         self.signature = signature
 
     def verify_signature(self, pubkey):
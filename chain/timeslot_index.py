@@ -0,0 +1,106 @@
+# Dense timeslot indexed storage of block hashes for fast range queries
+# slots list is indexed by block number starting from first_slot, empty timeslots hold None
+# occupancy bitmap has one bit per timeslot, so empty or occupied slots can be skipped by whole bytes
+# every block also remembers the earliest timeslot of blocks linking to it,
+# so block is a tip of range [start, end) if it has no children before end
+# adding block costs the same regardless of the range or epoch length
+
+
+class TimeslotIndex:
+
+    def __init__(self):
+        self.first_slot = 0  # always multiple of 8, so slot bits never have to be shifted
+        self.slots = []
+        self.occupancy = bytearray()
+        self.earliest_child_numbers = {}  # key is block hash, value is lowest block number among blocks linking to it
+
+    def add_block(self, block_number, block_hash, prev_hashes):
+        assert block_number >= self.first_slot, "Trying to add block to pruned timeslot"
+        index = block_number - self.first_slot
+        if index >= len(self.slots):
+            self.slots.extend([None] * (index - len(self.slots) + 1))
+            byte_count = (len(self.slots) + 7) // 8
+            if byte_count > len(self.occupancy):
+                self.occupancy.extend(bytes(byte_count - len(self.occupancy)))
+
+        if self.slots[index] is None:
+            self.slots[index] = [block_hash]
+            self.occupancy[index >> 3] |= 1 << (index & 7)
+        else:
+            self.slots[index].append(block_hash)
+
+        for prev_hash in prev_hashes:
+            earliest_child_number = self.earliest_child_numbers.get(prev_hash)
+            if earliest_child_number is None or block_number < earliest_child_number:
+                self.earliest_child_numbers[prev_hash] = block_number
+
+    # drops every timeslot before given block number
+    def remove_slots_before(self, block_number):
+        if block_number <= self.first_slot:
+            return
+        removed_bytes = (block_number - self.first_slot) >> 3
+        for index in range(min(removed_bytes * 8, len(self.slots))):
+            for block_hash in self.slots[index] or ():
+                self.earliest_child_numbers.pop(block_hash, None)
+        del self.slots[:removed_bytes * 8]
+        del self.occupancy[:removed_bytes]
+        self.first_slot += removed_bytes * 8
+
+        # the rest of slots are cleared in place to keep first slot aligned
+        for index in range(min(block_number - self.first_slot, len(self.slots))):
+            for block_hash in self.slots[index] or ():
+                self.earliest_child_numbers.pop(block_hash, None)
+            self.slots[index] = None
+            self.occupancy[index >> 3] &= ~(1 << (index & 7))
+
+    def is_occupied(self, block_number):
+        index = block_number - self.first_slot
+        if index < 0 or index >= len(self.slots):
+            return False
+        return bool(self.occupancy[index >> 3] & (1 << (index & 7)))
+
+    def get_hashes(self, block_number):
+        index = block_number - self.first_slot
+        if index < 0 or index >= len(self.slots):
+            return []
+        return list(self.slots[index] or ())
+
+    # returns hashes of all blocks in [start, end) ordered by timeslot
+    def get_hashes_in_range(self, start, end):
+        result = []
+        for index in self.get_slot_indexes_in_range(start, end, True):
+            result.extend(self.slots[index])
+        return result
+
+    # returns hashes of blocks in [start, end) which are not linked by any other block in this range
+    def get_tips_in_range(self, start, end):
+        result = []
+        for index in self.get_slot_indexes_in_range(start, end, True):
+            for block_hash in self.slots[index]:
+                earliest_child_number = self.earliest_child_numbers.get(block_hash)
+                if earliest_child_number is None or earliest_child_number >= end:
+                    result.append(block_hash)
+        return result
+
+    # returns block numbers in [start, end) which have no blocks
+    def get_empty_slots_in_range(self, start, end):
+        empty_slots = list(range(start, min(end, self.first_slot)))  # pruned slots are unknown, so count them empty
+        empty_slots += [self.first_slot + index for index in self.get_slot_indexes_in_range(start, end, False)]
+        empty_slots += list(range(max(start, self.first_slot + len(self.slots)), end))
+        return empty_slots
+
+    # yields indexes of occupied (or empty) slots in [start, end) clamped to known slots
+    # bytes which don't have wanted bits are skipped as a whole
+    def get_slot_indexes_in_range(self, start, end, occupied):
+        start_index = max(start - self.first_slot, 0)
+        end_index = min(end - self.first_slot, len(self.slots))
+        skipped_byte = 0 if occupied else 0xFF
+        index = start_index
+        while index < end_index:
+            byte = self.occupancy[index >> 3]
+            if byte == skipped_byte:
+                index = (index | 7) + 1
+                continue
+            if bool(byte & (1 << (index & 7))) == occupied:
+                yield index
+            index += 1
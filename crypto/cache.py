@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+
+# Bounded caches of crypto operation results
+# every node has its own CryptoCaches and makes them active while it handles a step or a message,
+# so nodes simulated in one process don't share results, and memory stays bounded on long runs
+# caches outside of any node scope (tools, tests) are the default ones
+# every cache counts hits, misses and evictions, so cache sizes can be tuned from real numbers
+
+VERIFY_CACHE_SIZE = 64 * 1024
+PUBKEY_CACHE_SIZE = 4 * 1024
+DECRYPT_CACHE_SIZE = 4 * 1024
+POINT_CACHE_SIZE = 4 * 1024
+
+MISSING = object()  # returned by cache when key is absent, since None and False are valid cached results
+
+
+# least recently used entries are evicted when cache is full
+# signature verification results are put from worker callback threads, so cache is locked
+class LruCache:
+
+    def __init__(self, max_size):
+        assert max_size > 0, "Cache must hold at least one entry"
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=MISSING):
+        with self.lock:
+            value = self.entries.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get_stats(self):
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+class CryptoCaches:
+
+    # any object with get(key, default) and put(key, value) can be passed instead of default LRU caches
+    def __init__(self, verify_cache=None, pubkey_cache=None, decrypt_cache=None, point_cache=None):
+        # key is (message, signature, pubkey)
+        self.verify = LruCache(VERIFY_CACHE_SIZE) if verify_cache is None else verify_cache
+        # key is private key
+        self.pubkey = LruCache(PUBKEY_CACHE_SIZE) if pubkey_cache is None else pubkey_cache
+        # key is (encrypted message, private key)
+        self.decrypt = LruCache(DECRYPT_CACHE_SIZE) if decrypt_cache is None else decrypt_cache
+        # key is compact public key, value is decoded seccure.PubKey, so curve point is decompressed only once
+        self.point = LruCache(POINT_CACHE_SIZE) if point_cache is None else point_cache
+
+    def get_stats(self):
+        return {
+            "verify": self.verify.get_stats(),
+            "pubkey": self.pubkey.get_stats(),
+            "decrypt": self.decrypt.get_stats(),
+            "point": self.point.get_stats()
+        }
+
+    # makes caches active until the end of with block, scopes can be nested
+    # when one node handles message sent by another one
+    def __enter__(self):
+        active_caches.stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        active_caches.stack.pop()
+
+    @staticmethod
+    def get_active():
+        return active_caches.stack[-1]
+
+
+# every thread has its own stack of active caches, so worker thread can make caches of its node active
+# default caches are at the bottom of every stack
+class ActiveCaches(threading.local):
+    def __init__(self):
+        self.stack = [default_caches]
+
+
+default_caches = CryptoCaches()
+active_caches = ActiveCaches()
+
+
+# method decorator which runs method with caches of its object active
+def with_crypto_caches(method):
+    def scoped_method(self, *args, **kwargs):
+        with self.crypto_caches:
+            return method(self, *args, **kwargs)
+    scoped_method.__name__ = method.__name__
+    return scoped_method
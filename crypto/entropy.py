@@ -1,4 +1,11 @@
 import random
+from hashlib import sha256
+
+# Deterministic entropy derived from epoch seed
+# every validator must derive exactly the same values, so the way they are derived is versioned
+#   MERSENNE_TWISTER - python Mersenne Twister seeded with seed, nth output costs n draws
+#   COUNTER          - nth output is SHA-256(seed bytes || n as 8 byte big endian), so any output costs one hash
+# every stream has its own state, nothing touches global random module, so streams can be used in parallel
 
 
 class Source:
@@ -6,11 +13,53 @@ class Source:
     RANDOMIZERS = 1
 
 
+class EntropyVersion:
+    MERSENNE_TWISTER = 0
+    COUNTER = 1
+
+
+COUNTER_OUTPUT_BITS = 256
+
+
 class Entropy:
     @staticmethod
-    def get_nth_derivative(seed, step):
-        random.seed(seed)
+    def get_nth_derivative(seed, step, version=EntropyVersion.MERSENNE_TWISTER):
+        if version == EntropyVersion.COUNTER:
+            return CounterStream(seed).get_output(step)
+
+        assert version == EntropyVersion.MERSENNE_TWISTER, "Unknown entropy version"
+        generator = random.Random(seed)
         for _ in range(step):
-            random.getrandbits(32)
-        return random.getrandbits(32)
+            generator.getrandbits(32)
+        return generator.getrandbits(32)
+
+    # returns stream with randrange(stop) method, generators of all versions are independent of each other
+    @staticmethod
+    def create_stream(seed, version=EntropyVersion.MERSENNE_TWISTER):
+        if version == EntropyVersion.COUNTER:
+            return CounterStream(seed)
+
+        assert version == EntropyVersion.MERSENNE_TWISTER, "Unknown entropy version"
+        return random.Random(seed)
+
+
+class CounterStream:
+
+    def __init__(self, seed):
+        assert seed >= 0, "Seed can't be negative"
+        self.seed_bytes = seed.to_bytes((seed.bit_length() + 7) // 8, byteorder="big")
+        self.counter = 0  # index of next output used by randrange
+
+    def get_output(self, index):
+        digest = sha256(self.seed_bytes + index.to_bytes(8, byteorder="big")).digest()
+        return int.from_bytes(digest, byteorder="big")
 
+    # uniform integer in [0, stop), outputs from biased tail are skipped
+    def randrange(self, stop):
+        assert stop > 0, "Range can't be empty"
+        limit = (1 << COUNTER_OUTPUT_BITS) - (1 << COUNTER_OUTPUT_BITS) % stop
+        while True:
+            output = self.get_output(self.counter)
+            self.counter += 1
+            if output < limit:
+                return output % stop
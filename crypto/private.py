@@ -1,11 +1,11 @@
 import seccure
 import os
 
-class Private:
+from crypto.cache import CryptoCaches, MISSING
+from crypto.public import Public
+
 
-    #please note that following cache is shared across nodes and should not be implemented in production
-    pubkey_cache = {}
-    decrypt_cache = {}
+class Private:
 
     @staticmethod
     def generate():
@@ -18,23 +18,27 @@ class Private:
     @staticmethod
     def encrypt(message, key):
         public_key = Private.publickey(key) #HACK
-        return seccure.encrypt(message, public_key)
+        return Public.encrypt(message, public_key)
 
     @staticmethod
     def decrypt(message, key):
+        cache = CryptoCaches.get_active().decrypt
         args = (message, key)
-        if not args in Private.decrypt_cache:
+        result = cache.get(args)
+        if result is MISSING:
             try:
                 result = seccure.decrypt(message, key, "secp256r1/nistp256")
             except: #decryption failure
                 result = None
-            Private.decrypt_cache[args] = result
-        return Private.decrypt_cache[args]
+            cache.put(args, result)
+        return result
 
     @staticmethod
     def publickey(private):
-        if private not in Private.pubkey_cache:
+        cache = CryptoCaches.get_active().pubkey
+        public = cache.get(private)
+        if public is MISSING:
             public = seccure.passphrase_to_pubkey(private, "secp256r1/nistp256").to_bytes(seccure.SER_COMPACT)
-            Private.pubkey_cache[private] = public
-        return Private.pubkey_cache[private]
+            cache.put(private, public)
+        return public
 
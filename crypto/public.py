@@ -1,17 +1,43 @@
+import hashlib
 import seccure
 
+from crypto.cache import CryptoCaches, MISSING
+
+MAC_BYTES = 10  # seccure default
+
+
 class Public:
-    #please note that following cache is shared across nodes and should not be implemented in production
-    cache = {}
-    
+
     @staticmethod
     def encrypt(message, key):
-        return seccure.encrypt(message, key)
+        return Public.get_point(key).encrypt(message, MAC_BYTES)
 
     @staticmethod
     def verify(message, signature, key):
+        cache = CryptoCaches.get_active().verify
         args = (message, signature, key)
-        if not args in Public.cache:
-            result = seccure.verify(message, signature, key)
-            Public.cache[args] = result
-        return Public.cache[args]
+        result = cache.get(args)
+        if result is MISSING:
+            result = Public.verify_uncached(message, signature, key)
+            cache.put(args, result)
+        return result
+
+    # same as seccure.verify, but with decoded public key taken from cache
+    # signature and key come from network, so the ones which can't be decoded are just invalid
+    @staticmethod
+    def verify_uncached(message, signature, key):
+        try:
+            return Public.get_point(key).verify(hashlib.sha512(message).digest(), signature, seccure.SER_COMPACT)
+        except Exception:  # malformed signature or key
+            return False
+
+    # decodes compact public key into seccure.PubKey, decompressing its curve point takes most of verify setup time
+    @staticmethod
+    def get_point(key):
+        cache = CryptoCaches.get_active().point
+        point = cache.get(key)
+        if point is MISSING:
+            curve = seccure.Curve.by_pk_len(len(key))
+            point = curve.pubkey_from_string(key, seccure.SER_COMPACT)
+            cache.put(key, point)
+        return point
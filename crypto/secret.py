@@ -2,16 +2,15 @@ import random
 import string
 import os
 
-from secretsharing import PlaintextToHexSecretSharer
-from secretsharing import secret_int_to_points, points_to_secret_int
 from base64 import b64decode
 from crypto.keys import Keys
 from crypto.public import Public
 from crypto.private import Private
+from crypto.shamir import split_int, recover_int, recover_ints
 
 def split_secret(data, threshold, num_points):
     splits = []
-    split_ints = secret_int_to_points(int.from_bytes(data, byteorder="big"), threshold, num_points)
+    split_ints = split_int(int.from_bytes(data, byteorder="big"), threshold, num_points)
     for item in split_ints:
         bytes = item[1].to_bytes(32, byteorder="big")
         splits.append(bytes)
@@ -23,7 +22,7 @@ def split_random_secret(era_hash, threshold, num_points):
     return split_secret(data, threshold, num_points)
 
 def recover_splits(splits):
-    return points_to_secret_int(splits)
+    return recover_int(splits)
 
 def enc_part_secret(publickey, split):
     enc_data = Public.encrypt(split, publickey)
@@ -37,6 +36,14 @@ def dec_part_secret(privatekey, enc_data, number):
     return None
 
 def decode_random(encoded_splits, private_keys):
+    return recover_splits(decode_splits(encoded_splits, private_keys))
+
+# decodes every random of epoch with the same private keys in one pass
+# splits usually decode for the same set of senders, so Lagrange coefficients are calculated once for all randoms
+def decode_randoms(encoded_splits_list, private_keys):
+    return recover_ints([decode_splits(encoded_splits, private_keys) for encoded_splits in encoded_splits_list])
+
+def decode_splits(encoded_splits, private_keys):
     splits = []
     count = min(len(encoded_splits), len(private_keys))
     for i in range(count):
@@ -46,7 +53,7 @@ def decode_random(encoded_splits, private_keys):
         if split:
             splits.append(split)
     assert splits, "No split parts decoded for shared random"
-    return recover_splits(splits)
+    return splits
 
 def encode_splits(splits, public_keys):
     encoded_splits = []
@@ -0,0 +1,83 @@
+from random import SystemRandom
+
+from crypto.cache import LruCache, MISSING
+
+# Shamir secret sharing over prime field
+# shares are points (x, y) of random polynomial with secret as its free coefficient, x goes from 1 to share count
+# results are the same as of secretsharing package: prime is the smallest of standard primes
+# greater than secret and share count on split, and greater than all y values on recovery
+# recovery is f(0) = SUM(y_i * l_i(0)), where Lagrange basis coefficients l_i(0) depend only on x values,
+# and x values are the same for every random of epoch, so coefficients are calculated once per set of x values
+
+COEFFICIENT_CACHE_SIZE = 1024
+
+MERSENNE_PRIME_EXPONENTS = [2, 3, 5, 7, 13, 17, 19, 31, 61, 89, 107, 127, 521, 607, 1279]
+STANDARD_PRIMES = sorted([2 ** exponent - 1 for exponent in MERSENNE_PRIME_EXPONENTS] +
+                         [2 ** 256 + 297, 2 ** 320 + 27, 2 ** 384 + 231])
+
+system_random = SystemRandom()
+
+# key is (x values, prime), value is list of Lagrange basis coefficients at zero in the same order as x values
+coefficient_cache = LruCache(COEFFICIENT_CACHE_SIZE)
+
+
+def get_large_enough_prime(values):
+    largest = max(values)
+    for prime in STANDARD_PRIMES:
+        if largest <= prime:
+            return prime
+    return None
+
+
+def split_int(secret, threshold, count):
+    assert 2 <= threshold <= count, "Threshold must be at least 2 and not more than share count"
+    prime = get_large_enough_prime([secret, count])
+    assert prime, "Secret is too long for share calculation"
+    coefficients = [secret] + [system_random.randrange(prime) for _ in range(threshold - 1)]
+    points = []
+    for x in range(1, count + 1):
+        y = 0
+        for coefficient in reversed(coefficients):
+            y = (y * x + coefficient) % prime
+        points.append((x, y))
+    return points
+
+
+def get_lagrange_coefficients(x_values, prime):
+    key = (x_values, prime)
+    coefficients = coefficient_cache.get(key)
+    if coefficients is MISSING:
+        assert len(set(x_values)) == len(x_values), "Shares must have distinct x values"
+        coefficients = []
+        for x_i in x_values:
+            numerator = 1
+            denominator = 1
+            for x_j in x_values:
+                if x_j != x_i:
+                    numerator = numerator * -x_j % prime
+                    denominator = denominator * (x_i - x_j) % prime
+            coefficients.append(numerator * pow(denominator, -1, prime) % prime)
+        coefficient_cache.put(key, coefficients)
+    return coefficients
+
+
+def recover_int(points):
+    return recover_ints([points])[0]
+
+
+# recovers many secrets, coefficients are looked up once for every distinct set of x values
+def recover_ints(points_list):
+    coefficients_by_key = {}
+    secrets = []
+    for points in points_list:
+        assert points, "No shares to recover secret from"
+        x_values, y_values = zip(*points)
+        prime = get_large_enough_prime(y_values)
+        assert prime, "Share is too long for secret recovery"
+        key = (x_values, prime)
+        coefficients = coefficients_by_key.get(key)
+        if not coefficients:
+            coefficients = get_lagrange_coefficients(x_values, prime)
+            coefficients_by_key[key] = coefficients
+        secrets.append(sum(y * coefficient for y, coefficient in zip(y_values, coefficients)) % prime)
+    return secrets
@@ -0,0 +1,135 @@
+import asyncio
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from crypto.cache import CryptoCaches, MISSING
+from crypto.public import Public
+
+# Verifies signatures in batches in a pool of worker processes, so verification doesn't pin one core
+# verifications are queued with submit and sent to workers by flush, results are returned as futures
+# every result is put into verify cache active at submit, so later Public.verify calls for the same signature are free
+# with process_count 0 signatures are verified inline on flush, which is the default:
+# round trip to pool costs more than a single verification, so only batches should go there,
+# e.g. transaction signatures queued by mempool, and their futures are awaited from event loop with wait_pending
+# nodes use pools shared by every node in process, so simulation with many nodes doesn't start a pool per node,
+# each node still has its own verifier, since queue of pending verifications is per node
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_PROCESS_COUNT = 0
+
+shared_executors = {}  # key is process count, value is process pool shared by verifiers created with_shared_pool
+
+
+# runs in worker process, every worker keeps decoded public keys in its own default point cache
+def verify_batch(triples):
+    return [Public.verify_uncached(message, signature, pubkey) for message, signature, pubkey in triples]
+
+
+class SignatureVerifier:
+
+    def __init__(self, process_count=0, batch_size=DEFAULT_BATCH_SIZE, executor=None):
+        self.process_count = process_count
+        self.batch_size = batch_size
+        self.owns_executor = executor is None
+        if executor is None and process_count:
+            executor = ProcessPoolExecutor(process_count)
+        self.executor = executor
+        self.pending = []  # list of ((message, signature, pubkey), future, cache) tuples
+        self.running = []  # futures of batches sent to workers, some of them may be done already
+
+    # verifier with its own queue which sends batches to pool shared with other verifiers of the same process count
+    @staticmethod
+    def with_shared_pool(process_count=DEFAULT_PROCESS_COUNT, batch_size=DEFAULT_BATCH_SIZE):
+        if not process_count:
+            return SignatureVerifier(0, batch_size)
+        executor = shared_executors.get(process_count)
+        if not executor:
+            executor = ProcessPoolExecutor(process_count)
+            shared_executors[process_count] = executor
+        return SignatureVerifier(process_count, batch_size, executor)
+
+    # queues verification and returns future of its result
+    def submit(self, message, signature, pubkey):
+        future = Future()
+        cache = CryptoCaches.get_active().verify
+        args = (message, signature, pubkey)
+        result = cache.get(args)
+        if result is not MISSING:
+            future.set_result(result)
+            return future
+        self.pending.append((args, future, cache))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        return future
+
+    def submit_all(self, triples):
+        return [self.submit(*triple) for triple in triples]
+
+    # sends every queued verification to workers without waiting for results
+    def flush(self):
+        pending = self.pending
+        self.pending = []
+        if not pending:
+            return
+        if not self.executor:
+            self.set_results(pending, verify_batch([args for args, _, _ in pending]))
+            return
+
+        # spread small batches among all workers too
+        batch_size = min(self.batch_size, -(-len(pending) // self.process_count))
+        self.running = [batch_future for batch_future in self.running if not batch_future.done()]
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            batch_future = self.executor.submit(verify_batch, [args for args, _, _ in batch])
+            batch_future.add_done_callback(lambda done, batch=batch: self.on_batch_verified(batch, done))
+            self.running.append(batch_future)
+
+    # verifies triples in parallel and returns list of results in the same order
+    # blocks until workers are done, coroutines use verify_all_async instead
+    def verify_all(self, triples):
+        futures = self.submit_all(triples)
+        self.flush()
+        return [future.result() for future in futures]
+
+    async def verify_all_async(self, triples):
+        futures = self.submit_all(triples)
+        self.flush()
+        return list(await asyncio.gather(*[asyncio.wrap_future(future) for future in futures]))
+
+    # sends queued verifications to workers and waits for every batch sent so far without blocking event loop
+    # results are in verify cache afterwards
+    async def wait_pending(self):
+        self.flush()
+        running = [asyncio.wrap_future(batch_future) for batch_future in self.running]
+        if running:
+            await asyncio.wait(running)
+
+    # returns first of pubkeys whose signature of message is valid, or None
+    # single signature is always verified inline and stops at first match,
+    # it's on latency critical path of block ingestion, where waiting for pool would only add a round trip
+    def find_signer(self, message, signature, pubkeys):
+        for pubkey in pubkeys:
+            if Public.verify(message, signature, pubkey):
+                return pubkey
+        return None
+
+    # shared pool is left running for other verifiers
+    def close(self):
+        self.flush()
+        if self.executor and self.owns_executor:
+            self.executor.shutdown()
+
+    # ------------------------------
+    # internal methods
+    # ------------------------------
+    def on_batch_verified(self, batch, batch_future):
+        if batch_future.exception():
+            for _, future, _ in batch:
+                future.set_exception(batch_future.exception())
+            return
+        self.set_results(batch, batch_future.result())
+
+    @staticmethod
+    def set_results(batch, results):
+        for (args, future, cache), result in zip(batch, results):
+            cache.put(args, result)
+            future.set_result(result)
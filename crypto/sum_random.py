@@ -1,4 +1,4 @@
-import random
+from crypto.entropy import Entropy, EntropyVersion
 
 
 def sum_random(random_list):
@@ -20,21 +20,22 @@ def sum_random(random_list):
 #     return res
 
 
-def calculate_validators_indexes(seed, validators_count):
-    random.seed(seed)
+def calculate_validators_indexes(seed, validators_count, version=EntropyVersion.MERSENNE_TWISTER):
+    stream = Entropy.create_stream(seed, version)
     validators_list = []
     for i in range(0,validators_count):
         validators_list.append(i)
-    sattolo_cycle(validators_list)
+    sattolo_cycle(validators_list, stream)
     return validators_list
 
 
 # array shuffling method straight from the wikipedia
 # it is sufficient for now, but it always removes number from its position
 # i.e. zero never be at index 0, two won't be at index 0
-def sattolo_cycle(items):
+# stream is entropy stream of shuffled items, see Entropy.create_stream
+def sattolo_cycle(items, stream):
     i = len(items)
     while i > 1:
         i = i - 1
-        j = random.randrange(i)  # 0 <= j <= i-1
+        j = stream.randrange(i)  # 0 <= j <= i-1
         items[j], items[i] = items[i], items[j]
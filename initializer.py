@@ -2,6 +2,7 @@ import asyncio
 import logging
 import importlib
 import datetime
+import os
 import random
 
 
@@ -18,6 +19,8 @@ from chain.params import GENESIS_VALIDATORS_COUNT, \
                          BLOCK_TIME, \
                          ROUND_DURATION
 
+DATA_DIRECTORY = "data"  # every node keeps its files in own subdirectory
+
 
 # you can set node to visualize its DAG as soon as Ctrl-C pressed
 def save_dag_to_graphviz(dag_to_visualize):
@@ -118,6 +121,8 @@ class Initializer:
             if self.node_to_visualize_after_exit:
                 save_dag_to_graphviz(self.node_to_visualize_after_exit.dag)
                 show_node_stats(self.node_to_visualize_after_exit)
+            for node in self.nodes:
+                node.close()
 
     def launch(self):
         logger = logging.getLogger("Announce")
@@ -139,7 +144,8 @@ class Initializer:
                         network=self.network,
                         behaviour=behaviour,
                         block_signer=self.private_keys.block_signers[i],
-                        logger=logger)
+                        logger=logger,
+                        data_dir=os.path.join(DATA_DIRECTORY, "node_" + str(i)))
 
             if i == self.node_to_visualize_after_exit:
                 self.node_to_visualize_after_exit = node
@@ -155,7 +161,8 @@ class Initializer:
             keyless_node = Node(genesis_creation_time=self.genesis_creation_time,
                                 node_id=i,
                                 network=self.network,
-                                logger=logger)
+                                logger=logger,
+                                data_dir=os.path.join(DATA_DIRECTORY, "node_" + str(i)))
             self.network.register_node(keyless_node)
             self.tasks.append(keyless_node.run())
 
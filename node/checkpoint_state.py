@@ -0,0 +1,69 @@
+from chain.seed_cache import SeedRecord
+from node.validators import Validator, Validators
+from crypto.keys import Keys
+from serialization.serializer import Serializer, Deserializer
+
+# State of dag root which can't be derived again once blocks before root are pruned:
+# validators of root with their signers and randomizers order, and seed of root if it was calculated
+# Pruner writes it next to checkpoint of BlockStore every time dag is pruned,
+# so node restored from checkpoint has the same permissions as nodes which never restarted
+# Format is [root hash][validator count][pubkey][stake]...[signers order][randomizers order][has seed][SeedRecord]
+
+
+class CheckpointState:
+    __slots__ = ("root_hash", "validators", "seed_record")
+
+    def __init__(self, root_hash=None, validators=None, seed_record=None):
+        self.root_hash = root_hash
+        self.validators = validators if validators is not None else Validators()
+        self.seed_record = seed_record  # None if seed of root wasn't calculated
+
+    @staticmethod
+    def capture(permissions, seed_cache):
+        root_hash = permissions.root_hash
+        validators = Validators()
+        validators.validators = list(permissions.get_validators(root_hash))
+        validators.signers_order = list(permissions.signers_indexes.get(root_hash, []))
+        validators.randomizers_order = list(permissions.randomizers_indexes.get(root_hash, []))
+        return CheckpointState(root_hash, validators, seed_cache.get(root_hash))
+
+    # puts seed of root into cache of epoch and returns validators to create Permissions with
+    def restore(self, epoch):
+        assert self.root_hash == epoch.dag.get_root_hash(), "Checkpoint state belongs to other root"
+        if self.seed_record:
+            epoch.seed_cache.put(self.seed_record)
+        return self.validators
+
+    def pack(self):
+        serializer = Serializer()
+        serializer.put_bytes(self.root_hash)
+        serializer.put_u16(len(self.validators.validators))
+        for validator in self.validators.validators:
+            serializer.put_bytes(Keys.to_bytes(validator.public_key))
+            serializer.put_u32(validator.stake)
+        for order in [self.validators.signers_order, self.validators.randomizers_order]:
+            serializer.put_u16(len(order))
+            for index in order:
+                serializer.put_u16(index)
+        serializer.put_u8(1 if self.seed_record else 0)
+        if self.seed_record:
+            serializer.put_bytes(self.seed_record.pack())
+        return serializer.get_bytes()
+
+    def parse(self, raw_data):
+        deserializer = Deserializer(raw_data)
+        self.root_hash = deserializer.parse_hash()
+        self.validators = Validators()
+        validator_count = deserializer.parse_u16()
+        for _ in range(validator_count):
+            public_key = Keys.from_bytes(deserializer.parse_pubkey())
+            self.validators.validators.append(Validator(public_key, deserializer.parse_u32()))
+        signers_count = deserializer.parse_u16()
+        self.validators.signers_order = [deserializer.parse_u16() for _ in range(signers_count)]
+        randomizers_count = deserializer.parse_u16()
+        self.validators.randomizers_order = [deserializer.parse_u16() for _ in range(randomizers_count)]
+        self.seed_record = None
+        if deserializer.parse_u8():
+            self.seed_record = SeedRecord()
+            self.seed_record.parse(raw_data[deserializer.offset:])
+        return self
@@ -0,0 +1,99 @@
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from chain.epoch import Epoch
+from crypto.cache import CryptoCaches
+from crypto.entropy import Source
+
+# Speculatively calculates seed and permission tables of the next epoch for every top during final round,
+# so the first block of the new epoch doesn't wait for decryption, secret recovery and shuffles
+# every top may become epoch hash, so its seed inputs and validators are collected from dag on the event loop
+# and the rest of the work is sent to worker process, results are kept aside until epoch boundary
+# on boundary results for accepted epoch hashes are put into seed cache and permissions in one step,
+# results for tops which didn't become epoch hashes are dropped and nothing of them stays in any cache
+# with process_count 0 work is done in one background thread with crypto caches of the node,
+# entropy streams don't share any state, so shuffles are safe there
+# nodes use executors shared by every node in process, so simulation with many nodes doesn't start one per node
+
+shared_executors = {}  # key is process count, value is executor shared by precomputers created with_shared_pool
+
+
+# runs in worker process
+def precompute_epoch(seed_inputs, validators_count):
+    record = Epoch.derive_seed_record(seed_inputs)
+    signers_indexes = Epoch.get_validators_indexes(record.seed, validators_count, Source.SIGNERS)
+    randomizers_indexes = Epoch.get_validators_indexes(record.seed, validators_count, Source.RANDOMIZERS)
+    return record, signers_indexes, randomizers_indexes
+
+
+# runs in worker thread
+def precompute_epoch_with_caches(crypto_caches, seed_inputs, validators_count):
+    with crypto_caches:
+        return precompute_epoch(seed_inputs, validators_count)
+
+
+class EpochPrecomputer:
+
+    def __init__(self, epoch, permissions, process_count=0, executor=None):
+        self.epoch = epoch
+        self.permissions = permissions
+        self.owns_executor = executor is None
+        if executor is None:
+            executor = EpochPrecomputer.create_executor(process_count)
+        self.executor = executor
+        self.use_processes = bool(process_count)
+        self.pending = {}  # key is top hash, value is future of precompute_epoch result
+
+    # precomputer which sends work to executor shared with other precomputers of the same process count
+    @staticmethod
+    def with_shared_pool(epoch, permissions, process_count=0):
+        executor = shared_executors.get(process_count)
+        if not executor:
+            executor = EpochPrecomputer.create_executor(process_count)
+            shared_executors[process_count] = executor
+        return EpochPrecomputer(epoch, permissions, process_count, executor)
+
+    @staticmethod
+    def create_executor(process_count):
+        return ProcessPoolExecutor(process_count) if process_count else ThreadPoolExecutor(1)
+
+    # starts precomputation for every top which wasn't precomputed yet
+    def precompute(self, top_hashes):
+        for top_hash in top_hashes:
+            if top_hash in self.pending or self.epoch.seed_cache.get_seed(top_hash) is not None:
+                continue
+            future = Future()
+            try:
+                seed_inputs = self.epoch.get_seed_inputs(top_hash)
+                validators_count = len(self.permissions.calculate_speculative_validators(top_hash))
+                if self.use_processes:
+                    future = self.executor.submit(precompute_epoch, seed_inputs, validators_count)
+                else:
+                    future = self.executor.submit(precompute_epoch_with_caches, CryptoCaches.get_active(),
+                                                  seed_inputs, validators_count)
+            except Exception as e:  # top may never become epoch hash, so errors are kept until hand over
+                future.set_exception(e)
+            self.pending[top_hash] = future
+
+    # puts results for accepted epoch hashes into seed cache and permissions, never waits for unfinished ones
+    # the rest is calculated on demand as usual if precomputation failed or isn't finished yet
+    def hand_over(self, epoch_hashes):
+        pending = self.pending
+        self.pending = {}
+        for epoch_hash in set(epoch_hashes):
+            future = pending.get(epoch_hash)
+            # failed precomputation is ignored, the same error is raised when epoch hash is used
+            if not future or not future.done() or future.cancelled() or future.exception():
+                continue
+            record, signers_indexes, randomizers_indexes = future.result()
+            self.epoch.seed_cache.put(record)
+            self.permissions.set_indexes(epoch_hash, signers_indexes, randomizers_indexes)
+        for future in pending.values():
+            future.cancel()
+
+    # unfinished precomputations are dropped, shared executor keeps working for other precomputers
+    def close(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.pending = {}
+        if self.owns_executor:
+            self.executor.shutdown()
@@ -9,12 +9,18 @@ from chain.block_factory import BlockFactory
 from chain.params import Round, MINIMAL_SECRET_SHARERS, TOTAL_SECRET_SHARERS, ZETA
 from chain.transaction_factory import TransactionFactory
 from chain.conflict_watcher import ConflictWatcher
+from chain.confirmation_requirement import ConfirmationRequirement
+from chain.immutability import Immutability
+from chain.pruner import Pruner
+from chain.seed_cache import SeedCache
 from node.behaviour import Behaviour
 from node.block_signers import BlockSigner
 from node.permissions import Permissions
+from node.epoch_precomputer import EpochPrecomputer
 from node.validators import Validators
 from transaction.gossip_transaction import NegativeGossipTransaction, \
-                                           PositiveGossipTransaction
+                                           PositiveGossipTransaction, \
+                                           PenaltyGossipTransaction
 from transaction.stake_transaction import PenaltyTransaction
 from transaction.utxo import Utxo
 from transaction.mempool import Mempool
@@ -24,9 +30,13 @@ from verification.mempool_transactions_acceptor import MempoolTransactionsAccept
 from verification.block_acceptor import BlockAcceptor, OrphanBlockAcceptor
 from crypto.keys import Keys
 from crypto.private import Private
+from crypto.signature_verifier import SignatureVerifier, DEFAULT_PROCESS_COUNT as DEFAULT_VERIFY_PROCESS_COUNT
+from crypto.cache import CryptoCaches, with_crypto_caches
 from crypto.secret import split_secret, encode_splits
 from hashlib import sha256
 
+SEED_CACHE_FILE_NAME = "seeds.dat"
+
 
 class DummyLogger(object):
     def __getattr__(self, name):
@@ -39,16 +49,36 @@ class Node:
                  block_signer=BlockSigner(Private.generate()),
                  validators=Validators(),
                  behaviour=Behaviour(),
-                 logger=DummyLogger()):
+                 logger=DummyLogger(),
+                 signature_verifier=None,
+                 verify_process_count=DEFAULT_VERIFY_PROCESS_COUNT,
+                 precompute_process_count=0,
+                 data_dir=None):
         self.logger = logger
         self.dag = Dag(genesis_creation_time)
-        self.epoch = Epoch(self.dag)
+        self.confirmation_requirement = ConfirmationRequirement(self.dag)
+        self.immutability = Immutability(self.dag)
+        # node with data directory keeps calculated epoch seeds there across restarts
+        if data_dir:
+            os.makedirs(data_dir, exist_ok=True)
+            self.seed_cache = SeedCache(os.path.join(data_dir, SEED_CACHE_FILE_NAME))
+        else:
+            self.seed_cache = SeedCache()
+        self.epoch = Epoch(self.dag, self.seed_cache)
         self.epoch.set_logger(self.logger)
         self.permissions = Permissions(self.epoch, validators)
         self.mempool = Mempool()
         self.utxo = Utxo(self.logger)
         self.conflict_watcher = ConflictWatcher(self.dag)
+        self.pruner = Pruner(self.epoch, self.immutability, self.confirmation_requirement, self.permissions)
+        self.epoch_precomputer = EpochPrecomputer.with_shared_pool(self.epoch, self.permissions,
+                                                                   precompute_process_count)
         self.behaviour = behaviour
+        # every node has its own verifier, since it keeps queue of pending verifications, worker pool is shared
+        if signature_verifier is None:
+            signature_verifier = SignatureVerifier.with_shared_pool(verify_process_count)
+        self.signature_verifier = signature_verifier
+        self.crypto_caches = CryptoCaches()  # active while node handles step or message, see with_crypto_caches
 
         self.block_signer = block_signer
         self.node_pubkey = Private.publickey(block_signer.private_key)
@@ -70,6 +100,13 @@ class Node:
     def start(self):
         pass
 
+    # releases files and worker pools of node, pools shared with other nodes keep running
+    def close(self):
+        self.epoch_precomputer.close()
+        self.signature_verifier.close()
+        self.seed_cache.close()
+
+    @with_crypto_caches
     def handle_timeslot_changed(self, previous_timeslot_number, current_timeslot_number):
         self.last_expected_timeslot = current_timeslot_number
         self.try_to_broadcast_maliciously_delayed_block()
@@ -99,11 +136,14 @@ class Node:
             return True
         return False
 
+    @with_crypto_caches
     def step(self):
         current_block_number = self.epoch.get_current_timeframe_block_number()
 
         if self.epoch.is_new_epoch_upcoming(current_block_number):
-            self.epoch.accept_tops_as_epoch_hashes()
+            self.accept_new_epoch()
+
+        self.pruner.try_to_prune(current_block_number)
 
         # service method for update node behavior (if behavior is temporary)
         self.behaviour.update(Epoch.get_epoch_number(current_block_number))
@@ -125,6 +165,8 @@ class Node:
             # at this point we may remove everything systemic from mempool,
             # so it does not interfere with pubkeys for next epoch
             self.mempool.remove_all_systemic_transactions()
+            # any of current tops may become epoch hash, so prepare seed and permissions for each of them
+            self.epoch_precomputer.precompute(self.dag.get_top_hashes())
 
         if self.behaviour.wants_to_hold_stake:
             self.broadcast_stakehold_transaction()
@@ -157,6 +199,8 @@ class Node:
 
     async def run(self):
         while True:
+            # signatures queued by mempool are verified by the time step builds block from it
+            await self.signature_verifier.wait_pending()
             self.step()
             await asyncio.sleep(1)
     
@@ -209,6 +253,10 @@ class Node:
 
         block = BlockFactory.create_block_dummy(current_top_blocks)
         block.system_txs = system_txs
+        # penalty gossips are checked the same way receivers do, so they don't get block rejected
+        verifier = InBlockTransactionsAcceptor(self.epoch, self.permissions, self.logger, block)
+        block.system_txs = [tx for tx in system_txs
+                            if not isinstance(tx, PenaltyGossipTransaction) or verifier.check_if_valid(tx)]
         block.payment_txs = payment_txs
         signed_block = BlockFactory.sign_block(block, self.block_signer.private_key)
 
@@ -242,7 +290,12 @@ class Node:
         system_txs = self.mempool.pop_round_system_transactions(round)
 
         # skip non valid system_txs
+        # signatures are verified in parallel beforehand, so acceptor takes results from cache
         verifier = InBlockTransactionsAcceptor(self.epoch, self.permissions, self.logger)
+        signature_checks = []
+        for tx in system_txs:
+            signature_checks += verifier.get_signature_checks(tx)
+        self.signature_verifier.verify_all(signature_checks)
         system_txs = [t for t in system_txs if verifier.check_if_valid(t)]
         # get gossip conflicts hashes (validate_gossip() ---> [gossip_negative_hash, gossip_positive_hash])
         conflicts_gossip = self.validate_gossip(self.dag, self.mempool)
@@ -368,11 +421,16 @@ class Node:
         tx = TransactionFactory.create_split_random_transaction(encoded_splits, pubkey_index, epoch_hash, node_private)
         return tx
 
+    # crosses epoch boundary, tops become epoch hashes and their precomputed seeds and indexes are installed
+    def accept_new_epoch(self):
+        self.epoch.accept_tops_as_epoch_hashes()
+        self.epoch_precomputer.hand_over(self.epoch.get_epoch_hashes().values())
+
     def get_allowed_signers_for_next_block(self, block):
         current_block_number = self.epoch.get_current_timeframe_block_number()
         epoch_block_number = Epoch.convert_to_epoch_block_number(current_block_number)
         if self.epoch.is_new_epoch_upcoming(current_block_number):
-            self.epoch.accept_tops_as_epoch_hashes()
+            self.accept_new_epoch()
         epoch_hashes = self.epoch.get_epoch_hashes()
         allowed_signers = []
         for prev_hash in block.prev_hashes:
@@ -393,12 +451,18 @@ class Node:
     # -------------------------------------------------------------------------------
     # Handlers
     # -------------------------------------------------------------------------------
+    @with_crypto_caches
     def handle_block_message(self, node_id, raw_signed_block):
+        # transactions are decoded only if block passes duplicate and signer checks below
         signed_block = SignedBlock()
-        signed_block.parse(raw_signed_block)
+        signed_block.parse(raw_signed_block, lazy=True)
         block_number = self.epoch.get_block_number_from_timestamp(signed_block.block.timestamp)
         self.logger.info("Received block with number %s at timeslot %s with hash %s", block_number, self.epoch.get_current_timeframe_block_number(), signed_block.block.get_hash().hex())
 
+        # CHECK_DUPLICATE
+        if signed_block.get_hash() in self.dag.blocks_by_hash:
+            self.logger.info("Received block is already in DAG")
+            return
 
         # CHECK_ANCESTOR
         blocks_by_hash = self.dag.blocks_by_hash
@@ -417,20 +481,23 @@ class Node:
         # CHECK ALLOWED SIGNER
         if not block_out_of_epoch:  # if incoming block not out of current epoch
             allowed_signers = self.get_allowed_signers_for_block_number(block_number)
-            allowed_pubkey = None
-            for allowed_signer in allowed_signers:
-                if signed_block.verify_signature(allowed_signer):
-                    allowed_pubkey = allowed_signer
-                    break
+            allowed_pubkey = self.signature_verifier.find_signer(signed_block.get_hash(), signed_block.signature,
+                                                                 allowed_signers)
         else:
             allowed_pubkey = 'block_out_of_epoch'  # process block as orphan
 
+        # CHECK_BODY, block should never get into dag or orphan buffer with malformed transactions
+        if allowed_pubkey and not signed_block.block.decode_body():
+            self.logger.info("Received block has malformed transactions")
+            return
+
         if allowed_pubkey:  # IF SIGNER ALLOWED
             if not is_orphan_block:  # PROCESS NORMAL BLOCK (same epoch)
                 if self.epoch.is_new_epoch_upcoming(block_number):  # CHECK IS NEW EPOCH
-                    self.epoch.accept_tops_as_epoch_hashes()
+                    self.accept_new_epoch()
                 block_verifier = BlockAcceptor(self.epoch, self.logger)  # VERIFY BLOCK AS NORMAL
-                if block_verifier.check_if_valid(signed_block.block):
+                if block_verifier.check_if_valid(signed_block.block) and \
+                        self.are_penalty_gossips_valid(signed_block.block):
                     self.insert_verified_block(signed_block, allowed_pubkey)
                     return
             else:  # PROCESS ORPHAN BLOCK (same epoch)
@@ -450,12 +517,18 @@ class Node:
         else:
             self.logger.error("Received block from %d, but its signature is wrong", node_id)
 
+    @with_crypto_caches
     def handle_transaction_message(self, node_id, raw_transaction):
         transaction = TransactionParser.parse(raw_transaction)
 
         verifier = MempoolTransactionsAcceptor(self.epoch, self.permissions, self.logger)
         if verifier.check_if_valid(transaction):
             self.mempool.add_transaction(transaction)
+            # queue signature verification, result is needed only when transaction gets into block
+            # queue is sent to workers in batches, run awaits rest of it before next step
+            signature_checks = InBlockTransactionsAcceptor(self.epoch, self.permissions, self.logger) \
+                .get_signature_checks(transaction)
+            self.signature_verifier.submit_all(signature_checks)
             # PROCESS NEGATIVE GOSSIP
             if isinstance(transaction, NegativeGossipTransaction):
                 self.logger.info("Received negative gossip about block %s at timeslot %s", transaction.number_of_block,self.epoch.get_current_timeframe_block_number())
@@ -519,12 +592,14 @@ class Node:
     # -------------------------------------------------------------------------------
     # Targeted request
     # -------------------------------------------------------------------------------
+    @with_crypto_caches
     def request_block_by_hash(self, block_hash):
         # no need validate/ public info ?
         signed_block = self.dag.blocks_by_hash[block_hash]
         self.network.broadcast_block(self.node_id, signed_block.pack())
 
     # method returns block directly to sender without broadcast
+    @with_crypto_caches
     def direct_request_block_by_hash(self, sender_node, block_hash):
         signed_block = self.dag.blocks_by_hash[block_hash]
         self.network.direct_response_block_by_hash(self.node_id, sender_node, signed_block.pack())
@@ -549,25 +624,31 @@ class Node:
             block_number = self.epoch.get_block_number_from_timestamp(block_from_buffer.block.timestamp)
 
             if self.epoch.is_new_epoch_upcoming(block_number):  # CHECK IS NEW EPOCH
-                self.epoch.accept_tops_as_epoch_hashes()
+                self.accept_new_epoch()
 
             # validate block from buffer by signature
             allowed_signers = self.get_allowed_signers_for_block_number(block_number)
-            allowed_pubkey = None
-            for allowed_signer in allowed_signers:
-                if block_from_buffer.verify_signature(allowed_signer):
-                    allowed_pubkey = allowed_signer
-                    break
+            allowed_pubkey = self.signature_verifier.find_signer(block_from_buffer.get_hash(),
+                                                                 block_from_buffer.signature, allowed_signers)
 
             if allowed_pubkey:
                 block_verifier = BlockAcceptor(self.epoch, self.logger)
-                if block_verifier.check_if_valid(block_from_buffer.block):  # VERIFY BLOCK AS NORMAL
+                if block_verifier.check_if_valid(block_from_buffer.block) and \
+                        self.are_penalty_gossips_valid(block_from_buffer.block):  # VERIFY BLOCK AS NORMAL
                     self.insert_verified_block(block_from_buffer, allowed_pubkey)
                 else:
                     self.logger.info("Block from buffer verification failed")
             else:
                 self.logger.info("Block from buffer wrong signature")
 
+    # penalty gossips change validators, so block with penalty gossip nobody can resolve is rejected
+    def are_penalty_gossips_valid(self, block):
+        verifier = InBlockTransactionsAcceptor(self.epoch, self.permissions, self.logger, block)
+        for tx in block.system_txs:
+            if isinstance(tx, PenaltyGossipTransaction) and not verifier.check_if_valid(tx):
+                return False
+        return True
+
     def get_allowed_signers_for_block_number(self, block_number):
         # TODO take cached epoch hashes if block is of lastest epoch
         prev_epoch_number = self.epoch.get_epoch_number(block_number) - 1
@@ -578,8 +659,10 @@ class Node:
         # TODO maybe consider blocks to be epoch hashes if they are in final round and consider everything else is orphan
         epoch_hashes = self.dag.get_branches_for_timeslot_range(prev_epoch_start, prev_epoch_end + 1)
         
-        if prev_epoch_number == 0:
-            epoch_hashes = [self.dag.genesis_block().get_hash()]
+        # previous epoch is genesis or pruned, root of dag stands in for its epoch hash
+        root_hash = self.dag.get_root_hash()
+        if prev_epoch_end <= self.dag.get_block_number(root_hash):
+            epoch_hashes = [root_hash]
 
         allowed_signers = []
         for epoch_hash in epoch_hashes:
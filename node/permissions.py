@@ -1,8 +1,10 @@
 from chain.epoch import Epoch
 from chain.params import Round
-from transaction.gossip_transaction import PenaltyGossipTransaction
+from transaction.gossip_transaction import PenaltyGossipTransaction, PositiveGossipTransaction, \
+    NegativeGossipTransaction
 from transaction.stake_transaction import StakeHoldTransaction, PenaltyTransaction, StakeReleaseTransaction
 from node.validators import Validator, Validators
+from node.checkpoint_state import CheckpointState
 from node.stake_manager import StakeManager
 from crypto.keys import Keys
 from crypto.entropy import Source
@@ -14,20 +16,23 @@ from chain.params import ROUND_DURATION, ZETA
 class Permissions:
 
     def __init__(self, epoch, validators=Validators()):
+        # validators are given for root of dag, which is genesis unless dag is restored from checkpoint
+        root_hash = epoch.dag.get_root_hash()
         initial_validators = validators.validators
         if not initial_validators:
+            assert root_hash == epoch.dag.genesis_hash(), \
+                "Validators of restored root should be given, see CheckpointState"
             initial_validators = Validators.read_genesis_validators_from_file()
         self.epoch = epoch
         self.stake_manager = StakeManager(epoch)
-        genesis_hash = self.epoch.dag.genesis_block().get_hash()
         validator_count = len(initial_validators)
         initial_signers_indexes = validators.signers_order
         if not initial_signers_indexes:
-            initial_signers_indexes = self.epoch.calculate_validators_indexes(genesis_hash, validator_count, Source.SIGNERS)
+            initial_signers_indexes = self.epoch.calculate_validators_indexes(root_hash, validator_count, Source.SIGNERS)
 
         initial_randomizers_indexes = validators.randomizers_order
         if not initial_randomizers_indexes:
-            initial_randomizers_indexes = self.epoch.calculate_validators_indexes(genesis_hash, validator_count, Source.RANDOMIZERS)
+            initial_randomizers_indexes = self.epoch.calculate_validators_indexes(root_hash, validator_count, Source.RANDOMIZERS)
 
         self.log("Initial signers:",
                  initial_signers_indexes[0:ROUND_DURATION * 1],
@@ -39,9 +44,42 @@ class Permissions:
         self.log("Initial randomizers:", initial_randomizers_indexes)
 
         # init validators list and indexes, so we can build list of future validators based on this
-        self.epoch_validators = { genesis_hash : initial_validators }
-        self.signers_indexes = { genesis_hash : initial_signers_indexes }
-        self.randomizers_indexes = { genesis_hash : initial_randomizers_indexes }
+        self.epoch_validators = { root_hash : initial_validators }
+        self.signers_indexes = { root_hash : initial_signers_indexes }
+        self.randomizers_indexes = { root_hash : initial_randomizers_indexes }
+        self.root_hash = root_hash
+        self.epoch.dag.subscribe_to_blocks_pruned_notification(self)
+
+    # epoch hashes are blocks, so caches for pruned epoch hashes are not needed anymore
+    # validators of remaining epochs should be calculated before pruning, see Pruner
+    # new root of dag takes over validators of epoch hash it stands in for, so chain of epochs has its start again
+    # restored checkpoint has no known epoch hash, it takes over validators given for previous root
+    def on_blocks_pruned(self, pruned_blocks):
+        root_hash = self.epoch.dag.get_root_hash()
+        if root_hash not in self.epoch_validators:
+            root_epoch_hash = self.epoch.find_epoch_hash_for_block(root_hash)
+            if root_epoch_hash not in self.epoch_validators:
+                root_epoch_hash = self.root_hash
+            self.take_over_epoch(root_hash, root_epoch_hash)
+        self.root_hash = root_hash
+
+        for block_list in pruned_blocks.values():
+            for block in block_list:
+                block_hash = block.get_hash()
+                self.epoch_validators.pop(block_hash, None)
+                self.signers_indexes.pop(block_hash, None)
+                self.randomizers_indexes.pop(block_hash, None)
+
+    # state of root to be saved next to checkpoint, so permissions can be created for restored dag
+    def capture_checkpoint_state(self):
+        return CheckpointState.capture(self, self.epoch.seed_cache)
+
+    def take_over_epoch(self, epoch_hash, source_epoch_hash):
+        self.epoch_validators[epoch_hash] = self.epoch_validators[source_epoch_hash]
+        if source_epoch_hash in self.signers_indexes:
+            self.signers_indexes[epoch_hash] = self.signers_indexes[source_epoch_hash]
+        if source_epoch_hash in self.randomizers_indexes:
+            self.randomizers_indexes[epoch_hash] = self.randomizers_indexes[source_epoch_hash]
 
     def get_sign_permission(self, epoch_hash, block_number_in_epoch):
         validators_for_epoch = self.get_validators(epoch_hash)
@@ -106,16 +144,34 @@ class Permissions:
             self.randomizers_indexes[epoch_hash] = random_indexes
         return self.randomizers_indexes[epoch_hash]
 
+    # sets indexes calculated in advance, see EpochPrecomputer
+    def set_indexes(self, epoch_hash, signers_indexes, randomizers_indexes):
+        self.signers_indexes.setdefault(epoch_hash, signers_indexes)
+        self.randomizers_indexes.setdefault(epoch_hash, randomizers_indexes)
+
     def get_validators(self, epoch_hash):
         if epoch_hash not in self.epoch_validators:
             self.calculate_validators_for_epoch(epoch_hash)
         return self.epoch_validators[epoch_hash]
 
+    # returns validators of epoch hash without caching them, so top which may never become epoch hash
+    # doesn't stay in cache, see EpochPrecomputer
+    # stake actions modify list they are applied to, so validators of previous epoch are copied
+    def calculate_speculative_validators(self, epoch_hash):
+        if epoch_hash in self.epoch_validators:
+            return self.epoch_validators[epoch_hash]
+        prev_epoch_hash = self.epoch.get_previous_epoch_hash(epoch_hash)
+        validators = list(self.get_validators(prev_epoch_hash))
+        stake_actions = self.stake_manager.get_stake_actions(epoch_hash)
+        gossips = self.stake_manager.get_epoch_gossips(epoch_hash)
+        return self.apply_stake_actions(validators, stake_actions, gossips)
+
     def calculate_validators_for_epoch(self, epoch_hash):
         prev_epoch_hash = self.epoch.get_previous_epoch_hash(epoch_hash)
         validators = self.get_validators(prev_epoch_hash)
         stake_actions = self.stake_manager.get_stake_actions(epoch_hash)
-        validators = self.apply_stake_actions(validators, stake_actions)
+        gossips = self.stake_manager.get_epoch_gossips(epoch_hash)
+        validators = self.apply_stake_actions(validators, stake_actions, gossips)
         self.epoch_validators[epoch_hash] = validators
 
     def get_ordered_signers_pubkeys_for_round(self, epoch_hash, round_type):
@@ -161,14 +217,17 @@ class Permissions:
         return validators
 
     # this method modifies list, but also returns it for API consistency
-    def apply_stake_actions(self, validators, actions):
+    # gossips are ones penalty gossips may refer to, see StakeManager.get_epoch_gossips
+    def apply_stake_actions(self, validators, actions, gossips=None):
         for action in actions:
             if isinstance(action, PenaltyTransaction):
                 for conflict in action.conflicts:
                     culprit = self.get_block_validator(conflict)
                     self.release_stake(validators, Keys.to_bytes(culprit.public_key))
             elif isinstance(action, PenaltyGossipTransaction):
-                culprit = self.get_conflict_gossip_sender(action)
+                culprit = self.get_conflict_gossip_sender(action, gossips or {})
+                # blocks with penalty gossips which can't be resolved are rejected, see InBlockTransactionsAcceptor
+                assert culprit, "Penalty gossip refers to unknown or non conflicting gossips"
                 self.release_stake(validators, Keys.to_bytes(culprit))
             elif isinstance(action, StakeHoldTransaction):
                 self.hold_stake(validators, action.pubkey, action.amount)
@@ -186,12 +245,19 @@ class Permissions:
         assert epoch_hash, "Can't find epoch hash for block"
         return self.get_sign_permission(epoch_hash, epoch_block_number)
 
-    def get_conflict_gossip_sender(self, action):
-        positive_gossip = self.epoch.dag.get_tx_by_hash(action.conflicts[0])
-        negative_gossip = self.epoch.dag.get_tx_by_hash(action.conflicts[1])
+    # gossips is dict of gossips by hash penalty gossip may refer to
+    # returns None if any of gossips is not among them or they don't conflict
+    def get_conflict_gossip_sender(self, action, gossips):
+        dag = self.epoch.dag
+        positive_gossip = gossips.get(action.conflicts[0])
+        negative_gossip = gossips.get(action.conflicts[1])
+        if not isinstance(positive_gossip, PositiveGossipTransaction) or \
+                not isinstance(negative_gossip, NegativeGossipTransaction):
+            return None
         if (positive_gossip.pubkey == negative_gossip.pubkey) and \
-                (negative_gossip.number_of_block == self.epoch.dag.get_block_number(positive_gossip.block_hash)):
+                (negative_gossip.number_of_block == dag.block_numbers_by_hash.get(positive_gossip.block_hash)):
             return negative_gossip.pubkey
+        return None
 
     # --------------------------------------
     # Stake methods
@@ -1,4 +1,5 @@
-from transaction.gossip_transaction import PenaltyGossipTransaction
+from transaction.gossip_transaction import PenaltyGossipTransaction, PositiveGossipTransaction, \
+    NegativeGossipTransaction
 from transaction.stake_transaction import StakeHoldTransaction, PenaltyTransaction, StakeReleaseTransaction
 from chain.dag import Dag, ChainIter
 from chain.epoch import Epoch
@@ -11,14 +12,12 @@ class StakeManager:
 
     def get_stake_actions(self, epoch_hash):
         epoch_iter = ChainIter(self.epoch.dag, epoch_hash)
-        
+        # genesis block is never included
+        lowest_block_number = max(epoch_iter.block_number - Epoch.get_duration() + 1, 1)
+
         stake_actions = []
 
-        count = 0
-        for block in epoch_iter:
-            if epoch_iter.block_number == 0:
-                break
-                
+        for block in epoch_iter.iterate_down_to(lowest_block_number):
             if block:
                 for tx in block.block.system_txs:
                     if isinstance(tx, StakeHoldTransaction) \
@@ -27,10 +26,28 @@ class StakeManager:
                     or isinstance(tx, PenaltyGossipTransaction):
                         stake_actions.append(tx)
 
-            count += 1
-            if count == Epoch.get_duration():
-                break
-
         stake_actions = list(reversed(stake_actions))        
 
         return stake_actions
+
+    # gossips penalty gossips of epoch may refer to, they are looked up along the same chain as stake actions
+    # and never in dag indexes, so penalties are resolved the same way by every node whatever it has pruned
+    def get_epoch_gossips(self, epoch_hash):
+        epoch_iter = ChainIter(self.epoch.dag, epoch_hash)
+        lowest_block_number = max(epoch_iter.block_number - Epoch.get_duration() + 1, 1)
+        return self.get_chain_gossips(epoch_hash, lowest_block_number)
+
+    # returns positive and negative gossips by hash from first parent chain of top_hash down to lowest_block_number
+    def get_chain_gossips(self, top_hash, lowest_block_number):
+        gossips = {}
+        for block in ChainIter(self.epoch.dag, top_hash).iterate_down_to(lowest_block_number):
+            if block:
+                StakeManager.add_gossips(gossips, block.block.system_txs)
+        return gossips
+
+    @staticmethod
+    def add_gossips(gossips, txs):
+        for tx in txs:
+            if isinstance(tx, PositiveGossipTransaction) or isinstance(tx, NegativeGossipTransaction):
+                gossips[tx.get_hash()] = tx
+        return gossips
@@ -1,6 +1,10 @@
 import unittest
 
 from tests.test_block import *
+from tests.test_block_store import *
+from tests.test_block_archive import *
+from tests.test_pruner import *
+from tests.test_timeslot_index import *
 from tests.test_confirmation_requirement import *
 from tests.test_dag import *
 from tests.test_epoch import *
@@ -10,8 +14,12 @@ from tests.test_merger import *
 from tests.test_merging_iterator import *
 from tests.test_node import *
 from tests.test_permissions import *
+from tests.test_epoch_precomputer import *
 from tests.test_random import *
 from tests.test_secret_sharing import *
+from tests.test_seed_cache import *
+from tests.test_crypto_cache import *
+from tests.test_signature_verifier import *
 from tests.test_stake_transaction import *
 from tests.test_transaction import *
 from tests.test_conflict_finder import *
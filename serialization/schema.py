@@ -0,0 +1,600 @@
+import struct
+from hashlib import sha256
+from operator import attrgetter
+
+from serialization.serializer import Serializer, Deserializer
+
+# Declarative field schemas for messages
+# schema is a list of (field name, field type) pairs in wire order
+# codec compiles every schema into closures over precompiled struct.Struct objects, no per field calls are made
+#   pack  - the whole message is one struct built for lengths of its variable fields and cached,
+#           it's written straight into serializer buffer with pack_into or returned as bytes with pack
+#           bytes with u8 length are struct pascal strings, so such fields are passed to struct as they are
+#   parse - message is read in runs, run is a variable field with fixed fields after it and length prefix
+#           of the next variable field, so every run is read with one struct built for its length
+# wire format is the same as Serializer/Deserializer produce: native byte order, standard sizes, no padding
+
+# messages with variable length fields have their structs built for every combination of lengths,
+# cache is dropped when it grows above this size, so unusual lengths can't grow it without bound
+MAX_CACHED_STRUCTS = 256
+
+
+class Fixed:
+    def __init__(self, struct_format):
+        self.format = struct_format
+        self.size = struct.calcsize("=" + struct_format)
+
+
+# bytes prefixed with their length
+# bytes with u8 length are packed as pascal string, it's the same length byte followed by bytes
+class Bytes:
+    def __init__(self, length_type):
+        self.length = struct.Struct("=" + length_type.format)
+        self.prefix_format = length_type.format
+        self.is_pascal = length_type.format == "B"
+
+    def get_pack_format(self, length):
+        self.length.pack(length)  # raises struct.error for too long bytes, pascal string would be cut silently
+        if self.is_pascal:
+            return "%dp" % (length + 1)
+        return self.prefix_format + "%ds" % length
+
+
+# list of fixed size items or length prefixed bytes, prefixed with item count
+# if count_of is set, count is not written and list must be as long as field with that name
+class List:
+    def __init__(self, item, count=None, count_of=None):
+        assert isinstance(item, (Fixed, Bytes)), "Only fixed size items and bytes can be listed"
+        assert bool(count) != bool(count_of), "List needs either written count or count_of field"
+        assert isinstance(item, Fixed) or item.is_pascal, "Only bytes with u8 length can be listed"
+        self.item = item
+        self.count = struct.Struct("=" + count.format) if count else None
+        self.count_of = count_of
+        self.prefix_format = count.format if count else ""
+
+    def get_body_format(self, count):
+        return self.item.format * count
+
+    # length is item count for fixed size items and tuple of item lengths for bytes
+    def get_pack_format(self, length):
+        if isinstance(self.item, Fixed):
+            return self.prefix_format + self.get_body_format(length)
+        return self.prefix_format + "".join(self.item.get_pack_format(item_length) for item_length in length)
+
+
+U8 = Fixed("B")
+U16 = Fixed("H")
+U32 = Fixed("I")
+TIMESTAMP = U32
+HASH = Fixed("32s")
+PUBKEY = Fixed("40s")
+SIGNATURE = Bytes(U8)
+ENCRYPTED_DATA = Bytes(U8)  # 255 bytes max
+PRIVATE_KEY = Bytes(U16)
+
+
+class Codec:
+    def __init__(self, fields):
+        for name, field_type in fields:
+            assert isinstance(field_type, (Fixed, Bytes, List)), "Unknown field type of " + name
+        self.fields = fields
+        self.subcodecs = {}  # key is tuple of field names
+        self.get_values = Codec.get_values_getter(tuple(name for name, _ in fields))
+        self.packers = {}  # key is length of the only variable field or tuple of lengths of variable fields
+
+        # (field index, field type, index of count_of field or None) of every variable field
+        indexes = {name: index for index, (name, _) in enumerate(fields)}
+        self.variables = [(index, field_type, indexes[field_type.count_of] if isinstance(field_type, List) and
+                           field_type.count_of else None)
+                          for index, (_, field_type) in enumerate(fields) if not isinstance(field_type, Fixed)]
+
+        # prepare returns struct of message and values for it, length prefixes and list items included
+        prefixed = [variable for variable in self.variables if not Codec.is_pascal(variable[1])]
+        if not prefixed:
+            self.prepare = self.compile_pascal_prepare()
+        elif len(prefixed) == 1 and prefixed[0][2] is None and len(self.variables) <= 2:
+            self.prepare = self.compile_prefixed_prepare(prefixed[0])
+        if len(fields) == 1 and isinstance(fields[0][1], Bytes):
+            self.pack_all, self.pack_into = self.compile_only_bytes_pack()
+        else:
+            self.pack_all, self.pack_into = Codec.compile_pack(self.prepare)
+
+        # parse step reads run of variable field from given offset, returns offset after it and length of the next one
+        # head run before the first variable field is read by parse function itself
+        self.parse_steps = []
+        variable = None
+        run_fields = []
+        for name, field_type in fields:
+            if isinstance(field_type, Fixed):
+                run_fields.append((name, field_type))
+                continue
+            if variable:
+                self.add_run(variable, run_fields, (name, field_type))
+            variable = (name, field_type)
+            run_fields = []
+        if not variable:
+            self.parse_from = self.compile_single_run_parse(run_fields)
+            return
+        self.add_run(variable, run_fields, None)
+        if len(self.variables) == 1 and not Codec.is_bytes_list(self.variables[0][1]):
+            self.parse_from = self.compile_single_variable_parse()
+        else:
+            self.parse_from = self.compile_runs_parse()
+
+    # ------------------------------
+    # pack plans
+    # ------------------------------
+    # struct is written straight into serializer buffer, which grows only if it has no room for it
+    @staticmethod
+    def compile_pack(prepare):
+        def pack_all(message):
+            packer, values = prepare(message)
+            return packer.pack(*values)
+
+        def pack_into(serializer, message):
+            packer, values = prepare(message)
+            offset = serializer.offset
+            end = offset + packer.size
+            if end > len(serializer.data):
+                serializer.reserve(packer.size)
+            packer.pack_into(serializer.data, offset, *values)
+            serializer.offset = end
+
+        return pack_all, pack_into
+
+    # message of a single bytes field is its length and bytes, struct built for every length would only slow it down
+    def compile_only_bytes_pack(self):
+        name, field_type = self.fields[0]
+        get_value = attrgetter(name)
+        pack_length = field_type.length.pack
+        pack_length_into = field_type.length.pack_into
+        length_size = field_type.length.size
+
+        def pack_only_bytes(message):
+            value = get_value(message)
+            return pack_length(len(value)) + value
+
+        def pack_only_bytes_into(serializer, message):
+            value = get_value(message)
+            offset = serializer.offset
+            start = offset + length_size
+            end = start + len(value)
+            if end > len(serializer.data):
+                serializer.reserve(end - offset)
+            pack_length_into(serializer.data, offset, len(value))
+            serializer.data[start:end] = value
+            serializer.offset = end
+
+        return pack_only_bytes, pack_only_bytes_into
+
+    def prepare(self, message):
+        values = self.get_values(message)
+        prepared = []
+        lengths = []
+        start = 0
+        for index, field_type, count_of_index in self.variables:
+            prepared += values[start:index]
+            start = index + 1
+            value = values[index]
+            if isinstance(field_type, Bytes):
+                lengths.append(len(value))
+                if not field_type.is_pascal:
+                    prepared.append(len(value))
+                prepared.append(value)
+                continue
+            if count_of_index is None:
+                prepared.append(len(value))
+            else:
+                assert len(value) == len(values[count_of_index]), "Count of %s must match count of %s" % \
+                                                                   (self.fields[index][0], field_type.count_of)
+            lengths.append(len(value) if isinstance(field_type.item, Fixed) else tuple(map(len, value)))
+            prepared += value
+        prepared += values[start:]
+        key = lengths[0] if len(lengths) == 1 else tuple(lengths)
+        return self.packers.get(key) or self.get_packer(key), prepared
+
+    # all variable fields are pascal strings or there are none, so values of fields are values of struct as they are
+    # and struct is selected by their lengths only
+    def compile_pascal_prepare(self):
+        get_values = self.get_values
+        packers = self.packers
+        get_packer = self.get_packer
+        indexes = [index for index, _, _ in self.variables]
+        if not indexes:
+            packer = get_packer(())
+
+            def prepare_fixed(message):
+                return packer, get_values(message)
+
+            return prepare_fixed
+
+        if len(indexes) == 1:
+            index, = indexes
+
+            def prepare_pascal(message):
+                values = get_values(message)
+                length = len(values[index])
+                return packers.get(length) or get_packer(length), values
+
+            return prepare_pascal
+
+        def prepare_pascals(message):
+            values = get_values(message)
+            lengths = tuple([len(values[index]) for index in indexes])
+            return packers.get(lengths) or get_packer(lengths), values
+
+        return prepare_pascals
+
+    # the only variable field which isn't pascal string is bytes with long length or list with count,
+    # its length is put in front of it and list items are spread in place of it
+    # there may be one more variable field, which is pascal string
+    def compile_prefixed_prepare(self, variable):
+        get_values = self.get_values
+        packers = self.packers
+        get_packer = self.get_packer
+        index, field_type, _ = variable
+        other_index = next((other_index for other_index, _, _ in self.variables if other_index != index), None)
+        is_first = other_index is None or index < other_index
+        is_bytes = isinstance(field_type, Bytes)
+        is_bytes_list = Codec.is_bytes_list(field_type)
+
+        def prepare_prefixed(message):
+            values = get_values(message)
+            value = values[index]
+            length = len(value)
+            key = tuple(map(len, value)) if is_bytes_list else length
+            if other_index is not None:
+                key = (key, len(values[other_index])) if is_first else (len(values[other_index]), key)
+            if is_bytes:
+                values = values[:index] + (length, value) + values[index + 1:]
+            else:
+                values = values[:index] + (length, *value) + values[index + 1:]
+            return packers.get(key) or get_packer(key), values
+
+        return prepare_prefixed
+
+    # key is length of the only variable field or tuple of lengths of every variable field, see List.get_pack_format
+    def get_packer(self, key):
+        if len(self.packers) >= MAX_CACHED_STRUCTS:
+            self.packers.clear()
+        struct_format = ""
+        lengths = iter((key,) if len(self.variables) == 1 else key)
+        for _, field_type in self.fields:
+            if isinstance(field_type, Fixed):
+                struct_format += field_type.format
+            else:
+                struct_format += field_type.get_pack_format(next(lengths))
+        packer = struct.Struct("=" + struct_format)
+        self.packers[key] = packer
+        return packer
+
+    # ------------------------------
+    # parse plans
+    # ------------------------------
+    # run without variable fields is read with one struct and nothing else
+    def compile_single_run_parse(self, run_fields):
+        set_values = Codec.get_setter(tuple(name for name, _ in run_fields))
+        unpacker = struct.Struct("=" + "".join(field_type.format for _, field_type in run_fields))
+        unpack_from = unpacker.unpack_from
+        size = unpacker.size
+
+        def parse_fixed(deserializer, message):
+            offset = deserializer.offset
+            if set_values:
+                set_values(message, unpack_from(deserializer.view, offset))
+            deserializer.offset = offset + size
+
+        return parse_fixed
+
+    # head run and the run of variable field are read in one function, so no steps are called
+    def compile_single_variable_parse(self):
+        index, field_type, _ = self.variables[0]
+        name = self.fields[index][0]
+        set_head = Codec.get_setter(tuple(field_name for field_name, _ in self.fields[:index]))
+        head = struct.Struct("=" + "".join(head_type.format for _, head_type in self.fields[:index]) +
+                             field_type.prefix_format)
+        head_unpack_from = head.unpack_from
+        head_size = head.size
+        tail_names = tuple(field_name for field_name, _ in self.fields[index + 1:])
+        tail_format = "".join(tail_type.format for _, tail_type in self.fields[index + 1:])
+        unpackers = {}
+
+        def get_unpacker(length):
+            if len(unpackers) >= MAX_CACHED_STRUCTS:
+                unpackers.clear()
+            unpacker = struct.Struct("=" + Codec.get_body_format(field_type, length) + tail_format)
+            unpackers[length] = unpacker
+            return unpacker
+
+        if isinstance(field_type, Bytes) and not tail_names:
+            def parse_last_bytes(deserializer, message):
+                view = deserializer.view
+                offset = deserializer.offset
+                values = head_unpack_from(view, offset)
+                if set_head:
+                    set_head(message, values)
+                offset += head_size
+                end = offset + values[-1]
+                setattr(message, name, view[offset:end].tobytes())
+                deserializer.offset = end
+
+            return parse_last_bytes
+
+        if isinstance(field_type, Bytes):
+            set_tail = Codec.get_setter((name,) + tail_names)
+
+            def parse_single_bytes(deserializer, message):
+                view = deserializer.view
+                offset = deserializer.offset
+                values = head_unpack_from(view, offset)
+                if set_head:
+                    set_head(message, values)
+                length = values[-1]
+                offset += head_size
+                unpacker = unpackers.get(length) or get_unpacker(length)
+                set_tail(message, unpacker.unpack_from(view, offset))
+                deserializer.offset = offset + unpacker.size
+
+            return parse_single_bytes
+
+        set_tail = Codec.get_setter(tail_names)
+
+        def parse_single_list(deserializer, message):
+            view = deserializer.view
+            offset = deserializer.offset
+            values = head_unpack_from(view, offset)
+            if set_head:
+                set_head(message, values)
+            count = values[-1]
+            offset += head_size
+            unpacker = unpackers.get(count) or get_unpacker(count)
+            values = unpacker.unpack_from(view, offset)
+            setattr(message, name, list(values[:count]))
+            if set_tail:
+                set_tail(message, values[count:])
+            deserializer.offset = offset + unpacker.size
+
+        return parse_single_list
+
+    # head run is read in place and the rest of runs by parse steps
+    def compile_runs_parse(self):
+        index, field_type, _ = self.variables[0]
+        assert field_type.prefix_format, "The first variable field must have length prefix"
+        set_head = Codec.get_setter(tuple(name for name, _ in self.fields[:index]))
+        head = struct.Struct("=" + "".join(head_type.format for _, head_type in self.fields[:index]) +
+                             field_type.prefix_format)
+        head_unpack_from = head.unpack_from
+        head_size = head.size
+        parse_steps = self.parse_steps
+
+        def parse_runs(deserializer, message):
+            view = deserializer.view
+            offset = deserializer.offset
+            values = head_unpack_from(view, offset)
+            if set_head:
+                set_head(message, values)
+            length = values[-1]
+            offset += head_size
+            for parse_step in parse_steps:
+                offset, length = parse_step(view, offset, message, length)
+            deserializer.offset = offset
+
+        return parse_runs
+
+    def add_run(self, variable, run_fields, next_variable):
+        names = tuple(name for name, _ in run_fields)
+        tail_format = "".join(field_type.format for _, field_type in run_fields)
+        has_prefix = False
+        count_of = None
+        if next_variable:
+            next_type = next_variable[1]
+            tail_format += next_type.prefix_format
+            has_prefix = bool(next_type.prefix_format)
+            if not has_prefix:
+                count_of = attrgetter(next_type.count_of)
+
+        if Codec.is_bytes_list(variable[1]):
+            parse_step = Codec.compile_bytes_list_step(variable, names, tail_format, has_prefix)
+        else:
+            parse_step = Codec.compile_variable_step(variable, names, tail_format, has_prefix)
+
+        # count of list without prefix is the length of the other field, which is parsed by now
+        if count_of:
+            parse_run = parse_step
+
+            def parse_step(view, offset, message, length):
+                offset, _ = parse_run(view, offset, message, length)
+                return offset, len(count_of(message))
+
+        self.parse_steps.append(parse_step)
+
+    # bytes field or list of fixed size items is read together with the rest of the run by struct built for its length
+    @staticmethod
+    def compile_variable_step(variable, names, tail_format, has_prefix):
+        name, field_type = variable
+        unpackers = {}
+
+        def get_unpacker(length):
+            if len(unpackers) >= MAX_CACHED_STRUCTS:
+                unpackers.clear()
+            unpacker = struct.Struct("=" + Codec.get_body_format(field_type, length) + tail_format)
+            unpackers[length] = unpacker
+            return unpacker
+
+        # bytes at the end of message are just sliced off
+        if isinstance(field_type, Bytes) and not tail_format:
+            def parse_last_bytes(view, offset, message, length):
+                end = offset + length
+                setattr(message, name, view[offset:end].tobytes())
+                return end, None
+
+            return parse_last_bytes
+
+        if isinstance(field_type, Bytes):
+            set_values = Codec.get_setter((name,) + names)
+
+            def parse_bytes(view, offset, message, length):
+                unpacker = unpackers.get(length) or get_unpacker(length)
+                values = unpacker.unpack_from(view, offset)
+                set_values(message, values)
+                return offset + unpacker.size, values[-1] if has_prefix else None
+
+            return parse_bytes
+
+        set_values = Codec.get_setter(names)
+
+        def parse_list(view, offset, message, count):
+            unpacker = unpackers.get(count) or get_unpacker(count)
+            values = unpacker.unpack_from(view, offset)
+            setattr(message, name, list(values[:count]))
+            if set_values:
+                set_values(message, values[count:])
+            return offset + unpacker.size, values[-1] if has_prefix else None
+
+        return parse_list
+
+    # items are prefixed with their lengths, so they are read one by one and only the rest of the run with one struct
+    @staticmethod
+    def compile_bytes_list_step(variable, names, tail_format, has_prefix):
+        name, field_type = variable
+        set_values = Codec.get_setter(names)
+        length_unpack_from = field_type.item.length.unpack_from
+        length_size = field_type.item.length.size
+        unpacker = struct.Struct("=" + tail_format)
+        unpack_from = unpacker.unpack_from
+        size = unpacker.size
+
+        def parse_bytes_list(view, offset, message, count):
+            items = []
+            for _ in range(count):
+                length, = length_unpack_from(view, offset)
+                offset += length_size
+                items.append(view[offset:offset + length].tobytes())
+                offset += length
+            setattr(message, name, items)
+            if not size:
+                return offset, None
+            values = unpack_from(view, offset)
+            if set_values:
+                set_values(message, values)
+            return offset + size, values[-1] if has_prefix else None
+
+        return parse_bytes_list
+
+    # format of bytes or list items without prefix, parse reads prefix in the run before
+    @staticmethod
+    def get_body_format(field_type, length):
+        if isinstance(field_type, Bytes):
+            return "%ds" % length
+        return field_type.get_body_format(length)
+
+    # returns function which sets values to fields of given names in order, values after the last name are ignored
+    # setattr calls are unrolled for short runs, because loop over names costs more than the unpacking itself
+    # None is returned if there are no names, so callers skip the call
+    @staticmethod
+    def get_setter(names):
+        if not names:
+            return None
+        if len(names) == 1:
+            name_0, = names
+
+            def set_1(message, values):
+                setattr(message, name_0, values[0])
+
+            return set_1
+        if len(names) == 2:
+            name_0, name_1 = names
+
+            def set_2(message, values):
+                setattr(message, name_0, values[0])
+                setattr(message, name_1, values[1])
+
+            return set_2
+        if len(names) == 3:
+            name_0, name_1, name_2 = names
+
+            def set_3(message, values):
+                setattr(message, name_0, values[0])
+                setattr(message, name_1, values[1])
+                setattr(message, name_2, values[2])
+
+            return set_3
+
+        def set_all(message, values):
+            for name, value in zip(names, values):
+                setattr(message, name, value)
+
+        return set_all
+
+    @staticmethod
+    def is_pascal(field_type):
+        return isinstance(field_type, Bytes) and field_type.is_pascal
+
+    @staticmethod
+    def is_bytes_list(field_type):
+        return isinstance(field_type, List) and isinstance(field_type.item, Bytes)
+
+    # returns function which returns tuple of field values of message
+    @staticmethod
+    def get_values_getter(names):
+        if len(names) == 1:
+            get_value = attrgetter(names[0])
+            return lambda message: (get_value(message),)
+        return attrgetter(*names)
+
+    def get_field_names(self):
+        return [name for name, _ in self.fields]
+
+    # packs all fields, or only given ones in schema order
+    def pack(self, message, field_names=None):
+        if field_names is None:
+            return self.pack_all(message)
+        return self.get_subcodec(field_names).pack_all(message)
+
+    def get_subcodec(self, field_names):
+        field_names = tuple(field_names)
+        codec = self.subcodecs.get(field_names)
+        if not codec:
+            codec = Codec([(name, field_type) for name, field_type in self.fields if name in field_names])
+            self.subcodecs[field_names] = codec
+        return codec
+
+
+# class decorator generating parse, parse_from, pack and pack_into methods from schema
+# if hashed field names are given, get_hash is generated as sha256 of those fields packed in schema order
+def schema(fields, hashed=None):
+    codec = Codec(fields)
+
+    def attach(cls):
+        assert set(codec.get_field_names()) <= set(cls.__slots__), "Every schema field must be in __slots__"
+
+        def parse(self, raw_data):
+            deserializer = Deserializer(raw_data)
+            codec.parse_from(deserializer, self)
+            return deserializer.get_len()
+
+        def parse_from(self, deserializer):
+            codec.parse_from(deserializer, self)
+
+        def pack(self):
+            return codec.pack_all(self)
+
+        def pack_into(self, serializer):
+            codec.pack_into(serializer, self)
+
+        cls.CODEC = codec
+        cls.parse = parse
+        cls.parse_from = parse_from
+        cls.pack = pack
+        cls.pack_into = pack_into
+
+        if hashed is not None:
+            pack_hashed = codec.get_subcodec(hashed).pack_all
+
+            def get_hash(self):
+                return sha256(pack_hashed(self)).digest()
+
+            cls.get_hash = get_hash
+        return cls
+
+    return attach
@@ -1,8 +1,69 @@
 import struct
 
+U8 = struct.Struct("B")
+U16 = struct.Struct("H")
+U32 = struct.Struct("I")
+
+
+# Serializer writes fields with pack_into straight into one preallocated bytearray
+# buffer grows by doubling, so packing a message allocates only a couple of buffers regardless of field count
+# static write_* methods return bytes of a single field and are used for small hashed pieces of data
 class Serializer:
-    def __init__(self):
-        self.data = bytearray()
+    def __init__(self, capacity=256):
+        self.data = bytearray(capacity)
+        self.offset = 0
+
+    # returns packed bytes written so far
+    def get_bytes(self):
+        return bytes(memoryview(self.data)[:self.offset])
+
+    def reserve(self, byte_count):
+        required = self.offset + byte_count
+        if required > len(self.data):
+            self.data.extend(bytes(max(required, 2 * len(self.data)) - len(self.data)))
+
+    def put_bytes(self, raw):
+        end = self.offset + len(raw)
+        if end > len(self.data):
+            self.reserve(len(raw))
+        self.data[self.offset:end] = raw
+        self.offset = end
+
+    def put_signature(self, signature):
+        self.put_u8(len(signature))
+        self.put_bytes(signature)
+
+    def put_timestamp(self, timestamp):
+        self.put_u32(timestamp)
+
+    def put_private_key(self, private_key):
+        self.put_u16(len(private_key))
+        self.put_bytes(private_key)
+
+    def put_encrypted_data(self, data):
+        self.put_u8(len(data))
+        self.put_bytes(data)
+
+    # writes all values with one precompiled struct.Struct
+    def put_struct(self, packer, *values):
+        self.reserve(packer.size)
+        packer.pack_into(self.data, self.offset, *values)
+        self.offset += packer.size
+
+    def put_u8(self, u8):
+        self.reserve(1)
+        U8.pack_into(self.data, self.offset, u8)
+        self.offset += 1
+
+    def put_u16(self, u16):
+        self.reserve(2)
+        U16.pack_into(self.data, self.offset, u16)
+        self.offset += 2
+
+    def put_u32(self, u32):
+        self.reserve(4)
+        U32.pack_into(self.data, self.offset, u32)
+        self.offset += 4
 
     @staticmethod
     def write_signature(signature):
@@ -28,30 +89,32 @@ class Serializer:
 
     @staticmethod
     def write_u8(u8):
-        return struct.pack("B", u8)
+        return U8.pack(u8)
 
     @staticmethod
     def write_u16(u16):
-        return struct.pack("H", u16)
+        return U16.pack(u16)
 
     @staticmethod
     def write_u32(u32):
-        return struct.pack("I", u32)
+        return U32.pack(u32)
 
     @staticmethod
     def write_i32(i32):
         return int.to_bytes(i32, length=4, byteorder='big')
 
 
+# Deserializer is a cursor over memoryview of raw data, so reading a field never copies the rest of the buffer
+# one deserializer can be shared by nested parsers, e.g. block and its transactions
 class Deserializer:
-    def __init__(self, data):
-        self.data = data
-        self.len = 0
+    def __init__(self, data, offset=0):
+        self.view = memoryview(data)
+        self.start = offset
+        self.offset = offset
 
     def read_and_move(self, byte_count):
-        parsed = self.data[:byte_count]
-        self.data = self.data[byte_count:]
-        self.len += byte_count
+        parsed = self.view[self.offset:self.offset + byte_count].tobytes()
+        self.offset += len(parsed)
         return parsed
 
     def parse_pubkey(self):
@@ -60,7 +123,7 @@ class Deserializer:
     def parse_signature(self):
         signature_len = self.parse_u8()
         return self.read_and_move(signature_len)
-    
+
     def parse_timestamp(self):
         return self.parse_u32()
 
@@ -72,22 +135,25 @@ class Deserializer:
     def parse_hash(self):
         return self.read_and_move(32)
 
+    # reads tuple of values with one precompiled struct.Struct
+    def parse_struct(self, unpacker):
+        parsed = unpacker.unpack_from(self.view, self.offset)
+        self.offset += unpacker.size
+        return parsed
+
     def parse_u8(self):
-        parsed = struct.unpack_from("B", self.data)[0]
-        self.data = self.data[1:]
-        self.len += 1
+        parsed = U8.unpack_from(self.view, self.offset)[0]
+        self.offset += 1
         return parsed
 
     def parse_u16(self):
-        parsed = struct.unpack_from("H", self.data)[0]
-        self.data = self.data[2:]
-        self.len += 2
+        parsed = U16.unpack_from(self.view, self.offset)[0]
+        self.offset += 2
         return parsed
 
     def parse_u32(self):
-        parsed = struct.unpack_from("I", self.data)[0]
-        self.data = self.data[4:]
-        self.len += 4
+        parsed = U32.unpack_from(self.view, self.offset)[0]
+        self.offset += 4
         return parsed
 
     def parse_private_key(self):
@@ -96,5 +162,4 @@ class Deserializer:
 
     # returns amount of read bytes
     def get_len(self):
-        return self.len
-
+        return self.offset - self.start
@@ -1,6 +1,9 @@
 import unittest
 import os
+import struct
 from chain.block import Block
+from chain.block_factory import BlockFactory
+from chain.signed_block import SignedBlock
 from transaction.secret_sharing_transactions import SplitRandomTransaction, PrivateKeyTransaction
 from transaction.payment_transaction import PaymentTransaction
 from crypto.private import Private
@@ -42,3 +45,120 @@ class TestBlock(unittest.TestCase):
         self.assertEqual(tx.get_hash(), restored.system_txs[0].get_hash())
         self.assertEqual(pktx.get_hash(), restored.system_txs[1].get_hash())
 
+
+    def test_signed_block_is_frozen(self):
+        private = Private.generate()
+        block = BlockFactory.create_block_with_timestamp([sha256(b"prev").digest()], 12)
+        signed_block = BlockFactory.sign_block(block, private)
+        block_hash = block.get_hash()
+        raw = signed_block.pack()
+
+        self.assertEqual(block_hash, sha256(block.raw).digest())
+        self.assertIs(signed_block.pack(), raw)
+        with self.assertRaises(AttributeError):
+            block.timestamp = 13
+
+        # parsed block keeps wire bytes and doesn't pack them again
+        restored = SignedBlock().parse(raw + b"trailing data")
+        self.assertTrue(restored.block.frozen)
+        self.assertEqual(restored.pack(), raw)
+        self.assertEqual(restored.get_hash(), block_hash)
+
+        # contents can't be changed in place either, so cached bytes and hash never go stale
+        for txs in [block.prev_hashes, block.system_txs, block.payment_txs]:
+            with self.assertRaises(AttributeError):
+                txs.append(PrivateKeyTransaction())
+        self.assertEqual(block.get_hash(), block_hash)
+
+    def test_packed_signed_block_rejects_assignment(self):
+        private = Private.generate()
+        block = BlockFactory.create_block_with_timestamp([sha256(b"prev").digest()], 12)
+        signed_block = BlockFactory.sign_block(block, private)
+        raw = signed_block.pack()
+
+        other_block = BlockFactory.create_block_with_timestamp([sha256(b"prev").digest()], 13)
+        other_signed_block = BlockFactory.sign_block(other_block, private)
+        with self.assertRaises(AttributeError):
+            signed_block.signature = other_signed_block.signature
+        with self.assertRaises(AttributeError):
+            signed_block.block = other_block
+        self.assertIs(signed_block.pack(), raw)
+        self.assertEqual(signed_block.get_hash(), block.get_hash())
+
+        # setters reset cached bytes, so packed block follows the change
+        signed_block.set_block(other_block)
+        signed_block.set_signature(other_signed_block.signature)
+        self.assertEqual(signed_block.pack(), other_signed_block.pack())
+        self.assertEqual(signed_block.get_hash(), other_block.get_hash())
+        self.assertTrue(signed_block.verify_signature(Private.publickey(private)))
+
+    def test_parse_many_transactions_from_shared_buffer(self):
+        block = BlockFactory.create_block_with_timestamp([sha256(b"prev").digest()], 12)
+        for i in range(200):
+            payment = PaymentTransaction()
+            payment.input = sha256(bytes([i])).digest()
+            payment.number = i
+            payment.outputs = [os.urandom(32), os.urandom(32)]
+            payment.amounts = [i, 1]
+            block.payment_txs.append(payment)
+        raw = block.pack()
+
+        # parsing from view of bigger buffer must not depend on data around block
+        buffer = bytearray(b"header" + raw + b"trailer")
+        restored = Block()
+        restored.parse(memoryview(buffer)[len(b"header"):])
+
+        self.assertEqual(restored.pack(), raw)
+        self.assertEqual(restored.get_hash(), block.get_hash())
+        self.assertEqual(len(restored.payment_txs), 200)
+        self.assertEqual(restored.payment_txs[150].number, 150)
+        self.assertEqual(restored.payment_txs[199].get_hash(), block.payment_txs[199].get_hash())
+
+    def test_lazy_parse_decodes_transactions_on_access(self):
+        private = Private.generate()
+        block = BlockFactory.create_block_with_timestamp([sha256(b"prev").digest()], 12)
+        pktx = PrivateKeyTransaction()
+        pktx.key = Keys.to_bytes(Private.generate())
+        block.system_txs = [pktx]
+        raw = BlockFactory.sign_block(block, private).pack()
+
+        restored = SignedBlock().parse(raw, lazy=True)
+        self.assertEqual(restored.block.prev_hashes, block.prev_hashes)
+        self.assertEqual(restored.get_hash(), block.get_hash())
+        self.assertEqual(restored.pack(), raw)
+        self.assertTrue(restored.verify_signature(Private.publickey(private)))
+        self.assertIsNotNone(restored.block.body_offset)  # nothing above needed transactions
+
+        self.assertEqual(restored.block.system_txs[0].get_hash(), pktx.get_hash())
+        self.assertEqual(restored.block.payment_txs, ())
+        self.assertIsNone(restored.block.body_offset)
+        self.assertTrue(restored.block.frozen)
+        with self.assertRaises(AttributeError):
+            restored.block.payment_txs = []
+
+        # malformed transactions are found only when they are accessed
+        broken = SignedBlock().parse(raw[:-1] + b"\xff", lazy=True)
+        self.assertEqual(broken.block.timestamp, block.timestamp)
+        with self.assertRaises(struct.error):
+            broken.block.payment_txs
+
+    def test_decode_body_rejects_malformed_transactions(self):
+        private = Private.generate()
+        block = BlockFactory.create_block_with_timestamp([sha256(b"prev").digest()], 12)
+        pktx = PrivateKeyTransaction()
+        pktx.key = Keys.to_bytes(Private.generate())
+        block.system_txs = [pktx]
+        signed_block = BlockFactory.sign_block(block, private)
+        raw_block = block.pack()
+
+        restored = SignedBlock().parse(signed_block.pack(), lazy=True)
+        self.assertTrue(restored.block.decode_body())
+        self.assertIsNone(restored.block.body_offset)
+        self.assertEqual(restored.block.system_txs[0].get_hash(), pktx.get_hash())
+
+        # body is checked as a whole: garbage, truncated transaction and trailing bytes are all rejected
+        for broken_raw_block in [raw_block[:-1] + b"\xff", raw_block[:-3] + b"\x00", raw_block + b"\x00"]:
+            broken = Block()
+            broken.parse(broken_raw_block, lazy=True)
+            self.assertFalse(broken.decode_body())
+            self.assertIsNotNone(broken.body_offset)
@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from chain.block_archive import BlockArchive, BlockArchiveWriter, Compression
+from chain.dag import Dag
+from tests.test_helper import TestHelper
+
+
+class TestBlockArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "blocks.pbxa")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def create_dag(self):
+        dag = Dag(0)
+        TestHelper.fill_dag_with_forks(dag, 39, 24)
+        return dag
+
+    def check_archive(self, dag, compression, segment_size):
+        writer = BlockArchiveWriter(self.path, compression, segment_size)
+        writer.append_dag(dag)
+        writer.close()
+
+        archive = BlockArchive(self.path)
+        self.assertEqual(archive.get_block_count(), len(dag.blocks_by_hash) - 1)
+
+        # random access by hash and by index
+        for block_hash, block in dag.blocks_by_hash.items():
+            if block_hash == dag.genesis_hash():
+                self.assertFalse(archive.has_block(block_hash))
+                continue
+            self.assertEqual(archive.get_block_by_hash(block_hash).pack(), block.pack())
+        for index in reversed(range(archive.get_block_count())):
+            block_hash, block_number = archive.get_block_info(index)
+            self.assertEqual(archive.get_block(index).get_hash(), block_hash)
+            self.assertEqual(dag.get_block_number(block_hash), block_number)
+        self.assertFalse(archive.has_block(os.urandom(32)))
+
+        restored_dag = Dag(0)
+        archive.restore(restored_dag)
+        self.assertEqual(set(restored_dag.blocks_by_hash.keys()), set(dag.blocks_by_hash.keys()))
+        self.assertEqual(set(restored_dag.get_top_blocks_hashes()), set(dag.get_top_blocks_hashes()))
+        archive.close()
+
+    def test_random_access(self):
+        dag = self.create_dag()
+        self.check_archive(dag, Compression.NONE, 1024 * 1024)
+        self.check_archive(dag, Compression.NONE, 500)
+        self.check_archive(dag, Compression.ZLIB, 1024 * 1024)
+        self.check_archive(dag, Compression.ZLIB, 500)
+        self.check_archive(dag, Compression.ZLIB, 1)  # single block segments don't compress
+
+    def test_empty_archive(self):
+        BlockArchiveWriter(self.path).close()
+        archive = BlockArchive(self.path)
+        self.assertEqual(archive.get_block_count(), 0)
+        self.assertFalse(archive.has_block(os.urandom(32)))
+        self.assertEqual(list(archive.get_blocks()), [])
+        archive.close()
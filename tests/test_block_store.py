@@ -0,0 +1,165 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from chain.block_store import BlockStore, SyncPolicy, DATA_FILE_TEMPLATE, INDEX_FILE_TEMPLATE
+from chain.dag import Dag
+from tests.test_helper import TestHelper
+from tools.chain_generator import ChainGenerator
+
+
+class TestBlockStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @staticmethod
+    def fill_dag_with_forks(dag):
+        TestHelper.fill_dag_with_forks(dag, 19, 14, merge_number=21)
+
+    def test_restore_dag(self):
+        dag = Dag(0)
+        store = BlockStore(self.directory)
+        store.attach(dag)
+        self.fill_dag_with_forks(dag)
+        store.close()
+
+        restored_dag = Dag(0)
+        restored_store = BlockStore(self.directory)
+        restored_store.attach(restored_dag)
+
+        self.assertEqual(set(restored_dag.blocks_by_hash.keys()), set(dag.blocks_by_hash.keys()))
+        self.assertEqual(restored_dag.get_top_blocks_hashes(), dag.get_top_blocks_hashes())
+        for block_hash in dag.blocks_by_hash:
+            self.assertEqual(restored_dag.get_block_number(block_hash), dag.get_block_number(block_hash))
+            if block_hash == dag.genesis_hash():
+                continue  # genesis is never signed and stored
+            self.assertEqual(restored_dag.blocks_by_hash[block_hash].pack(), dag.blocks_by_hash[block_hash].pack())
+
+        # restored store keeps appending
+        top_hash = restored_dag.get_top_blocks_hashes()[0]
+        new_hash = ChainGenerator.insert_dummy(restored_dag, [top_hash], 22)
+        self.assertTrue(restored_store.has_block(new_hash))
+        restored_store.close()
+
+    def test_random_access(self):
+        dag = Dag(0)
+        store = BlockStore(self.directory, SyncPolicy.EVERY_BLOCK, segment_size=1024)
+        store.attach(dag)
+        self.fill_dag_with_forks(dag)
+
+        self.assertTrue(os.path.exists(os.path.join(self.directory, DATA_FILE_TEMPLATE % 2)))
+
+        for block_hash, signed_block in dag.blocks_by_hash.items():
+            if block_hash == dag.genesis_hash():
+                self.assertFalse(store.has_block(block_hash))
+                continue
+            self.assertEqual(store.get_block_by_hash(block_hash).pack(), signed_block.pack())
+            self.assertEqual(store.get_block_number(block_hash), dag.get_block_number(block_hash))
+
+        stored_hashes = [block.get_hash() for block in store.get_blocks_by_number(4)]
+        expected_hashes = [block.get_hash() for block in dag.blocks_by_number[4]]
+        self.assertEqual(stored_hashes, expected_hashes)
+        self.assertEqual(store.get_blocks_by_number(20), [])
+        store.close()
+
+    def test_recovery_after_interrupted_write(self):
+        dag = Dag(0)
+        store = BlockStore(self.directory)
+        store.attach(dag)
+        self.fill_dag_with_forks(dag)
+        store.close()
+
+        # emulate crash in the middle of writing last record
+        data_path = os.path.join(self.directory, DATA_FILE_TEMPLATE % 0)
+        os.truncate(data_path, os.path.getsize(data_path) - 10)
+
+        restored_dag = Dag(0)
+        restored_store = BlockStore(self.directory)
+        restored_store.attach(restored_dag)
+
+        self.assertEqual(len(restored_dag.blocks_by_hash), len(dag.blocks_by_hash) - 1)
+        last_hash = dag.blocks_by_number[21][0].get_hash()
+        self.assertFalse(restored_store.has_block(last_hash))
+
+        # block can be stored again after it's received
+        restored_dag.add_signed_block(21, dag.blocks_by_hash[last_hash])
+        restored_store.close()
+
+        reopened_store = BlockStore(self.directory)
+        self.assertEqual(reopened_store.get_block_by_hash(last_hash).pack(), dag.blocks_by_hash[last_hash].pack())
+        reopened_store.close()
+
+    def test_drop_corrupted_tail(self):
+        dag = Dag(0)
+        store = BlockStore(self.directory)
+        store.attach(dag)
+        self.fill_dag_with_forks(dag)
+        store.close()
+
+        # emulate garbage written in place of the last record, its length is intact but crc doesn't match
+        data_path = os.path.join(self.directory, DATA_FILE_TEMPLATE % 0)
+        data_size = os.path.getsize(data_path)
+        with open(data_path, "r+b") as data_file:
+            data_file.seek(data_size - 1)
+            last_byte = data_file.read(1)
+            data_file.seek(data_size - 1)
+            data_file.write(bytes([last_byte[0] ^ 0xff]))
+
+        restored_dag = Dag(0)
+        restored_store = BlockStore(self.directory)
+        restored_store.attach(restored_dag)
+
+        last_hash = dag.blocks_by_number[21][0].get_hash()
+        self.assertFalse(restored_store.has_block(last_hash))
+        self.assertNotIn(last_hash, restored_dag.blocks_by_hash)
+        self.assertEqual(len(restored_dag.blocks_by_hash), len(dag.blocks_by_hash) - 1)
+        self.assertLess(os.path.getsize(data_path), data_size)
+        restored_store.close()
+
+    def test_rebuild_missing_segment_index(self):
+        dag = Dag(0)
+        store = BlockStore(self.directory, segment_size=1024)
+        store.attach(dag)
+        self.fill_dag_with_forks(dag)
+        store.close()
+
+        # emulate crash after segment was finished but before its index was written
+        index_path = os.path.join(self.directory, INDEX_FILE_TEMPLATE % 1)
+        os.remove(index_path)
+
+        restored_dag = Dag(0)
+        restored_store = BlockStore(self.directory, segment_size=1024)
+        restored_store.attach(restored_dag)
+        restored_store.close()
+
+        self.assertTrue(os.path.exists(index_path))
+        self.assertEqual(set(restored_dag.blocks_by_hash.keys()), set(dag.blocks_by_hash.keys()))
+
+    def test_finished_segments_are_not_read_on_startup(self):
+        dag = Dag(0)
+        store = BlockStore(self.directory, segment_size=1024)
+        store.attach(dag)
+        self.fill_dag_with_forks(dag)
+        store.close()
+
+        # only index is needed to open store, data of finished segment is read when its block is requested
+        data_path = os.path.join(self.directory, DATA_FILE_TEMPLATE % 0)
+        with open(data_path, "r+b") as data_file:
+            data_file.write(bytes(os.path.getsize(data_path)))
+
+        reopened_store = BlockStore(self.directory, segment_size=1024)
+        self.assertLess(len(reopened_store.active_by_hash), len(dag.blocks_by_hash) // 2)
+        for block_hash in dag.blocks_by_hash:
+            if block_hash != dag.genesis_hash():
+                self.assertEqual(reopened_store.get_block_number(block_hash), dag.get_block_number(block_hash))
+
+        # corrupted record is detected when it's read
+        first_hash = dag.blocks_by_number[1][0].get_hash()
+        with self.assertRaises(AssertionError):
+            reopened_store.get_block_by_hash(first_hash)
+        reopened_store.close()
@@ -38,6 +38,7 @@ class TestConflictBlockProcessing(unittest.TestCase):
 
         network = Network()
         helper = TestHelper(network)
+        self.addCleanup(helper.close_nodes)
         helper.generate_nodes(private_keys, 19)  # create validators
 
         # generate blocks to new epoch
@@ -70,6 +71,7 @@ class TestConflictBlockProcessing(unittest.TestCase):
 
         network = Network()
         helper = TestHelper(network)
+        self.addCleanup(helper.close_nodes)
         helper.generate_nodes(private_keys, 19)  # create validators
 
         # generate blocks to new epoch
@@ -111,6 +113,7 @@ class TestConflictBlockProcessing(unittest.TestCase):
 
         network = Network()
         helper = TestHelper(network)
+        self.addCleanup(helper.close_nodes)
         helper.generate_nodes(private_keys, 19)  # create validators
         # add validators for group
         helper.add_stakeholders(9)  # add stakeholders to network
@@ -0,0 +1,89 @@
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from crypto.cache import CryptoCaches, LruCache, MISSING, default_caches
+from crypto.private import Private
+from crypto.public import Public
+
+
+class TestCryptoCache(unittest.TestCase):
+
+    def test_lru_eviction_and_counters(self):
+        cache = LruCache(2)
+        cache.put("a", 1)
+        cache.put("b", False)
+        self.assertEqual(cache.get("a"), 1)  # makes "b" least recently used
+        self.assertIs(cache.get("b"), False)
+        self.assertIs(cache.get("c"), MISSING)
+        cache.put("c", None)
+        self.assertIs(cache.get("a"), MISSING)
+        self.assertIsNone(cache.get("c"))
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get_stats(), {"size": 2, "max_size": 2, "hits": 3, "misses": 2, "evictions": 1})
+
+    def test_caches_are_scoped(self):
+        private = Private.generate()
+        message = os.urandom(32)
+        signature = Private.sign(message, private)
+        public = Private.publickey(private)
+
+        first_node_caches = CryptoCaches()
+        second_node_caches = CryptoCaches(verify_cache=LruCache(1))
+        with first_node_caches:
+            self.assertTrue(Public.verify(message, signature, public))
+            self.assertTrue(Public.verify(message, signature, public))
+            with second_node_caches:  # node handles message sent by another node
+                self.assertTrue(Public.verify(message, signature, public))
+                other_signature = Private.sign(os.urandom(32), private)  # well formed, but of other message
+                self.assertFalse(Public.verify(message, other_signature, public))
+            self.assertIs(CryptoCaches.get_active(), first_node_caches)
+
+        self.assertEqual(first_node_caches.get_stats()["verify"]["hits"], 1)
+        self.assertEqual(first_node_caches.get_stats()["verify"]["misses"], 1)
+        self.assertEqual(second_node_caches.get_stats()["verify"]["misses"], 2)
+        self.assertEqual(second_node_caches.get_stats()["verify"]["evictions"], 1)
+        self.assertEqual(first_node_caches.get_stats()["pubkey"]["size"], 0)
+
+    def test_public_key_decoded_once(self):
+        private = Private.generate()
+        public = Private.publickey(private)
+        messages = [os.urandom(32) for _ in range(3)]
+
+        caches = CryptoCaches()
+        with caches:
+            for message in messages:
+                self.assertTrue(Public.verify(message, Private.sign(message, private), public))
+            encrypted = Public.encrypt(messages[0], public)
+            self.assertEqual(Private.decrypt(encrypted, private), messages[0])
+            self.assertEqual(Private.decrypt(Private.encrypt(messages[1], private), private), messages[1])
+
+        self.assertEqual(caches.get_stats()["point"]["misses"], 1)
+        self.assertEqual(caches.get_stats()["point"]["hits"], 4)
+
+    def test_malformed_signature_is_invalid(self):
+        private = Private.generate()
+        message = os.urandom(32)
+        signature = Private.sign(message, private)
+        public = Private.publickey(private)
+
+        caches = CryptoCaches()
+        with caches:
+            for bad_signature, key in [(os.urandom(32), public), (signature[:-5], public), (b"", public),
+                                       (signature, os.urandom(len(public))), (signature, b"")]:
+                self.assertFalse(Public.verify(message, bad_signature, key))
+                self.assertIs(caches.verify.get((message, bad_signature, key)), False)
+
+    def test_active_caches_are_per_thread(self):
+        node_caches = CryptoCaches()
+        worker_caches = CryptoCaches()
+
+        def get_active_in_worker():
+            with worker_caches:
+                return CryptoCaches.get_active()
+
+        with node_caches, ThreadPoolExecutor(1) as executor:
+            self.assertIs(executor.submit(CryptoCaches.get_active).result(), default_caches)
+            self.assertIs(executor.submit(get_active_in_worker).result(), worker_caches)
+            self.assertIs(CryptoCaches.get_active(), node_caches)
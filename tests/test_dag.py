@@ -9,6 +9,7 @@ from crypto.private import Private
 from chain.epoch import BLOCK_TIME
 from chain.dag import ChainIter
 from tools.chain_generator import ChainGenerator
+from transaction.gossip_transaction import NegativeGossipTransaction, PositiveGossipTransaction
 
 
 class TestDag(unittest.TestCase):
@@ -33,6 +34,38 @@ class TestDag(unittest.TestCase):
         self.assertEqual(top_hashes[0], block2.get_hash())
         self.assertEqual(top_hashes[1], block3.get_hash())
 
+    def test_next_blocks(self):
+        dag = Dag(0)
+        private = Private.generate()
+        genesis_hash = dag.genesis_block().get_hash()
+        block1 = BlockFactory.create_block_with_timestamp([genesis_hash], BLOCK_TIME)
+        signed_block1 = BlockFactory.sign_block(block1, private)
+        dag.add_signed_block(1, signed_block1)
+
+        block2 = BlockFactory.create_block_with_timestamp([block1.get_hash()], BLOCK_TIME * 2)
+        signed_block2 = BlockFactory.sign_block(block2, private)
+        dag.add_signed_block(2, signed_block2)
+
+        other_block2 = BlockFactory.create_block_with_timestamp([block1.get_hash()], BLOCK_TIME * 2 + 1)
+        other_signed_block2 = BlockFactory.sign_block(other_block2, private)
+        dag.add_signed_block(2, other_signed_block2)
+
+        self.assertEqual(dag.collect_next_blocks(genesis_hash), [block1.get_hash()])
+        self.assertEqual(set(dag.collect_next_blocks(block1.get_hash())), {block2.get_hash(), other_block2.get_hash()})
+        self.assertEqual(dag.collect_next_blocks(block2.get_hash()), [])
+
+        self.assertFalse(dag.is_top(block1.get_hash()))
+        self.assertTrue(dag.is_top(block2.get_hash()))
+        self.assertTrue(dag.is_top(other_block2.get_hash()))
+
+        # merging block shadows both tops
+        block3 = BlockFactory.create_block_with_timestamp([block2.get_hash(), other_block2.get_hash()], BLOCK_TIME * 3)
+        signed_block3 = BlockFactory.sign_block(block3, private)
+        dag.add_signed_block(3, signed_block3)
+
+        self.assertEqual(dag.get_top_blocks_hashes(), [block3.get_hash()])
+        self.assertEqual(dag.collect_next_blocks(other_block2.get_hash()), [block3.get_hash()])
+
     def test_chain_length(self):
         dag = Dag(0)
         private = Private.generate()
@@ -55,6 +88,9 @@ class TestDag(unittest.TestCase):
 
         self.assertEqual(dag.calculate_chain_length(other_block2.get_hash(), dag.genesis_hash()), 3)
         self.assertEqual(dag.calculate_chain_length(block3.get_hash(), dag.genesis_hash()), 4)
+        self.assertEqual(dag.calculate_chain_length(block3.get_hash(), block1.get_hash()), 3)
+        self.assertEqual(dag.calculate_chain_length(other_block2.get_hash(), block1.get_hash()), 2)
+        self.assertEqual(dag.calculate_chain_length(block1.get_hash(), block1.get_hash()), 1)
 
     def test_ancestry(self):
         dag = Dag(0)
@@ -84,6 +120,47 @@ class TestDag(unittest.TestCase):
         self.assertEqual(dag.is_ancestor(other_block3.get_hash(), other_block2.get_hash()), True)
         self.assertEqual(dag.is_ancestor(other_block3.get_hash(), block2.get_hash()), False)
 
+    def test_ancestry_with_many_merges(self):
+        dag = Dag(0)
+        genesis_hash = dag.genesis_block().get_hash()
+        side_hash = ChainGenerator.insert_dummy(dag, [genesis_hash], 1)
+        left_hash = ChainGenerator.insert_dummy(dag, [genesis_hash], 1)
+        right_hash = ChainGenerator.insert_dummy(dag, [genesis_hash], 1)
+        first_merge_hash = None
+        # every block merges both previous ones, so number of paths to genesis doubles each timeslot
+        for i in range(2, 40):
+            new_left_hash = ChainGenerator.insert_dummy(dag, [left_hash, right_hash], i)
+            new_right_hash = ChainGenerator.insert_dummy(dag, [right_hash, left_hash], i)
+            left_hash, right_hash = new_left_hash, new_right_hash
+            if not first_merge_hash:
+                first_merge_hash = left_hash
+
+        self.assertTrue(dag.is_ancestor(left_hash, genesis_hash))
+        self.assertTrue(dag.is_ancestor(left_hash, first_merge_hash))
+        self.assertFalse(dag.is_ancestor(left_hash, side_hash))
+        self.assertFalse(dag.is_ancestor(first_merge_hash, left_hash))
+        self.assertFalse(dag.is_ancestor(left_hash, right_hash))
+
+    def test_ancestry_through_first_parents_and_merges(self):
+        dag = Dag(0)
+        genesis_hash = dag.genesis_block().get_hash()
+        main_top = ChainGenerator.fill_with_dummies_and_skips(dag, genesis_hash, range(1, 300), [7, 150])
+        fork_point = dag.blocks_by_number[100][0].get_hash()
+        fork_top = ChainGenerator.fill_with_dummies(dag, fork_point, range(101, 120))
+        merge_hash = ChainGenerator.insert_dummy(dag, [main_top, fork_top], 300)
+
+        # first parent chain is followed with ancestor jumps
+        for block_number in [1, 6, 8, 100, 151, 299]:
+            block_hash = dag.blocks_by_number[block_number][0].get_hash()
+            self.assertEqual(dag.get_earliest_ancestor_not_below(merge_hash, block_number), block_hash)
+            self.assertTrue(dag.is_ancestor(merge_hash, block_hash))
+        self.assertEqual(dag.get_earliest_ancestor_not_below(merge_hash, 7), dag.blocks_by_number[8][0].get_hash())
+
+        # fork is reached only through second link of merge block
+        self.assertTrue(dag.is_ancestor(merge_hash, fork_top))
+        self.assertFalse(dag.is_ancestor(main_top, fork_top))
+        self.assertFalse(dag.is_ancestor(fork_top, main_top))
+
     def test_iterator(self):
         dag = Dag(0)
         private = Private.generate()
@@ -122,6 +199,31 @@ class TestDag(unittest.TestCase):
         self.assertEqual(chain_iter.next().block.get_hash(), other_block2.get_hash())
         self.assertEqual(chain_iter.next().block.get_hash(), block1.get_hash())
 
+    def test_iterator_seek(self):
+        dag = Dag(0)
+        genesis_hash = dag.genesis_block().get_hash()
+        top_hash = ChainGenerator.fill_with_dummies_and_skips(dag, genesis_hash, range(1, 70), [3, 4, 17, 31, 32, 33, 64])
+
+        linear_chain = list(ChainIter(dag, top_hash))  # index is the block number
+        linear_chain.reverse()
+
+        for block_number in [69, 68, 64, 40, 33, 30, 4, 1, 0]:
+            chain_iter = ChainIter(dag, top_hash)
+            chain_iter.seek(block_number)
+            self.assertEqual(chain_iter.get_next_block_number(), block_number)
+            self.assertEqual(chain_iter.next(), linear_chain[block_number])
+
+        # iterate over reversed range [30, 15] skipping the rest of the chain
+        chain_iter = ChainIter(dag, top_hash)
+        chain_iter.seek(30)
+        blocks = list(chain_iter.iterate_down_to(15))
+        self.assertEqual(blocks, list(reversed(linear_chain[15:31])))
+        self.assertEqual(chain_iter.next(), linear_chain[14])
+
+        # moving forward is not allowed
+        with self.assertRaises(AssertionError):
+            chain_iter.seek(20)
+
     def test_top_blocks_in_range(self):
         dag = Dag(0)
 
@@ -218,6 +320,43 @@ class TestDag(unittest.TestCase):
         # dag.get_tx_by_hash(not_appended_tx.get_hash())
         # AssertionError('Cant find tx by hash', not_appended_tx.get_hash()))
 
+    def test_transaction_indexes(self):
+        dag = Dag(0)
+        private = Private.generate()
+        other_private = Private.generate()
+        pubkey = Private.publickey(private)
+
+        block1 = BlockFactory.create_block_with_timestamp([dag.genesis_block().get_hash()], BLOCK_TIME)
+        negative = TransactionFactory.create_negative_gossip_transaction(1, private)
+        other_negative = TransactionFactory.create_negative_gossip_transaction(2, other_private)
+        block1.system_txs = [negative, other_negative]
+        dag.add_signed_block(1, BlockFactory.sign_block(block1, private))
+
+        positive = TransactionFactory.create_positive_gossip_transaction(block1.get_hash(), private)
+        penalty = TransactionFactory.create_penalty_gossip_transaction([positive.get_hash(), negative.get_hash()],
+                                                                       other_private)
+
+        # same positive gossip included in two competing blocks
+        block2 = BlockFactory.create_block_with_timestamp([block1.get_hash()], BLOCK_TIME * 2)
+        block2.system_txs = [positive, penalty]
+        dag.add_signed_block(2, BlockFactory.sign_block(block2, private))
+        fork_block2 = BlockFactory.create_block_with_timestamp([block1.get_hash()], BLOCK_TIME * 2 + 1)
+        fork_block2.system_txs = [positive]
+        dag.add_signed_block(2, BlockFactory.sign_block(fork_block2, other_private))
+
+        self.assertEqual(len(dag.get_negative_gossips()), 2)
+        self.assertEqual(dag.get_positive_gossips(), [positive])
+        self.assertEqual(dag.get_penalty_gossips(), [penalty])
+        self.assertEqual(dag.get_txs_by_sender(pubkey), [negative, positive])
+        self.assertEqual(dag.get_negative_gossips_by_block_number(2), [other_negative])
+        self.assertEqual(dag.get_negative_gossips_by_block_number(3), [])
+        self.assertEqual(dag.get_positive_gossips_by_block_hash(block1.get_hash()), [positive])
+        self.assertEqual(dag.get_penalties_by_conflict(negative.get_hash()), [penalty])
+        self.assertEqual(set(dag.get_block_hashes_by_tx_hash(positive.get_hash())),
+                         {block2.get_hash(), fork_block2.get_hash()})
+        self.assertEqual(dag.get_tx_by_type_and_hash(PositiveGossipTransaction, positive.get_hash()), positive)
+        self.assertIsNone(dag.get_tx_by_type_and_hash(NegativeGossipTransaction, positive.get_hash()))
+
     def test_top_blocks_in_range_out_of_range(self):
         pass #TODO
 
@@ -288,3 +427,19 @@ class TestDag(unittest.TestCase):
         found_intersection = dag.get_common_ancestor([tops[0], tops[1], tops[2]])
 
         self.assertEqual(expected_intersection, found_intersection)
+
+    def test_common_ancestor_of_deep_forks(self):
+        dag = Dag(0)
+        genesis_hash = dag.genesis_block().get_hash()
+        main_top = ChainGenerator.fill_with_dummies(dag, genesis_hash, range(1, 100))
+        first_fork_point = dag.blocks_by_number[37][0].get_hash()
+        first_fork_top = ChainGenerator.fill_with_dummies_and_skips(dag, first_fork_point, range(38, 100), [40, 41, 77])
+        second_fork_point = dag.blocks_by_number[64][0].get_hash()
+        second_fork_top = ChainGenerator.fill_with_dummies(dag, second_fork_point, range(65, 90))
+
+        self.assertEqual(dag.get_common_ancestor([main_top, first_fork_top]), first_fork_point)
+        self.assertEqual(dag.get_common_ancestor([main_top, second_fork_top]), second_fork_point)
+        self.assertEqual(dag.get_common_ancestor([second_fork_top, first_fork_top, main_top]), first_fork_point)
+        # block is common ancestor of itself and its descendants
+        self.assertEqual(dag.get_common_ancestor([main_top, second_fork_point]), second_fork_point)
+        self.assertEqual(dag.get_common_ancestor([main_top]), main_top)
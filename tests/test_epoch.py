@@ -1,8 +1,9 @@
 import unittest
 import os
+import random
 
 from chain.block import Block
-from chain.dag import Dag
+from chain.dag import Dag, ChainIter
 from chain.epoch import Epoch, RoundIter, BLOCK_TIME
 from chain.params import Round
 from chain.block_factory import BlockFactory
@@ -16,6 +17,8 @@ from crypto.keys import Keys
 from chain.params import ROUND_DURATION
 
 from tools.chain_generator import ChainGenerator
+from tools.message_generator import create_signed_block, create_private_key, create_public_key, \
+    create_split_random, create_commit, create_reveal, create_payment
 
 
 class TestEpoch(unittest.TestCase):
@@ -298,4 +301,88 @@ class TestEpoch(unittest.TestCase):
         first_block_hash = block.get_hash()
 
         first_epoch_hash = epoch.find_epoch_hash_for_block(first_block_hash)
-        self.assertEqual(genesis_hash, first_epoch_hash)
\ No newline at end of file
+        self.assertEqual(genesis_hash, first_epoch_hash)
+
+    def test_find_epoch_hash_for_block_with_skipped_epoch_end(self):
+        dag = Dag(0)
+        epoch = Epoch(dag)
+        genesis_hash = dag.genesis_block().get_hash()
+        epoch_end = Epoch.get_epoch_end_block_number(1)
+        top_hash = ChainGenerator.fill_with_dummies_and_skips(dag, genesis_hash,
+                                                              range(1, epoch_end + 5),
+                                                              [epoch_end - 1, epoch_end])
+
+        expected_epoch_hash = dag.blocks_by_number[epoch_end - 2][0].get_hash()
+        self.assertEqual(epoch.find_epoch_hash_for_block(top_hash), expected_epoch_hash)
+        self.assertEqual(epoch.find_epoch_hash_for_block(expected_epoch_hash), genesis_hash)
+
+    # branching chains with skipped timeslots, empty blocks and blocks with unrelated transactions
+    @staticmethod
+    def fill_with_random_branches(dag, block_count, seed):
+        tx_creators = [create_private_key, create_public_key, create_split_random, create_commit, create_reveal]
+        rand = random.Random(seed)
+        block_hashes = [dag.genesis_hash()]
+        for block_number in range(1, block_count + 1):
+            if rand.random() < 0.25:
+                continue
+            prev_hashes = block_hashes[-4:]
+            for prev_hash in rand.sample(prev_hashes, min(len(prev_hashes), rand.randint(1, 2))):
+                system_txs = [rand.choice(tx_creators)() for _ in range(rand.randint(0, 3))]
+                if rand.random() < 0.2:
+                    system_txs = [create_payment()]
+                signed_block = create_signed_block([prev_hash], block_number, system_txs)
+                dag.add_signed_block(block_number, signed_block)
+                block_hashes.append(signed_block.get_hash())
+        return block_hashes
+
+    def test_round_index_matches_round_iter(self):
+        dag = Dag(0)
+        epoch = Epoch(dag)
+        block_hashes = self.fill_with_random_branches(dag, Epoch.get_duration() * 2 + 2, 7)
+
+        def get_round_txs(block_hash, round_type, tx_type):
+            blocks = RoundIter(dag, block_hash, round_type)
+            return [tx for block in blocks if block for tx in block.block.system_txs if isinstance(tx, tx_type)]
+
+        for block_hash in block_hashes:
+            expected_private_keys = []
+            for block in RoundIter(dag, block_hash, Round.PRIVATE):
+                if block and block.block.system_txs:
+                    keys = [tx.key for tx in block.block.system_txs if isinstance(tx, PrivateKeyTransaction)]
+                    expected_private_keys += keys[:1]
+                else:
+                    expected_private_keys.append(None)
+            expected_public_keys = {}
+            for tx in get_round_txs(block_hash, Round.PUBLIC, PublicKeyTransaction):
+                expected_public_keys[tx.pubkey_index] = tx.generated_pubkey
+            expected_pieces = [tx.pieces for tx in get_round_txs(block_hash, Round.SECRETSHARE, SplitRandomTransaction)]
+            expected_commits = {tx.get_hash(): tx for tx in get_round_txs(block_hash, Round.COMMIT,
+                                                                           CommitRandomTransaction)}
+
+            self.assertEqual(epoch.get_private_keys_for_epoch(block_hash), list(reversed(expected_private_keys)))
+            self.assertEqual(epoch.get_public_keys_for_epoch(block_hash), expected_public_keys)
+            self.assertEqual(epoch.get_random_splits_for_epoch(block_hash), list(reversed(expected_pieces)))
+            self.assertEqual(list(epoch.get_commits_for_epoch(block_hash).values()), list(expected_commits.values()))
+            self.assertEqual(epoch.get_reveals_for_epoch(block_hash),
+                             get_round_txs(block_hash, Round.REVEAL, RevealRandomTransaction))
+
+    def test_epoch_hashes_match_chain_walk(self):
+        dag = Dag(0)
+        epoch = Epoch(dag)
+        block_hashes = self.fill_with_random_branches(dag, Epoch.get_duration() * 3 + 2, 3)
+        late_epoch = Epoch(dag)  # blocks were added before it subscribed to dag
+
+        for block_hash in block_hashes:
+            block_number = dag.get_block_number(block_hash)
+            if epoch.is_last_block_of_epoch(block_number):
+                expected_epoch_hash = block_hash
+            else:
+                # plain first parent chain walk, independent of ancestor jumps
+                previous_epoch_end = Epoch.get_epoch_end_block_number(Epoch.get_epoch_number(block_number) - 1)
+                for block in ChainIter(dag, block_hash):
+                    if block and dag.get_block_number(block.get_hash()) <= previous_epoch_end:
+                        expected_epoch_hash = block.get_hash()
+                        break
+            self.assertEqual(epoch.find_epoch_hash_for_block(block_hash), expected_epoch_hash)
+            self.assertEqual(late_epoch.find_epoch_hash_for_block(block_hash), expected_epoch_hash)
+
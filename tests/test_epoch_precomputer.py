@@ -0,0 +1,144 @@
+import os
+import unittest
+from concurrent.futures import Future, wait
+
+from chain.dag import Dag
+from chain.epoch import Epoch
+from chain.params import Round, ROUND_DURATION
+from crypto.keys import Keys
+from crypto.private import Private
+from crypto.secret import split_secret, encode_splits
+from node.epoch_precomputer import EpochPrecomputer
+from node.permissions import Permissions
+from transaction.secret_sharing_transactions import PublicKeyTransaction, PrivateKeyTransaction, SplitRandomTransaction
+from transaction.commit_transactions import CommitRandomTransaction, RevealRandomTransaction
+from tools.message_generator import create_signed_block
+
+
+class TestEpochPrecomputer(unittest.TestCase):
+
+    # fills first epoch with every kind of round transactions, so its seed can be derived
+    @staticmethod
+    def fill_epoch(dag):
+        private_keys = [Private.generate() for _ in range(ROUND_DURATION)]
+        public_keys = [Private.publickey(private) for private in private_keys]
+        commit_keys = [Private.generate() for _ in range(ROUND_DURATION)]
+        txs_by_round = {Round.PUBLIC: [], Round.COMMIT: [], Round.SECRETSHARE: [], Round.REVEAL: [], Round.PRIVATE: []}
+        for i in range(ROUND_DURATION):
+            pubkey_tx = PublicKeyTransaction()
+            pubkey_tx.generated_pubkey = public_keys[i]
+            pubkey_tx.pubkey_index = i
+            pubkey_tx.signature = os.urandom(64)
+            txs_by_round[Round.PUBLIC].append(pubkey_tx)
+
+            commit = CommitRandomTransaction()
+            commit.rand = Private.encrypt(os.urandom(32), commit_keys[i])
+            commit.pubkey_index = i
+            commit.signature = os.urandom(64)
+            txs_by_round[Round.COMMIT].append(commit)
+
+            split_random_tx = SplitRandomTransaction()
+            split_random_tx.pieces = encode_splits(split_secret(os.urandom(32), 2, ROUND_DURATION), public_keys)
+            split_random_tx.pubkey_index = i
+            split_random_tx.signature = os.urandom(64)
+            txs_by_round[Round.SECRETSHARE].append(split_random_tx)
+
+            reveal = RevealRandomTransaction()
+            reveal.commit_hash = commit.get_hash()
+            reveal.key = Keys.to_bytes(commit_keys[i])
+            txs_by_round[Round.REVEAL].append(reveal)
+
+            private_key_tx = PrivateKeyTransaction()
+            private_key_tx.key = Keys.to_bytes(private_keys[i])
+            txs_by_round[Round.PRIVATE].append(private_key_tx)
+
+        prev_hash = dag.genesis_hash()
+        for block_number in range(1, Epoch.get_epoch_end_block_number(1) + 1):
+            txs = txs_by_round.get(Epoch.get_round_by_block_number(block_number), [])
+            signed_block = create_signed_block([prev_hash], block_number, txs[:1])
+            del txs[:1]
+            dag.add_signed_block(block_number, signed_block)
+            prev_hash = signed_block.get_hash()
+        return prev_hash
+
+    def test_hand_over(self):
+        dag = Dag(0)
+        epoch = Epoch(dag)
+        permissions = Permissions(epoch)
+        precomputer = EpochPrecomputer(epoch, permissions)
+        top_hash = self.fill_epoch(dag)
+        # block before the end of epoch can't be epoch hash, so its precomputation fails
+        incomplete_hash = dag.blocks_by_number[Epoch.get_round_range(1, Round.COMMIT)[0]][0].get_hash()
+
+        precomputer.precompute([top_hash, incomplete_hash])
+        # nothing is visible before hand over
+        self.assertIsNone(epoch.seed_cache.get(top_hash))
+        self.assertNotIn(top_hash, permissions.epoch_validators)
+        self.assertNotIn(top_hash, permissions.signers_indexes)
+        wait(precomputer.pending.values())
+        precomputer.hand_over([top_hash, incomplete_hash])
+        self.assertEqual(precomputer.pending, {})
+        self.assertIsNone(epoch.seed_cache.get(incomplete_hash))
+
+        # the same as calculated on demand by node which didn't precompute anything
+        expected_epoch = Epoch(dag)
+        expected_permissions = Permissions(expected_epoch)
+        self.assertEqual(epoch.seed_cache.get_seed(top_hash), expected_epoch.calculate_epoch_seed(top_hash))
+        self.assertEqual(permissions.signers_indexes[top_hash], expected_permissions.get_signers_indexes(top_hash))
+        self.assertEqual(permissions.randomizers_indexes[top_hash],
+                         expected_permissions.get_randomizers_indexes(top_hash))
+        precomputer.close()
+
+    def test_drop_results_of_tops_which_are_not_epoch_hashes(self):
+        dag = Dag(0)
+        epoch = Epoch(dag)
+        permissions = Permissions(epoch)
+        precomputer = EpochPrecomputer(epoch, permissions)
+        top_hash = self.fill_epoch(dag)
+
+        precomputer.precompute([top_hash])
+        precomputer.hand_over([dag.genesis_hash()])
+        self.assertEqual(precomputer.pending, {})
+        self.assertIsNone(epoch.seed_cache.get(top_hash))
+        self.assertNotIn(top_hash, permissions.epoch_validators)
+        self.assertNotIn(top_hash, permissions.signers_indexes)
+        self.assertNotIn(top_hash, permissions.randomizers_indexes)
+        precomputer.close()
+
+    def test_skip_unfinished_precomputation(self):
+        dag = Dag(0)
+        epoch = Epoch(dag)
+        permissions = Permissions(epoch)
+        precomputer = EpochPrecomputer(epoch, permissions)
+        top_hash = self.fill_epoch(dag)
+
+        # hand over doesn't wait, epoch hash with unfinished precomputation is calculated on demand
+        unfinished = Future()
+        precomputer.pending[top_hash] = unfinished
+        precomputer.hand_over([top_hash])
+        self.assertEqual(precomputer.pending, {})
+        self.assertTrue(unfinished.cancelled())
+        self.assertIsNone(epoch.seed_cache.get(top_hash))
+        self.assertNotIn(top_hash, permissions.signers_indexes)
+        self.assertEqual(epoch.calculate_epoch_seed(top_hash), Epoch(dag).calculate_epoch_seed(top_hash))
+        precomputer.close()
+
+    def test_shared_pool(self):
+        dag = Dag(0)
+        epoch = Epoch(dag)
+        permissions = Permissions(epoch)
+        precomputer = EpochPrecomputer.with_shared_pool(epoch, permissions)
+        other_epoch = Epoch(dag)
+        other_precomputer = EpochPrecomputer.with_shared_pool(other_epoch, Permissions(other_epoch))
+        self.assertIs(precomputer.executor, other_precomputer.executor)
+        top_hash = self.fill_epoch(dag)
+
+        # executor keeps working for other precomputers after one of them is closed
+        precomputer.pending[top_hash] = Future()
+        precomputer.close()
+        self.assertEqual(precomputer.pending, {})
+        other_precomputer.precompute([top_hash])
+        wait(other_precomputer.pending.values())
+        other_precomputer.hand_over([top_hash])
+        self.assertEqual(other_epoch.seed_cache.get_seed(top_hash), epoch.calculate_epoch_seed(top_hash))
+        other_precomputer.close()
@@ -90,8 +90,6 @@ class TestGossip(unittest.TestCase):
         original.conflicts = [gossip_positive_tx.get_hash(), gossip_negative_tx.get_hash()]
         original.signature = Private.sign(original.get_hash(), private)
 
-        original.block_hash = BlockFactory.sign_block(block, private).get_hash()
-
         raw = original.pack()
         restored = PenaltyGossipTransaction()
         restored.parse(raw)
@@ -120,6 +118,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=behavior)
         network.register_node(node0)
+        self.addCleanup(node0.close)
 
         node1 = Node(genesis_creation_time=1,
                      node_id=1,
@@ -128,6 +127,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node1)
+        self.addCleanup(node1.close)
 
         Time.advance_to_next_timeslot()
         node0.step()
@@ -173,6 +173,7 @@ class TestGossip(unittest.TestCase):
 
         network = Network()
         helper = TestHelper(network)
+        self.addCleanup(helper.close_nodes)
         helper.generate_nodes(private_keys, 19)  # create validators
 
         # generate blocks to new epoch
@@ -233,6 +234,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node0)
+        self.addCleanup(node0.close)
 
         behavior = Behaviour()
         behavior.transport_cancel_block_broadcast = True
@@ -243,6 +245,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=behavior)
         network.register_node(node1)
+        self.addCleanup(node1.close)
 
         node2 = Node(genesis_creation_time=1,
                      node_id=2,
@@ -251,6 +254,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node2)
+        self.addCleanup(node2.close)
         # same config from prev. test
 
         Time.advance_to_next_timeslot()  # current block number 1
@@ -321,6 +325,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node0)
+        self.addCleanup(node0.close)
 
         behavior = Behaviour()  # this node malicious skip block
         behavior.malicious_skip_block = True
@@ -331,6 +336,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=behavior)
         network.register_node(node1)
+        self.addCleanup(node1.close)
 
         node2 = Node(genesis_creation_time=1,
                      node_id=2,
@@ -339,6 +345,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node2)
+        self.addCleanup(node2.close)
 
         node3 = Node(genesis_creation_time=1,
                      node_id=3,
@@ -347,6 +354,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node3)
+        self.addCleanup(node3.close)
 
         node4 = Node(genesis_creation_time=1,
                      node_id=4,
@@ -355,6 +363,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node4)
+        self.addCleanup(node4.close)
 
         node5 = Node(genesis_creation_time=1,
                      node_id=5,
@@ -363,8 +372,10 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node5)
+        self.addCleanup(node5.close)
 
         helper = TestHelper(network)
+        self.addCleanup(helper.close_nodes)
 
         Time.advance_to_next_timeslot()  # current block number 1
         node0.step()    # create and sign block
@@ -459,6 +470,7 @@ class TestGossip(unittest.TestCase):
                      behaviour=Behaviour())
 
         network.register_node(node0)
+        self.addCleanup(node0.close)
 
         behavior = Behaviour()  # this node maliciously send negative gossip
         behavior.malicious_send_negative_gossip_count = 1
@@ -469,6 +481,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=behavior)
         network.register_node(node1)
+        self.addCleanup(node1.close)
 
         node2 = Node(genesis_creation_time=1,
                      node_id=2,
@@ -477,6 +490,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node2)
+        self.addCleanup(node2.close)
 
         node3 = Node(genesis_creation_time=1,
                      node_id=3,
@@ -485,6 +499,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node3)
+        self.addCleanup(node3.close)
 
         node4 = Node(genesis_creation_time=1,
                      node_id=4,
@@ -493,6 +508,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node4)
+        self.addCleanup(node4.close)
 
         node5 = Node(genesis_creation_time=1,
                      node_id=5,
@@ -501,8 +517,10 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node5)
+        self.addCleanup(node5.close)
 
         helper = TestHelper(network)
+        self.addCleanup(helper.close_nodes)
 
         Time.advance_to_next_timeslot()  # current block number 1
         node0.step()  # create and sign block
@@ -582,6 +600,7 @@ class TestGossip(unittest.TestCase):
                      behaviour=Behaviour())
 
         network.register_node(node0)
+        self.addCleanup(node0.close)
 
         behavior = Behaviour()  # this node maliciously send positive gossip
         behavior.malicious_send_positive_gossip_count = 1
@@ -592,6 +611,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=behavior)
         network.register_node(node1)
+        self.addCleanup(node1.close)
 
         node2 = Node(genesis_creation_time=1,
                      node_id=2,
@@ -600,6 +620,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node2)
+        self.addCleanup(node2.close)
 
         node3 = Node(genesis_creation_time=1,
                      node_id=3,
@@ -608,6 +629,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node3)
+        self.addCleanup(node3.close)
 
         node4 = Node(genesis_creation_time=1,
                      node_id=4,
@@ -616,6 +638,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node4)
+        self.addCleanup(node4.close)
 
         node5 = Node(genesis_creation_time=1,
                      node_id=5,
@@ -624,8 +647,10 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node5)
+        self.addCleanup(node5.close)
 
         helper = TestHelper(network)
+        self.addCleanup(helper.close_nodes)
 
         Time.advance_to_next_timeslot()  # current block number 1
         node0.step()  # create and sign block
@@ -707,6 +732,7 @@ class TestGossip(unittest.TestCase):
                      behaviour=Behaviour())
 
         network.register_node(node0)
+        self.addCleanup(node0.close)
 
         behavior = Behaviour()  # this node maliciously send positive and negative gossip
         behavior.malicious_send_negative_gossip_count = 1
@@ -718,6 +744,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=behavior)
         network.register_node(node1)
+        self.addCleanup(node1.close)
 
         node2 = Node(genesis_creation_time=1,
                      node_id=2,
@@ -726,6 +753,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node2)
+        self.addCleanup(node2.close)
 
         node3 = Node(genesis_creation_time=1,
                      node_id=3,
@@ -734,6 +762,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node3)
+        self.addCleanup(node3.close)
 
         node4 = Node(genesis_creation_time=1,
                      node_id=4,
@@ -742,6 +771,7 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node4)
+        self.addCleanup(node4.close)
 
         node5 = Node(genesis_creation_time=1,
                      node_id=5,
@@ -750,8 +780,10 @@ class TestGossip(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node5)
+        self.addCleanup(node5.close)
 
         helper = TestHelper(network)
+        self.addCleanup(helper.close_nodes)
 
         Time.advance_to_next_timeslot()  # current block number 1
         node0.step()  # create and sign block
@@ -872,6 +904,7 @@ class TestGossip(unittest.TestCase):
 
         network = Network()
         helper = TestHelper(network)
+        self.addCleanup(helper.close_nodes)
         helper.generate_nodes(private_keys, 19)  # create validators
 
         # generate blocks to new epoch
@@ -6,6 +6,7 @@ from crypto.private import Private
 from node.behaviour import Behaviour
 from node.block_signers import BlockSigner
 from node.node import Node
+from tools.chain_generator import ChainGenerator
 from tools.time import Time
 
 
@@ -14,6 +15,7 @@ class TestHelper:
     def __init__(self, network):
         super().__init__()
         self.network = network
+        self.nodes = []  # nodes generated by helper, network may replace its list when nodes are split into groups
 
     def generate_nodes(self, block_signers, count):
         behaviour = Behaviour()
@@ -26,6 +28,7 @@ class TestHelper:
                         block_signer=block_signers[i],
                         logger=logger)
             self.network.register_node(node)
+            self.nodes.append(node)
 
     def add_stakeholders(self, count):
         behaviour = Behaviour()
@@ -40,6 +43,11 @@ class TestHelper:
                         behaviour=behaviour,
                         logger=logger)
             self.network.register_node(node)
+            self.nodes.append(node)
+
+    def close_nodes(self):
+        for node in self.nodes:
+            node.close()
 
     def perform_block_steps(self, timeslote_count):
         for t in range(0, timeslote_count):  # by timeslots
@@ -53,6 +61,17 @@ class TestHelper:
             for node in self.network.nodes:  # by nodes
                 node.step()
 
+    # fills dag with chain up to main_end and fork from block 3 up to fork_end, both with skipped blocks
+    # if merge_number is given, tops are merged by block with that number
+    @staticmethod
+    def fill_dag_with_forks(dag, main_end, fork_end, merge_number=None):
+        genesis_hash = dag.genesis_block().get_hash()
+        ChainGenerator.fill_with_dummies_and_skips(dag, genesis_hash, range(1, main_end + 1), [5, 6])
+        fork_point = dag.blocks_by_number[3][0].get_hash()
+        ChainGenerator.fill_with_dummies_and_skips(dag, fork_point, range(4, fork_end + 1), [10])
+        if merge_number:
+            ChainGenerator.insert_dummy(dag, dag.get_top_blocks_hashes(), merge_number)
+
     @staticmethod
     def list_validator(test_class, node_list, functions, value):
         """
@@ -60,10 +60,15 @@ class TestNodeAPI(unittest.TestCase):
                      behaviour=Behaviour())
 
         network.register_node(node0)
+        self.addCleanup(node0.close)
         network.register_node(node1)
+        self.addCleanup(node1.close)
         network.register_node(node2)
+        self.addCleanup(node2.close)
         network.register_node(node3)
+        self.addCleanup(node3.close)
         network.register_node(node4)
+        self.addCleanup(node4.close)
 
         self.assertEqual(len(network.nodes) == 5, True)
 
@@ -98,6 +103,7 @@ class TestNodeAPI(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node0)
+        self.addCleanup(node0.close)
 
         # behaviour flag for disabling node to broadcast
         behaviour = Behaviour()
@@ -109,6 +115,7 @@ class TestNodeAPI(unittest.TestCase):
                      validators=validators,
                      behaviour=behaviour)
         network.register_node(node1)
+        self.addCleanup(node1.close)
 
         Time.advance_to_next_timeslot()
         node0.step()  # provide block
@@ -147,6 +154,7 @@ class TestNodeAPI(unittest.TestCase):
                      behaviour=Behaviour())
 
         network.register_node(node0)
+        self.addCleanup(node0.close)
 
         # behaviour flag for disabling node to broadcast
         behaviour = Behaviour()
@@ -158,6 +166,7 @@ class TestNodeAPI(unittest.TestCase):
                      validators=validators,
                      behaviour=behaviour)
         network.register_node(node1)
+        self.addCleanup(node1.close)
 
         Time.advance_to_next_timeslot()
         node0.step()  # provide block
@@ -204,6 +213,7 @@ class TestNodeAPI(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node0)
+        self.addCleanup(node0.close)
 
         node1 = Node(genesis_creation_time=1,
                      node_id=1,
@@ -212,6 +222,7 @@ class TestNodeAPI(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node1)
+        self.addCleanup(node1.close)
 
         behaviour = Behaviour()
         behaviour.transport_node_disable_input = True
@@ -223,6 +234,7 @@ class TestNodeAPI(unittest.TestCase):
                      validators=validators,
                      behaviour=behaviour)
         network.register_node(node2)  # emulate node total offline
+        self.addCleanup(node2.close)
 
         Time.advance_to_next_timeslot()
         node0.step()  # provide block
@@ -280,6 +292,7 @@ class TestNodeAPI(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node0)
+        self.addCleanup(node0.close)
 
         node1 = Node(genesis_creation_time=1,
                      node_id=1,
@@ -288,6 +301,7 @@ class TestNodeAPI(unittest.TestCase):
                      validators=validators,
                      behaviour=Behaviour())
         network.register_node(node1)
+        self.addCleanup(node1.close)
 
         behaviour = Behaviour()
         behaviour.transport_keep_offline = [4, 6]  # keep offline from 4 block till 6 block
@@ -298,6 +312,7 @@ class TestNodeAPI(unittest.TestCase):
                      validators=validators,
                      behaviour=behaviour)
         network.register_node(node2)  # emulate node total offline from 4 block till 6 block
+        self.addCleanup(node2.close)
 
         # ------------------------------- block 1
         Time.advance_to_next_timeslot()
@@ -433,6 +448,7 @@ class TestNodeAPI(unittest.TestCase):
 
         network = Network()
         helper = TestHelper(network)
+        self.addCleanup(helper.close_nodes)
 
         helper.generate_nodes(private_keys, 19)  # create validators
         helper.add_stakeholders(9)  # add stakeholders to network
@@ -481,6 +497,7 @@ class TestNodeAPI(unittest.TestCase):
 
         network = Network()
         helper = TestHelper(network)
+        self.addCleanup(helper.close_nodes)
 
         helper.generate_nodes(private_keys, 19)  # create validators
         helper.add_stakeholders(9)  # add stakeholders to network
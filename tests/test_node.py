@@ -1,3 +1,6 @@
+import os
+import shutil
+import tempfile
 import unittest
 
 from node.node import Node
@@ -5,6 +8,7 @@ from node.network import Network
 from node.block_signers import BlockSigners
 from node.validators import Validators
 from chain.epoch import Epoch
+from chain.seed_cache import SeedRecord
 from tools.chain_generator import ChainGenerator
 from tools.time import Time
 from node.behaviour import Behaviour
@@ -46,6 +50,7 @@ class TestNode(unittest.TestCase):
                     block_signer=private_keys[node_id],
                     validators=validators)
         network.register_node(node)
+        self.addCleanup(node.close)
 
         dag = node.dag
 
@@ -75,6 +80,7 @@ class TestNode(unittest.TestCase):
                      block_signer=private_keys[0],
                      validators=validators)
         network.register_node(node0)
+        self.addCleanup(node0.close)
 
         node1 = Node(genesis_creation_time=1,
                      node_id=1,
@@ -82,6 +88,7 @@ class TestNode(unittest.TestCase):
                      block_signer=private_keys[1],
                      validators=validators)
         network.register_node(node1)
+        self.addCleanup(node1.close)
 
         Time.advance_to_next_timeslot()
         node0.step()
@@ -119,6 +126,7 @@ class TestNode(unittest.TestCase):
                      block_signer=private_keys[0],
                      validators=validators)
         network.register_node(node0)
+        self.addCleanup(node0.close)
                     
         allowed_signers = node0.get_allowed_signers_for_block_number(3)
         self.assertEqual(allowed_signers[0], validators_pubkeys[2]) #simple case
@@ -144,6 +152,63 @@ class TestNode(unittest.TestCase):
         self.assertIn(validators_pubkeys[1], allowed_signers)
         self.assertIn(validators_pubkeys[5], allowed_signers)
 
+    def test_prune_across_epoch_boundary(self):
+        Time.use_test_time()
+        Time.set_current_time(1)
+
+        network = Network()
+        node = Node(genesis_creation_time=1,
+                    node_id=0,
+                    network=network,
+                    block_signer=BlockSigners().block_signers[0])
+        network.register_node(node)
+        self.addCleanup(node.close)
+        dag = node.dag
+
+        epoch_start = Epoch.get_epoch_start_block_number(5)
+        top_hash = ChainGenerator.fill_with_dummies(dag, dag.genesis_hash(), range(1, epoch_start))
+        pruned_hashes = [block.get_hash() for block_number in range(1, Epoch.get_epoch_end_block_number(2))
+                         for block in dag.blocks_by_number[block_number]]
+        # dummy blocks carry no round transactions, so seeds of epochs are put into cache up front
+        for epoch_number in range(1, 5):
+            epoch_hash = dag.blocks_by_number[Epoch.get_epoch_end_block_number(epoch_number)][0].get_hash()
+            node.epoch.seed_cache.put(SeedRecord(epoch_hash, epoch_number))
+
+        # first step of new epoch accepts epoch hashes and prunes epochs which are not kept anymore
+        Time.set_current_time(1 + BLOCK_TIME * epoch_start)
+        node.step()
+
+        checkpoint_hash = dag.blocks_by_number[Epoch.get_epoch_end_block_number(2)][0].get_hash()
+        self.assertEqual(dag.checkpoint_hash, checkpoint_hash)
+        self.assertIs(node.pruner.confirmation_requirement, node.confirmation_requirement)
+        for block_hash in pruned_hashes:
+            self.assertNotIn(block_hash, dag.blocks_by_hash)
+            self.assertNotIn(block_hash, node.confirmation_requirement.blocks)
+
+        # permissions of kept epochs still resolve without pruned blocks
+        epoch_hash = node.epoch.find_epoch_hash_for_block(top_hash)
+        self.assertEqual(epoch_hash, top_hash)
+        self.assertTrue(node.permissions.get_validators(epoch_hash))
+        self.assertIsNotNone(node.permissions.get_sign_permission(epoch_hash, 0))
+        epoch_block_number = Epoch.convert_to_epoch_block_number(epoch_start + 1)
+        self.assertEqual(node.get_allowed_signers_for_block_number(epoch_start + 1),
+                         [node.permissions.get_sign_permission(epoch_hash, epoch_block_number).public_key])
+
+    def test_seed_cache_in_data_directory(self):
+        directory = tempfile.mkdtemp()
+        try:
+            data_dir = os.path.join(directory, "node_0")
+            node = Node(genesis_creation_time=1, node_id=0, network=Network(), data_dir=data_dir)
+            self.assertIs(node.epoch.seed_cache, node.seed_cache)
+            node.epoch.calculate_epoch_seed(node.dag.genesis_hash())
+            node.close()
+
+            restarted_node = Node(genesis_creation_time=1, node_id=0, network=Network(), data_dir=data_dir)
+            self.assertEqual(restarted_node.seed_cache.get_seed(node.dag.genesis_hash()), 0)
+            restarted_node.close()
+        finally:
+            shutil.rmtree(directory)
+
     def test_maliciously_delay_block_broadcast(self):
         Time.use_test_time()
         Time.set_current_time(1)
@@ -184,6 +249,7 @@ class TestNode(unittest.TestCase):
         ]
         for node in nodes:
             network.register_node(node)
+            self.addCleanup(node.close)
 
         Time.advance_to_next_timeslot()
         for node in nodes: node.step()
@@ -1,3 +1,4 @@
+import os
 import unittest
 
 from tools.time import Time
@@ -13,6 +14,8 @@ from crypto.keys import Keys
 from node.permissions import Permissions
 from node.validators import Validators
 from tools.chain_generator import ChainGenerator
+from verification.acceptor import AcceptionException
+from verification.in_block_transactions_acceptor import InBlockTransactionsAcceptor
 
 
 class TestStakeActions(unittest.TestCase):
@@ -146,6 +149,7 @@ class TestStakeActions(unittest.TestCase):
         tx_release.signature = Private.sign(tx_hold.get_hash(), new_node_private)
 
         # append signed stake release transaction
+        block = BlockFactory.create_block_with_timestamp([prev_hash], BLOCK_TIME * 19)
         block.system_txs.append(tx_release)
 
         # sign block by one of validators
@@ -186,6 +190,7 @@ class TestStakeActions(unittest.TestCase):
         tx_release.signature = Private.sign(tx_release.get_hash(), node_private)
 
         # append signed stake release transaction
+        block = BlockFactory.create_block_with_timestamp([prev_hash], BLOCK_TIME * 19)
         block.system_txs.append(tx_release)
 
         # sign block by one of validators
@@ -199,6 +204,26 @@ class TestStakeActions(unittest.TestCase):
             pub_keys.append(validator.public_key)
         self.assertNotIn(genesis_validator.public_key, pub_keys)
 
+    def test_reject_penalty_gossip_with_unknown_gossips(self):
+        dag = Dag(0)
+        epoch = Epoch(dag)
+        permissions = Permissions(epoch)
+        validators = Validators.read_genesis_validators_from_file()
+
+        penalty_gossip_tx = PenaltyGossipTransaction()
+        penalty_gossip_tx.timestamp = Time.get_current_time()
+        penalty_gossip_tx.conflicts = [os.urandom(32), os.urandom(32)]  # gossips which never got into dag
+        penalty_gossip_tx.signature = Private.sign(penalty_gossip_tx.get_hash(), Private.generate())
+        block = BlockFactory.create_block_with_timestamp([dag.genesis_hash()], BLOCK_TIME)
+        block.system_txs = [penalty_gossip_tx]
+
+        verifier = InBlockTransactionsAcceptor(epoch, permissions, None, block)
+        with self.assertRaises(AcceptionException):
+            verifier.validate(penalty_gossip_tx)
+        # such penalty never gets into dag, since validators would depend on which gossips node knows
+        with self.assertRaises(AssertionError):
+            permissions.apply_stake_actions(list(validators), [penalty_gossip_tx])
+
     def test_remove_from_validators_by_penalty_gossip(self):
         # base initialization
         dag = Dag(0)
@@ -252,6 +277,13 @@ class TestStakeActions(unittest.TestCase):
         # set genesis validator for sign penalty gossip
         penalty_gossip_tx.signature = Private.sign(penalty_gossip_tx.get_hash(), genesis_validator_private)
         block.system_txs.append(penalty_gossip_tx)
+        # gossips are found in first parent chain of block
+        InBlockTransactionsAcceptor(epoch, permissions, None, block).validate(penalty_gossip_tx)
+        # but not in other chains, even if they are in dag
+        side_block = BlockFactory.create_block_with_timestamp([dag.blocks_by_number[8][0].get_hash()], BLOCK_TIME * 11)
+        side_block.system_txs = [penalty_gossip_tx]
+        with self.assertRaises(AcceptionException):
+            InBlockTransactionsAcceptor(epoch, permissions, None, side_block).validate(penalty_gossip_tx)
 
         signed_block = BlockFactory.sign_block(block, genesis_validator_private)
         dag.add_signed_block(11, signed_block)
@@ -0,0 +1,252 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from chain.block_store import BlockStore, CHECKPOINT_FILE
+from chain.confirmation_requirement import ConfirmationRequirement
+from chain.conflict_watcher import ConflictWatcher
+from chain.dag import Dag, ChainIter
+from chain.epoch import Epoch
+from chain.immutability import Immutability
+from chain.pruner import Pruner
+from crypto.private import Private
+from chain.seed_cache import SeedRecord
+from node.checkpoint_state import CheckpointState
+from node.permissions import Permissions
+from node.validators import Validator, Validators
+from tools.chain_generator import ChainGenerator
+
+
+class TestPruner(unittest.TestCase):
+
+    def setUp(self):
+        self.dag = Dag(0)
+        self.epoch = Epoch(self.dag)
+        self.conflict_watcher = ConflictWatcher(self.dag)
+        self.pruner = Pruner(self.epoch, Immutability(self.dag), ConfirmationRequirement(self.dag))
+
+    def register_blocks_in_conflict_watcher(self):
+        public_key = Private.publickey(Private.generate())
+        for block_hash, block_number in self.dag.block_numbers_by_hash.items():
+            if block_number != 0:
+                epoch_number = Epoch.get_epoch_number(block_number)
+                self.conflict_watcher.on_new_block_by_validator(block_hash, epoch_number, public_key)
+
+    def test_prune_finalized_blocks(self):
+        genesis_hash = self.dag.genesis_hash()
+        ChainGenerator.fill_with_dummies_and_skips(self.dag, genesis_hash, range(1, 100), [10, 50])
+        self.register_blocks_in_conflict_watcher()
+        pruned_block = self.dag.blocks_by_number[20][0]
+
+        # nothing is old enough yet
+        self.assertFalse(self.pruner.try_to_prune(Epoch.get_epoch_start_block_number(3)))
+        self.assertEqual(self.dag.checkpoint_hash, genesis_hash)
+
+        self.assertTrue(self.pruner.try_to_prune(Epoch.get_epoch_start_block_number(5)))
+        checkpoint_hash = self.dag.blocks_by_number[Epoch.get_epoch_end_block_number(2)][0].get_hash()
+        self.assertEqual(self.dag.checkpoint_hash, checkpoint_hash)
+        self.assertEqual(min(self.dag.blocks_by_number.keys()), Epoch.get_epoch_end_block_number(2))
+        self.assertNotIn(genesis_hash, self.dag.blocks_by_hash)
+        self.assertNotIn(pruned_block.get_hash(), self.dag.heights)
+        self.assertNotIn(pruned_block.get_hash(), self.conflict_watcher.blocks)
+        self.assertNotIn(pruned_block.get_hash(), self.pruner.confirmation_requirement.blocks)
+        self.assertEqual(len(self.conflict_watcher.blocks), len(self.dag.blocks_by_hash))
+
+        # pruning is attempted once per epoch
+        self.assertFalse(self.pruner.try_to_prune(Epoch.get_epoch_start_block_number(5) + 1))
+
+        # checkpoint becomes the new end of every chain
+        top_hash = self.dag.get_top_hashes()[0]
+        chain = [block for block in ChainIter(self.dag, top_hash) if block]
+        self.assertEqual(chain[-1].get_hash(), checkpoint_hash)
+        self.assertTrue(self.dag.is_ancestor(top_hash, checkpoint_hash))
+
+        # dag keeps working after pruning
+        fork_point = self.dag.blocks_by_number[60][0].get_hash()
+        fork_top = ChainGenerator.fill_with_dummies(self.dag, fork_point, range(61, 70))
+        new_top = ChainGenerator.insert_dummy(self.dag, [top_hash, fork_top], 100)
+        self.assertEqual(self.dag.get_common_ancestor([top_hash, fork_top]), fork_point)
+        self.assertEqual(self.dag.calculate_chain_length(new_top, checkpoint_hash), 100 - 38 - 1 + 1)
+        self.assertEqual(self.epoch.find_epoch_hash_for_block(new_top),
+                         self.dag.blocks_by_number[Epoch.get_epoch_end_block_number(5)][0].get_hash())
+
+    def test_checkpoint_stays_below_crossing_links(self):
+        genesis_hash = self.dag.genesis_hash()
+        main_top = ChainGenerator.fill_with_dummies(self.dag, genesis_hash, range(1, 46))
+        fork_point = self.dag.blocks_by_number[30][0].get_hash()
+        fork_top = ChainGenerator.fill_with_dummies(self.dag, fork_point, range(31, 46))
+        merge_hash = ChainGenerator.insert_dummy(self.dag, [main_top, fork_top], 46)
+        ChainGenerator.fill_with_dummies(self.dag, merge_hash, range(47, 100))
+
+        self.assertTrue(self.pruner.try_to_prune(Epoch.get_epoch_start_block_number(5)))
+        self.assertEqual(self.dag.checkpoint_hash, fork_point)
+        self.assertTrue(self.dag.is_ancestor(merge_hash, fork_top))
+        self.assertEqual(len(self.dag.blocks_by_number[35]), 2)
+
+    def test_spill_pruned_blocks(self):
+        directory = tempfile.mkdtemp()
+        store = BlockStore(directory)
+        store.attach_for_spilling(self.dag)
+
+        genesis_hash = self.dag.genesis_hash()
+        ChainGenerator.fill_with_dummies(self.dag, genesis_hash, range(1, 100))
+        blocks_before_pruning = dict(self.dag.blocks_by_hash)
+        self.assertTrue(self.pruner.try_to_prune(Epoch.get_epoch_start_block_number(5)))
+
+        for block_hash, signed_block in blocks_before_pruning.items():
+            if block_hash in self.dag.blocks_by_hash or block_hash == genesis_hash:
+                self.assertFalse(store.has_block(block_hash))
+            else:
+                self.assertEqual(store.get_block_by_hash(block_hash).pack(), signed_block.pack())
+
+        store.close()
+        shutil.rmtree(directory)
+
+    def test_restore_from_checkpoint(self):
+        directory = tempfile.mkdtemp()
+        store = BlockStore(directory)
+        store.attach(self.dag)
+
+        genesis_hash = self.dag.genesis_hash()
+        main_top = ChainGenerator.fill_with_dummies_and_skips(self.dag, genesis_hash, range(1, 100), [10, 50])
+        fork_point = self.dag.blocks_by_number[60][0].get_hash()
+        ChainGenerator.fill_with_dummies(self.dag, fork_point, range(61, 70))
+        pruned_block = self.dag.blocks_by_number[20][0]
+        self.assertTrue(self.pruner.try_to_prune(Epoch.get_epoch_start_block_number(5)))
+        store.close()
+
+        restored_dag = Dag(0)
+        restored_epoch = Epoch(restored_dag)
+        restored_pruner = Pruner(restored_epoch, Immutability(restored_dag), ConfirmationRequirement(restored_dag))
+        restored_store = BlockStore(directory)
+        restored_store.attach(restored_dag)
+
+        # only blocks kept in memory are restored, pruned ones are read from disk
+        self.assertEqual(restored_dag.checkpoint_hash, self.dag.checkpoint_hash)
+        self.assertEqual(set(restored_dag.blocks_by_hash.keys()), set(self.dag.blocks_by_hash.keys()))
+        self.assertEqual(restored_dag.heights, self.dag.heights)
+        self.assertEqual(set(restored_dag.get_top_hashes()), set(self.dag.get_top_hashes()))
+        self.assertEqual(restored_store.get_block_by_hash(pruned_block.get_hash()).pack(), pruned_block.pack())
+        self.assertEqual(restored_epoch.find_epoch_hash_for_block(main_top),
+                         self.epoch.find_epoch_hash_for_block(main_top))
+
+        # restored dag keeps working and pruning
+        new_top = ChainGenerator.fill_with_dummies(restored_dag, main_top, range(100, 140))
+        self.assertTrue(restored_pruner.try_to_prune(Epoch.get_epoch_start_block_number(7)))
+        self.assertTrue(restored_dag.is_ancestor(new_top, restored_dag.checkpoint_hash))
+        restored_store.close()
+        shutil.rmtree(directory)
+
+    def test_ignore_corrupted_checkpoint(self):
+        directory = tempfile.mkdtemp()
+        store = BlockStore(directory)
+        store.attach(self.dag)
+
+        genesis_hash = self.dag.genesis_hash()
+        ChainGenerator.fill_with_dummies(self.dag, genesis_hash, range(1, 100))
+        stored_hashes = set(self.dag.blocks_by_hash.keys())
+        self.assertTrue(self.pruner.try_to_prune(Epoch.get_epoch_start_block_number(5)))
+        store.close()
+
+        # emulate checkpoint damaged on disk, its crc doesn't match anymore
+        checkpoint_path = os.path.join(directory, CHECKPOINT_FILE)
+        with open(checkpoint_path, "r+b") as checkpoint_file:
+            checkpoint_file.seek(10)
+            checkpoint_file.write(b"\xff")
+
+        # dag is restored from the beginning of history instead of corrupted checkpoint
+        restored_dag = Dag(0)
+        restored_store = BlockStore(directory)
+        restored_store.attach(restored_dag)
+        self.assertEqual(restored_dag.checkpoint_hash, genesis_hash)
+        self.assertEqual(set(restored_dag.blocks_by_hash.keys()), stored_hashes)
+        restored_store.close()
+        shutil.rmtree(directory)
+
+    def test_permissions_after_restored_checkpoint(self):
+        directory = tempfile.mkdtemp()
+        store = BlockStore(directory)
+        store.attach(self.dag)
+        permissions = Permissions(self.epoch)
+
+        top_hash = ChainGenerator.fill_with_dummies(self.dag, self.dag.genesis_hash(), range(1, 100))
+        self.pruner.permissions = permissions
+        self.pruner.block_store = store
+        self.assertTrue(self.pruner.try_to_prune(Epoch.get_epoch_start_block_number(5)))
+        store.close()
+
+        restored_dag = Dag(0)
+        restored_epoch = Epoch(restored_dag)
+        restored_pruner = Pruner(restored_epoch, Immutability(restored_dag), ConfirmationRequirement(restored_dag))
+        restored_store = BlockStore(directory)
+        restored_store.attach(restored_dag)
+        raw_state = restored_store.load_checkpoint_state(restored_dag.checkpoint_hash)
+        restored_permissions = Permissions(restored_epoch, CheckpointState().parse(raw_state).restore(restored_epoch))
+        restored_pruner.permissions = restored_permissions
+        restored_pruner.block_store = restored_store
+
+        # genesis is pruned, checkpoint is the root which epochs start from
+        self.assertEqual(restored_dag.get_root_hash(), self.dag.checkpoint_hash)
+        self.assertNotIn(restored_dag.genesis_hash(), restored_dag.blocks_by_hash)
+
+        # validators of the next block are derived down to the root instead of pruned genesis
+        epoch_hash = self.epoch.find_epoch_hash_for_block(top_hash)
+        restored_epoch_hash = restored_epoch.find_epoch_hash_for_block(top_hash)
+        self.assertEqual(restored_epoch_hash, epoch_hash)
+        self.assertEqual([validator.public_key for validator in restored_permissions.get_validators(epoch_hash)],
+                         [validator.public_key for validator in permissions.get_validators(epoch_hash)])
+
+        # pruning restored dag again moves root forward and keeps validators derivable
+        new_top = ChainGenerator.fill_with_dummies(restored_dag, top_hash, range(100, 140))
+        self.assertTrue(restored_pruner.try_to_prune(Epoch.get_epoch_start_block_number(7)))
+        new_epoch_hash = restored_epoch.find_epoch_hash_for_block(new_top)
+        self.assertIn(restored_dag.get_root_hash(), restored_permissions.epoch_validators)
+        self.assertEqual(len(restored_permissions.get_validators(new_epoch_hash)),
+                         len(permissions.get_validators(epoch_hash)))
+        restored_store.close()
+        shutil.rmtree(directory)
+
+    def test_restore_root_state_with_checkpoint(self):
+        directory = tempfile.mkdtemp()
+        store = BlockStore(directory)
+        store.attach(self.dag)
+        # stakes and order of root differ from genesis file, so they can't be derived again after restart
+        validators = Validators()
+        validators.validators = [Validator(Private.publickey(Private.generate()), 100 + i) for i in range(5)]
+        permissions = Permissions(self.epoch, validators)
+
+        top_hash = ChainGenerator.fill_with_dummies(self.dag, self.dag.genesis_hash(), range(1, 100))
+        self.pruner.permissions = permissions
+        self.pruner.block_store = store
+        checkpoint_hash = self.pruner.find_checkpoint(Epoch.get_epoch_number(Epoch.get_epoch_start_block_number(5)))
+        self.epoch.seed_cache.put(SeedRecord(checkpoint_hash, 12345))
+        self.assertTrue(self.pruner.try_to_prune(Epoch.get_epoch_start_block_number(5)))
+        store.close()
+
+        restored_dag = Dag(0)
+        restored_epoch = Epoch(restored_dag)
+        restored_store = BlockStore(directory)
+        restored_store.attach(restored_dag)
+
+        # restored root isn't genesis, so permissions can't be created without its state
+        with self.assertRaises(AssertionError):
+            Permissions(restored_epoch)
+        with self.assertRaises(AssertionError):
+            restored_epoch.calculate_epoch_seed(restored_dag.get_root_hash())
+        self.assertIsNone(restored_store.load_checkpoint_state(self.dag.genesis_hash()))
+
+        raw_state = restored_store.load_checkpoint_state(restored_dag.checkpoint_hash)
+        restored_permissions = Permissions(restored_epoch, CheckpointState().parse(raw_state).restore(restored_epoch))
+        root_hash = restored_dag.get_root_hash()
+        self.assertEqual(restored_epoch.calculate_epoch_seed(root_hash), 12345)
+        self.assertEqual([(validator.public_key, validator.stake) for validator in restored_permissions.get_validators(root_hash)],
+                         [(validator.public_key, validator.stake) for validator in permissions.get_validators(root_hash)])
+        self.assertEqual(restored_permissions.signers_indexes[root_hash], permissions.signers_indexes[root_hash])
+        self.assertEqual(restored_permissions.randomizers_indexes[root_hash], permissions.randomizers_indexes[root_hash])
+
+        epoch_hash = self.epoch.find_epoch_hash_for_block(top_hash)
+        self.assertEqual([validator.stake for validator in restored_permissions.get_validators(epoch_hash)],
+                         [validator.stake for validator in permissions.get_validators(epoch_hash)])
+        restored_store.close()
+        shutil.rmtree(directory)
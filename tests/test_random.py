@@ -1,7 +1,10 @@
 import unittest
 import os
+import random
+from concurrent.futures import ThreadPoolExecutor
 
 from crypto.sum_random import *
+from crypto.entropy import Entropy, EntropyVersion, CounterStream, Source
 
 
 class Randomness(unittest.TestCase):
@@ -21,3 +24,40 @@ class Randomness(unittest.TestCase):
         # print("validatori indexes distribution")
         # print(index_counts)
         # self.assertEqual(era_hash, res_era_hash)
+
+    def test_legacy_entropy_matches_global_random(self):
+        seed = int.from_bytes(os.urandom(32), byteorder='big')
+        random.seed(seed)
+        for _ in range(Source.RANDOMIZERS):
+            random.getrandbits(32)
+        expected_entropy = random.getrandbits(32)
+        entropy = Entropy.get_nth_derivative(seed, Source.RANDOMIZERS, EntropyVersion.MERSENNE_TWISTER)
+        self.assertEqual(entropy, expected_entropy)
+
+        random.seed(entropy)
+        expected_indexes = list(range(19))
+        for i in reversed(range(1, 19)):
+            j = random.randrange(i)
+            expected_indexes[j], expected_indexes[i] = expected_indexes[i], expected_indexes[j]
+        indexes = calculate_validators_indexes(entropy, 19, EntropyVersion.MERSENNE_TWISTER)
+        self.assertEqual(indexes, expected_indexes)
+
+    def test_counter_entropy(self):
+        seed = int.from_bytes(os.urandom(32), byteorder='big')
+        stream = CounterStream(seed)
+        # nth output doesn't depend on outputs before it
+        self.assertEqual(Entropy.get_nth_derivative(seed, 1000, EntropyVersion.COUNTER), stream.get_output(1000))
+        self.assertNotEqual(stream.get_output(0), stream.get_output(1))
+
+        indexes = calculate_validators_indexes(seed, 19, EntropyVersion.COUNTER)
+        self.assertEqual(sorted(indexes), list(range(19)))
+        self.assertTrue(all(index != position for position, index in enumerate(indexes)))  # sattolo cycle
+        self.assertEqual(indexes, calculate_validators_indexes(seed, 19, EntropyVersion.COUNTER))
+
+    def test_parallel_shuffles(self):
+        seeds = [int.from_bytes(os.urandom(32), byteorder='big') for _ in range(16)]
+        for version in [EntropyVersion.MERSENNE_TWISTER, EntropyVersion.COUNTER]:
+            expected = [calculate_validators_indexes(seed, 100, version) for seed in seeds]
+            with ThreadPoolExecutor(4) as executor:
+                results = list(executor.map(lambda seed: calculate_validators_indexes(seed, 100, version), seeds * 4))
+            self.assertEqual(results, expected * 4)
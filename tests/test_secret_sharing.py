@@ -1,6 +1,8 @@
 import unittest
 import os
-from crypto.secret import split_secret, recover_splits, encode_splits, decode_random
+from itertools import combinations
+from crypto.secret import split_secret, recover_splits, encode_splits, decode_random, decode_randoms
+from crypto.shamir import recover_int, recover_ints, STANDARD_PRIMES
 from crypto.private import Private
 from crypto.keys import Keys
 
@@ -64,4 +66,28 @@ class TestSecretSharing(unittest.TestCase):
 
         self.assertEqual(random_value, decoded_random)
 
+    def test_recover_from_any_shares(self):
+        prime = 2 ** 256 + 297
+        self.assertIn(prime, STANDARD_PRIMES)
+        secret = int.from_bytes(os.urandom(32), byteorder="big")
+        coefficients = [secret, 12345, prime - 1]
+        points = [(x, sum(c * x ** i for i, c in enumerate(coefficients)) % prime) for x in range(1, 6)]
+        # y values may happen to be small enough for smaller prime, same as in secretsharing package
+        points_list = [list(subset) for subset in combinations(points, 3)
+                       if max(y for _, y in subset) > STANDARD_PRIMES[STANDARD_PRIMES.index(prime) - 1]]
+        for subset in points_list:
+            self.assertEqual(recover_int(subset), secret)
+        self.assertEqual(recover_ints(points_list), [secret] * len(points_list))
+
+    def test_decode_randoms(self):
+        private_keys = [Private.generate() for _ in range(5)]
+        public_keys = [Private.publickey(private) for private in private_keys]
+
+        randoms = [os.urandom(32) for _ in range(4)]
+        encoded_splits_list = [encode_splits(split_secret(random, 3, 5), public_keys) for random in randoms]
+        encoded_splits_list[1][0] = os.urandom(len(encoded_splits_list[1][0]))  # different set of shares
+        decoded_randoms = decode_randoms(encoded_splits_list, private_keys)
+
+        self.assertEqual(decoded_randoms, [int.from_bytes(random, byteorder="big") for random in randoms])
+        self.assertEqual(decoded_randoms[1], decode_random(encoded_splits_list[1], private_keys))
 
@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from chain.block import Block
+from chain.dag import Dag
+from chain.epoch import Epoch
+from chain.seed_cache import SeedCache, SeedRecord, MIN_DROPPED_TO_COMPACT
+
+
+class TestSeedCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "seeds.dat")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def create_record(self):
+        return SeedRecord(os.urandom(32), 2 ** 256 + 5, [os.urandom(32), None, os.urandom(32)], [0, 1, 2 ** 255], [7])
+
+    def test_pack_parse(self):
+        record = self.create_record()
+        parsed = SeedRecord()
+        self.assertEqual(parsed.parse(record.pack()), len(record.pack()))
+        for field in SeedRecord.__slots__:
+            self.assertEqual(getattr(parsed, field), getattr(record, field))
+
+    def test_persistence(self):
+        records = [self.create_record() for _ in range(3)]
+        cache = SeedCache(self.path)
+        for record in records:
+            cache.put(record)
+        cache.put(SeedRecord(records[0].epoch_hash, 1))  # seed of epoch hash never changes
+        cache.close()
+
+        with open(self.path, "ab") as seed_file:
+            seed_file.write(b"\x40\x00")  # partially written record
+
+        restored_cache = SeedCache(self.path)
+        for record in records:
+            self.assertEqual(restored_cache.get(record.epoch_hash).pack(), record.pack())
+        restored_cache.put(self.create_record())
+        restored_cache.close()
+        self.assertEqual(len(SeedCache(self.path).records), 4)
+
+    def test_epoch_uses_cached_seed(self):
+        dag = Dag(0)
+        seed_cache = SeedCache()
+        epoch = Epoch(dag, seed_cache)
+        genesis_hash = dag.genesis_hash()
+        self.assertEqual(epoch.calculate_epoch_seed(genesis_hash), 0)
+        self.assertEqual(seed_cache.get_seed(genesis_hash), 0)
+
+        record = self.create_record()
+        seed_cache.put(record)
+        # seed is taken from cache, nothing is looked up in dag
+        self.assertEqual(epoch.calculate_epoch_seed(record.epoch_hash), record.seed)
+
+    def test_drop_pruned_records(self):
+        dag = Dag(0)
+        genesis = dag.blocks_by_hash[dag.genesis_hash()]
+        cache = SeedCache(self.path)
+        kept_record = self.create_record()
+        cache.put(SeedRecord(dag.genesis_hash(), 0))
+        cache.put(kept_record)
+
+        cache.on_blocks_pruned({0: [genesis]})
+        self.assertIsNone(cache.get(dag.genesis_hash()))
+        cache.put(self.create_record())  # file is still appendable after rewrite
+        cache.close()
+
+        restored_cache = SeedCache(self.path)
+        self.assertIsNone(restored_cache.get(dag.genesis_hash()))
+        self.assertEqual(restored_cache.get(kept_record.epoch_hash).pack(), kept_record.pack())
+        self.assertEqual(len(restored_cache.records), 2)
+        restored_cache.close()
+
+    def create_blocks(self, count):
+        blocks = []
+        for timestamp in range(count):
+            block = Block()
+            block.timestamp = timestamp
+            block.prev_hashes = [os.urandom(32)]
+            blocks.append(block)
+        return blocks
+
+    def test_compact_only_past_threshold(self):
+        blocks = self.create_blocks(MIN_DROPPED_TO_COMPACT + 1)
+        cache = SeedCache(self.path)
+        for block in blocks:
+            cache.put(SeedRecord(block.get_hash(), block.timestamp))
+
+        # dropped records are only marked in file
+        size = os.path.getsize(self.path)
+        cache.on_blocks_pruned({0: blocks[:10]})
+        self.assertGreater(os.path.getsize(self.path), size)
+        self.assertEqual(cache.dropped_count, 20)
+        cache.close()
+
+        # marks are applied on load and counted towards compaction
+        cache = SeedCache(self.path)
+        self.assertEqual(len(cache.records), len(blocks) - 10)
+        self.assertIsNone(cache.get(blocks[0].get_hash()))
+        self.assertEqual(cache.dropped_count, 20)
+        for block in blocks[10:]:  # records still in use are read before prune
+            cache.get(block.get_hash())
+
+        cache.on_blocks_pruned({1: blocks[10:MIN_DROPPED_TO_COMPACT // 2]})
+        self.assertEqual(cache.dropped_count, 0)
+        cache.close()
+
+        restored_cache = SeedCache(self.path)
+        self.assertEqual(restored_cache.dropped_count, 0)
+        self.assertEqual(len(restored_cache.records), len(blocks) - MIN_DROPPED_TO_COMPACT // 2)
+        self.assertEqual(restored_cache.get_seed(blocks[-1].get_hash()), blocks[-1].timestamp)
+        restored_cache.close()
+
+    def test_drop_records_of_other_runs(self):
+        # every run starts from fresh dag, so epoch hashes of previous runs never come again
+        for _ in range(3):
+            cache = SeedCache(self.path)
+            self.assertLessEqual(len(cache.records), 2)
+            blocks = self.create_blocks(3)
+            for block in blocks:
+                cache.put(SeedRecord(block.get_hash(), block.timestamp))
+            cache.on_blocks_pruned({0: blocks[:1]})
+            self.assertEqual(len(cache.records), 2)
+            cache.close()
+
+        # loaded record which is used before prune is kept
+        cache = SeedCache(self.path)
+        used_hash = blocks[2].get_hash()
+        self.assertEqual(cache.get_seed(used_hash), 2)
+        cache.on_blocks_pruned({})
+        self.assertEqual(list(cache.records), [used_hash])
+        cache.close()
+        restored_cache = SeedCache(self.path)
+        self.assertEqual(list(restored_cache.records), [used_hash])
+        restored_cache.close()
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import unittest
+
+from crypto.private import Private
+from crypto.cache import CryptoCaches, MISSING
+from crypto.signature_verifier import SignatureVerifier
+from crypto.public import Public
+from transaction.signed_by import SignedBy
+from transaction.stake_transaction import StakeHoldTransaction
+from transaction.transaction_parser import TX_CLASSES_BY_TYPE
+from verification.in_block_transactions_acceptor import InBlockTransactionsAcceptor
+
+
+class TestSignatureVerifier(unittest.TestCase):
+
+    def create_triples(self, count):
+        triples = []
+        for i in range(count):
+            private = Private.generate()
+            message = os.urandom(32)
+            signature = Private.sign(message, private)
+            if i % 3 == 0:
+                private = Private.generate()  # signature is valid only for other key
+            triples.append((message, signature, Private.publickey(private)))
+        return triples
+
+    def check_verifier(self, verifier):
+        triples = self.create_triples(20)
+        expected = [i % 3 != 0 for i in range(20)]
+        self.assertEqual(verifier.verify_all(triples), expected)
+        for triple, result in zip(triples, expected):
+            self.assertEqual(CryptoCaches.get_active().verify.get(triple), result)
+
+        # results are returned asynchronously and only after flush
+        message, signature, pubkey = self.create_triples(2)[1]
+        future = verifier.submit(message, signature, pubkey)
+        verifier.flush()
+        self.assertTrue(future.result(timeout=10))
+
+        # first matching key is found among candidates
+        private = Private.generate()
+        message = os.urandom(32)
+        signature = Private.sign(message, private)
+        candidates = [Private.publickey(Private.generate()), Private.publickey(private),
+                      Private.publickey(Private.generate())]
+        self.assertEqual(verifier.find_signer(message, signature, candidates), candidates[1])
+        self.assertIsNone(verifier.find_signer(message, signature, [candidates[0], candidates[2]]))
+        verifier.close()
+
+    def test_inline_verification(self):
+        verifier = SignatureVerifier(batch_size=4)
+        self.check_verifier(verifier)
+
+        # signer is looked up inline and stops at first match, so candidates after it are never verified
+        private = Private.generate()
+        message = os.urandom(32)
+        signature = Private.sign(message, private)
+        candidates = [Private.publickey(private), Private.publickey(Private.generate())]
+        self.assertEqual(verifier.find_signer(message, signature, candidates), candidates[0])
+        self.assertIs(CryptoCaches.get_active().verify.get((message, signature, candidates[1])), MISSING)
+
+    def test_verification_in_process_pool(self):
+        verifier = SignatureVerifier(process_count=2, batch_size=4)
+        self.check_verifier(verifier)
+
+    def test_awaiting_process_pool(self):
+        verifier = SignatureVerifier(process_count=2, batch_size=4)
+        triples = self.create_triples(10)
+        expected = [i % 3 != 0 for i in range(10)]
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertEqual(loop.run_until_complete(verifier.verify_all_async(triples)), expected)
+
+            # queued verifications are sent to workers and awaited, results are in cache afterwards
+            triples = self.create_triples(6)
+            futures = verifier.submit_all(triples)
+            self.assertEqual(len(verifier.pending), 2)
+            loop.run_until_complete(verifier.wait_pending())
+            self.assertFalse(verifier.pending)
+            self.assertTrue(all(future.done() for future in futures))
+            for i, triple in enumerate(triples):
+                self.assertEqual(CryptoCaches.get_active().verify.get(triple), i % 3 != 0)
+
+            # nothing to wait for
+            loop.run_until_complete(verifier.wait_pending())
+        finally:
+            loop.close()
+            verifier.close()
+
+    def test_shared_pool(self):
+        verifier = SignatureVerifier.with_shared_pool(process_count=2, batch_size=4)
+        other_verifier = SignatureVerifier.with_shared_pool(process_count=2, batch_size=4)
+        self.assertIsNotNone(verifier.executor)
+        self.assertIs(verifier.executor, other_verifier.executor)
+        self.assertIsNot(verifier.pending, other_verifier.pending)
+
+        # pool keeps working for other verifiers after one of them is closed
+        verifier.close()
+        self.check_verifier(other_verifier)
+        self.assertIsNone(SignatureVerifier.with_shared_pool(process_count=0).executor)
+
+    def test_signature_checks_declared_by_transaction(self):
+        # sender signs with key from pubkey field, randomizer is looked up by pubkey_index
+        for tx_class in TX_CLASSES_BY_TYPE.values():
+            if tx_class.SIGNED_BY == SignedBy.SENDER:
+                self.assertIn("pubkey", tx_class.__slots__, tx_class.__name__)
+            elif tx_class.SIGNED_BY == SignedBy.RANDOMIZER:
+                self.assertIn("pubkey_index", tx_class.__slots__, tx_class.__name__)
+            else:
+                self.assertEqual(tx_class.SIGNED_BY, SignedBy.NOBODY, tx_class.__name__)
+
+        private = Private.generate()
+        tx = StakeHoldTransaction()
+        tx.amount = 1000
+        tx.pubkey = Private.publickey(private)
+        tx.signature = Private.sign(tx.get_hash(), private)
+        checks = InBlockTransactionsAcceptor(None, None, None).get_signature_checks(tx)
+        self.assertEqual(len(checks), 1)
+        self.assertTrue(Public.verify(*checks[0]))
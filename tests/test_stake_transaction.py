@@ -22,7 +22,6 @@ class TestTransaction(unittest.TestCase):
 
     def test_pack_parse_penalty_transaction(self):
         original = PenaltyTransaction()
-        original.violator_pubkey = Private.publickey(Private.generate())
         original.conflicts = [os.urandom(32), os.urandom(32), os.urandom(32)]
         original.signature = Private.sign(original.get_hash(), Private.generate())
 
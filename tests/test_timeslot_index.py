@@ -0,0 +1,56 @@
+import unittest
+
+from chain.dag import Dag
+from chain.timeslot_index import TimeslotIndex
+from tools.chain_generator import ChainGenerator
+
+
+class TestTimeslotIndex(unittest.TestCase):
+
+    def test_range_queries(self):
+        index = TimeslotIndex()
+        index.add_block(0, b'genesis', [])
+        index.add_block(1, b'a1', [b'genesis'])
+        index.add_block(1, b'b1', [b'genesis'])
+        index.add_block(2, b'a2', [b'a1'])
+        index.add_block(12, b'a12', [b'a2', b'b1'])
+
+        self.assertEqual(index.get_hashes_in_range(0, 3), [b'genesis', b'a1', b'b1', b'a2'])
+        self.assertEqual(index.get_hashes_in_range(3, 12), [])
+        self.assertEqual(index.get_hashes_in_range(2, 100), [b'a2', b'a12'])
+        self.assertEqual(index.get_tips_in_range(0, 3), [b'b1', b'a2'])
+        self.assertEqual(index.get_tips_in_range(1, 13), [b'a12'])
+        self.assertEqual(index.get_empty_slots_in_range(0, 15), [3, 4, 5, 6, 7, 8, 9, 10, 11, 13, 14])
+        self.assertTrue(index.is_occupied(12))
+        self.assertFalse(index.is_occupied(11))
+        self.assertFalse(index.is_occupied(100))
+
+        index.remove_slots_before(10)
+        self.assertEqual(index.first_slot, 8)
+        self.assertEqual(index.get_hashes_in_range(0, 20), [b'a12'])
+        self.assertEqual(index.get_empty_slots_in_range(9, 13), [9, 10, 11])
+        self.assertNotIn(b'a2', index.earliest_child_numbers)
+
+    def test_matches_dag_contents(self):
+        dag = Dag(0)
+        genesis_hash = dag.genesis_hash()
+        ChainGenerator.fill_with_dummies_and_skips(dag, genesis_hash, range(1, 40), [4, 9, 10, 11, 25])
+        fork_point = dag.blocks_by_number[8][0].get_hash()
+        fork_top = ChainGenerator.fill_with_dummies_and_skips(dag, fork_point, range(9, 30), [12, 20])
+        ChainGenerator.insert_dummy(dag, dag.get_top_hashes(), 41)
+
+        for start in range(0, 42, 5):
+            for end in range(start, 45, 7):
+                expected_hashes = []
+                expected_empty_slots = []
+                for block_number in range(start, end):
+                    blocks = dag.blocks_by_number.get(block_number, [])
+                    expected_hashes += [block.get_hash() for block in blocks]
+                    if not blocks:
+                        expected_empty_slots.append(block_number)
+                self.assertEqual(dag.timeslots.get_hashes_in_range(start, end), expected_hashes)
+                self.assertEqual(dag.timeslots.get_empty_slots_in_range(start, end), expected_empty_slots)
+
+        main_hash = dag.blocks_by_number[29][0].get_hash()
+        self.assertEqual(dag.get_branches_for_timeslot_range(9, 30), [main_hash, fork_top])
+        self.assertEqual(dag.get_branches_for_timeslot_range(9, 42), [dag.blocks_by_number[41][0].get_hash()])
@@ -1,12 +1,16 @@
 import unittest
+import struct
 import os
 from transaction.secret_sharing_transactions import SplitRandomTransaction
 from transaction.commit_transactions import CommitRandomTransaction, RevealRandomTransaction
-from transaction.transaction_parser import TransactionParser
+from transaction.transaction_parser import TransactionParser, TX_CLASSES_BY_TYPE
+from transaction.gossip_transaction import NegativeGossipTransaction
 from transaction.payment_transaction import PaymentTransaction
+from serialization.serializer import Serializer, Deserializer
 from hashlib import sha256
 from crypto.private import Private
 from crypto.keys import Keys
+from tools.message_generator import TX_CREATORS
 
 
 class TestTransaction(unittest.TestCase):
@@ -73,3 +77,70 @@ class TestTransaction(unittest.TestCase):
 
 
 
+
+    def test_pack_many_transactions_into_growing_buffer(self):
+        serializer = Serializer(1)
+        payments = []
+        for i in range(50):
+            payment = PaymentTransaction()
+            payment.input = sha256(bytes([i])).digest()
+            payment.number = i
+            payment.outputs = [os.urandom(32)]
+            payment.amounts = [i]
+            payments.append(payment)
+            TransactionParser.pack_into(serializer, payment)
+
+        raw = serializer.get_bytes()
+        self.assertEqual(raw, b"".join(TransactionParser.pack(payment) for payment in payments))
+        deserializer = Deserializer(raw)
+        for payment in payments:
+            self.assertEqual(TransactionParser.parse_from(deserializer).get_hash(), payment.get_hash())
+        self.assertEqual(deserializer.get_len(), len(raw))
+
+    def test_pack_parse_all_types(self):
+        created_classes = set()
+        for create_tx in TX_CREATORS:
+            original = create_tx()
+            created_classes.add(original.__class__)
+
+            raw = TransactionParser.pack(original)
+            restored = TransactionParser.parse(raw)
+            self.assertIs(restored.__class__, original.__class__)
+            for field_name in original.CODEC.get_field_names():
+                self.assertEqual(getattr(restored, field_name), getattr(original, field_name))
+            self.assertEqual(TransactionParser.pack(restored), raw)
+            self.assertEqual(restored.get_hash(), original.get_hash())
+
+            # transaction embedded into bigger buffer is parsed from shared deserializer
+            deserializer = Deserializer(b"prefix" + raw + raw, len(b"prefix"))
+            self.assertEqual(TransactionParser.parse_from(deserializer).pack(), original.pack())
+            self.assertEqual(TransactionParser.parse_from(deserializer).pack(), original.pack())
+            self.assertEqual(deserializer.get_len(), 2 * len(raw))
+
+        self.assertEqual(created_classes, set(TX_CLASSES_BY_TYPE.values()))
+
+    def test_schema_keeps_wire_format(self):
+        gossip = NegativeGossipTransaction()
+        gossip.signature = os.urandom(64)
+        gossip.pubkey = os.urandom(40)
+        gossip.timestamp = 1234
+        gossip.number_of_block = 56
+
+        fields = gossip.pubkey + Serializer.write_timestamp(1234) + Serializer.write_u32(56)
+        self.assertEqual(gossip.pack(), Serializer.write_signature(gossip.signature) + fields)
+        self.assertEqual(gossip.get_hash(), sha256(fields).digest())
+
+        payment = PaymentTransaction()
+        payment.input = os.urandom(32)
+        payment.number = 0
+        payment.outputs = [os.urandom(32), os.urandom(32)]
+        payment.amounts = [1]
+        with self.assertRaises(AssertionError):
+            payment.pack()
+
+        # signature is packed as pascal string, which would be cut to 255 bytes silently
+        gossip.signature = os.urandom(256)
+        with self.assertRaises(struct.error):
+            gossip.pack()
+        with self.assertRaises(struct.error):
+            gossip.pack_into(Serializer())
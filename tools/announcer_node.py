@@ -16,6 +16,9 @@ class AnnouncerNode:
         self.last_announced_round = None
         self.terminated = False
 
+    def close(self):
+        pass
+
     def step(self):
         current_block_number = self.epoch.get_current_timeframe_block_number()
         if self.epoch.is_new_epoch_upcoming(current_block_number):
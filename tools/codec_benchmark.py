@@ -0,0 +1,120 @@
+import os
+import sys
+import pickle
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import timeit
+
+from transaction.transaction_parser import TransactionParser
+
+# Measures transaction pack and parse throughput in messages per second for every transaction type
+# usage: python -m tools.codec_benchmark [message count] [baseline git revision]
+# if baseline revision is given, the same messages are measured with codec of that revision too
+# baseline is measured in separate process started from its source tree extracted by git archive,
+# only TransactionParser pack/parse are used there, so any revision with the same wire format can be compared
+
+DEFAULT_MESSAGE_COUNT = 100000
+DISTINCT_MESSAGE_COUNT = 100  # a few distinct messages are reused, so creating them doesn't dominate measurement
+ROUND_COUNT = 3  # baseline and this tree are measured in turns this many times
+
+
+def measure(function, args):
+    seconds = min(timeit.repeat(lambda: [function(arg) for arg in args], number=1, repeat=5))
+    return len(args) / seconds
+
+
+# returns list of (transaction class name, pack msg/s, parse msg/s) measured with TransactionParser importable here
+def measure_raws(raws_by_type):
+    results = []
+    for raws in raws_by_type:
+        txs = [TransactionParser.parse(raw) for raw in raws]
+        results.append((txs[0].__class__.__name__,
+                        measure(TransactionParser.pack, txs),
+                        measure(TransactionParser.parse, raws)))
+    return results
+
+
+def create_raws(message_count):
+    from tools.message_generator import TX_CREATORS
+
+    raws_by_type = []
+    for create_tx in TX_CREATORS:
+        raws = [TransactionParser.pack(create_tx()) for _ in range(DISTINCT_MESSAGE_COUNT)]
+        raws_by_type.append(raws * (message_count // DISTINCT_MESSAGE_COUNT))
+    return raws_by_type
+
+
+# runs this module against source tree of given revision and returns its measure_raws results for every round
+# baseline and this tree are measured in turns, so changing load of machine affects both of them the same way
+def measure_rounds(revision, raws_by_type):
+    directory = tempfile.mkdtemp()
+    try:
+        archive_path = os.path.join(directory, "baseline.tar")
+        subprocess.run(["git", "archive", "--format=tar", "-o", archive_path, revision], check=True)
+        tree_path = os.path.join(directory, "tree")
+        with tarfile.open(archive_path) as archive:
+            archive.extractall(tree_path)
+        shutil.copy(__file__, os.path.join(tree_path, "tools", "codec_benchmark.py"))
+
+        raws_path = os.path.join(directory, "raws")
+        with open(raws_path, "wb") as raws_file:
+            pickle.dump(raws_by_type, raws_file)
+        rounds = []
+        for _ in range(ROUND_COUNT):
+            output = subprocess.run([sys.executable, "-m", "tools.codec_benchmark", "--measure", raws_path],
+                                    cwd=tree_path, check=True, stdout=subprocess.PIPE).stdout
+            rounds.append((measure_raws(raws_by_type), pickle.loads(output)))
+        return rounds
+    finally:
+        shutil.rmtree(directory)
+
+
+# the best speed of every transaction type across rounds
+def get_best(rounds):
+    return [(results[0][0], max(pack_speed for _, pack_speed, _ in results),
+             max(parse_speed for _, _, parse_speed in results))
+            for results in zip(*rounds)]
+
+
+def get_total(results, message_count):
+    total_count = message_count * len(results)
+    total_pack_time = sum(message_count / pack_speed for _, pack_speed, _ in results)
+    total_parse_time = sum(message_count / parse_speed for _, _, parse_speed in results)
+    return total_count / total_pack_time, total_count / total_parse_time
+
+
+def report(message_count, baseline_revision=None):
+    raws_by_type = create_raws(message_count)
+    message_count = len(raws_by_type[0])
+    if not baseline_revision:
+        results = measure_raws(raws_by_type)
+        results.append(("All types",) + get_total(results, message_count))
+        print("%-28s %14s %14s" % ("Transaction", "pack msg/s", "parse msg/s"))
+        for name, pack_speed, parse_speed in results:
+            print("%-28s %14.0f %14.0f" % (name, pack_speed, parse_speed))
+        return
+
+    rounds = measure_rounds(baseline_revision, raws_by_type)
+    results = get_best([results for results, _ in rounds])
+    results.append(("All types",) + get_total(results, message_count))
+    baseline_results = get_best([baseline_results for _, baseline_results in rounds])
+    baseline_results.append(("All types",) + get_total(baseline_results, message_count))
+    print("%-28s %14s %14s %8s %14s %14s %8s" % ("Transaction", "base pack/s", "pack msg/s", "speedup",
+                                                 "base parse/s", "parse msg/s", "speedup"))
+    for (name, pack_speed, parse_speed), (_, base_pack_speed, base_parse_speed) in zip(results, baseline_results):
+        print("%-28s %14.0f %14.0f %7.2fx %14.0f %14.0f %7.2fx" % (name,
+                                                                  base_pack_speed, pack_speed,
+                                                                  pack_speed / base_pack_speed,
+                                                                  base_parse_speed, parse_speed,
+                                                                  parse_speed / base_parse_speed))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--measure":  # started by measure_baseline inside baseline tree
+        with open(sys.argv[2], "rb") as raws_file:
+            sys.stdout.buffer.write(pickle.dumps(measure_raws(pickle.load(raws_file))))
+    else:
+        report(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MESSAGE_COUNT,
+               sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,70 @@
+import sys
+import gc
+import tracemalloc
+
+from chain.dag import Dag
+from tools.message_generator import create_signed_block, create_payment, TX_CREATORS
+
+# Measures how much memory blocks and transactions take when kept in DAG
+# so validator hosts can be sized from measured numbers
+# usage: python -m tools.memory_benchmark [block count] (1M blocks by default)
+# blocks and transactions are created by message generator, signatures and keys are random bytes of real sizes,
+# so no crypto is involved
+
+DEFAULT_BLOCK_COUNT = 1000000
+TX_SAMPLE_COUNT = 100000
+
+
+# returns amount of bytes allocated while calling function and still held by its result
+def measure(function, *args):
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function(*args)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    return after - before, result
+
+
+def fill_dag(dag, block_count, create_txs=lambda: ()):
+    prev_hash = dag.genesis_hash()
+    for block_number in range(1, block_count + 1):
+        signed_block = create_signed_block([prev_hash], block_number, payment_txs=create_txs())
+        dag.add_signed_block(block_number, signed_block)
+        prev_hash = signed_block.get_hash()
+    return dag
+
+
+def report_blocks(block_count):
+    empty_blocks_size, dag = measure(fill_dag, Dag(0), block_count)
+    print("Blocks in DAG: %d" % block_count)
+    print("  bytes per empty block (including DAG indexes): %.1f" % (empty_blocks_size / block_count))
+    print("  total: %.1f MB" % (empty_blocks_size / 1024 / 1024))
+    del dag
+
+    payment_blocks_size, dag = measure(fill_dag, Dag(0), block_count, lambda: [create_payment()])
+    payment_size = (payment_blocks_size - empty_blocks_size) / block_count
+    print("  bytes per payment transaction stored in block (including DAG indexes): %.1f" % payment_size)
+    del dag
+
+
+def report_transactions(sample_count):
+    print("Transaction objects (%d of each type):" % sample_count)
+    for create_tx in TX_CREATORS:
+        # list itself is measured separately, so only transactions are counted
+        txs = [None] * sample_count
+        size, _ = measure(fill_list, txs, create_tx)
+        name = create_tx().__class__.__name__
+        print("  %s: %.1f bytes per tx" % (name, size / sample_count))
+
+
+def fill_list(txs, create_tx):
+    for i in range(len(txs)):
+        txs[i] = create_tx()
+
+
+if __name__ == "__main__":
+    block_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BLOCK_COUNT
+    tracemalloc.start()
+    report_blocks(block_count)
+    report_transactions(min(block_count, TX_SAMPLE_COUNT))
+    tracemalloc.stop()
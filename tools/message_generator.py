@@ -0,0 +1,140 @@
+import os
+
+from chain.block_factory import BlockFactory
+from chain.params import BLOCK_TIME
+from chain.signed_block import SignedBlock
+from transaction.commit_transactions import CommitRandomTransaction, RevealRandomTransaction
+from transaction.gossip_transaction import NegativeGossipTransaction, PositiveGossipTransaction, \
+    PenaltyGossipTransaction
+from transaction.payment_transaction import PaymentTransaction
+from transaction.secret_sharing_transactions import PublicKeyTransaction, PrivateKeyTransaction, \
+    SplitRandomTransaction
+from transaction.stake_transaction import StakeHoldTransaction, StakeReleaseTransaction, PenaltyTransaction
+
+# Creates transactions and blocks of every kind for tests and benchmarks
+# they are filled with random bytes of real sizes instead of real keys and signatures,
+# so they can be created in bulk without any crypto
+SIGNATURE_SIZE = 64  # compact secp256r1 signature
+PUBKEY_SIZE = 40
+PRIVATE_KEY_SIZE = 32
+
+
+def create_signed_block(prev_hashes, block_number, system_txs=(), payment_txs=()):
+    block = BlockFactory.create_block_with_timestamp(prev_hashes, BLOCK_TIME * block_number)
+    block.system_txs = list(system_txs)
+    block.payment_txs = list(payment_txs)
+    block.freeze()
+    signed_block = SignedBlock()
+    signed_block.set_block(block)
+    signed_block.set_signature(os.urandom(SIGNATURE_SIZE))
+    return signed_block
+
+
+def create_payment():
+    tx = PaymentTransaction()
+    tx.input = os.urandom(32)
+    tx.number = 0
+    tx.outputs = [os.urandom(32), os.urandom(32)]
+    tx.amounts = [10, 5]
+    return tx
+
+
+def create_negative_gossip():
+    tx = NegativeGossipTransaction()
+    tx.pubkey = os.urandom(PUBKEY_SIZE)
+    tx.timestamp = 1000
+    tx.number_of_block = 10
+    tx.signature = os.urandom(SIGNATURE_SIZE)
+    return tx
+
+
+def create_positive_gossip():
+    tx = PositiveGossipTransaction()
+    tx.pubkey = os.urandom(PUBKEY_SIZE)
+    tx.timestamp = 1000
+    tx.block_hash = os.urandom(32)
+    tx.signature = os.urandom(SIGNATURE_SIZE)
+    return tx
+
+
+def create_penalty_gossip():
+    tx = PenaltyGossipTransaction()
+    tx.conflicts = [os.urandom(32), os.urandom(32)]
+    tx.timestamp = 1000
+    tx.signature = os.urandom(SIGNATURE_SIZE)
+    return tx
+
+
+def create_public_key():
+    tx = PublicKeyTransaction()
+    tx.generated_pubkey = os.urandom(PUBKEY_SIZE)
+    tx.pubkey_index = 0
+    tx.signature = os.urandom(SIGNATURE_SIZE)
+    return tx
+
+
+def create_private_key():
+    tx = PrivateKeyTransaction()
+    tx.key = os.urandom(PRIVATE_KEY_SIZE)
+    return tx
+
+
+def create_split_random():
+    tx = SplitRandomTransaction()
+    tx.pubkey_index = 0
+    tx.pieces = [os.urandom(128) for _ in range(3)]
+    tx.signature = os.urandom(SIGNATURE_SIZE)
+    return tx
+
+
+def create_commit():
+    tx = CommitRandomTransaction()
+    tx.rand = os.urandom(128)
+    tx.pubkey_index = 0
+    tx.signature = os.urandom(SIGNATURE_SIZE)
+    return tx
+
+
+def create_reveal():
+    tx = RevealRandomTransaction()
+    tx.commit_hash = os.urandom(32)
+    tx.key = os.urandom(PRIVATE_KEY_SIZE)
+    return tx
+
+
+def create_stake_hold():
+    tx = StakeHoldTransaction()
+    tx.amount = 1000
+    tx.pubkey = os.urandom(PUBKEY_SIZE)
+    tx.signature = os.urandom(SIGNATURE_SIZE)
+    return tx
+
+
+def create_stake_release():
+    tx = StakeReleaseTransaction()
+    tx.pubkey = os.urandom(PUBKEY_SIZE)
+    tx.signature = os.urandom(SIGNATURE_SIZE)
+    return tx
+
+
+def create_penalty():
+    tx = PenaltyTransaction()
+    tx.conflicts = [os.urandom(32), os.urandom(32)]
+    tx.signature = os.urandom(SIGNATURE_SIZE)
+    return tx
+
+
+TX_CREATORS = [
+    create_payment,
+    create_negative_gossip,
+    create_positive_gossip,
+    create_penalty_gossip,
+    create_public_key,
+    create_private_key,
+    create_split_random,
+    create_commit,
+    create_reveal,
+    create_stake_hold,
+    create_stake_release,
+    create_penalty
+]
@@ -1,5 +1,5 @@
-from hashlib import sha256
-from serialization.serializer import Serializer, Deserializer
+from serialization.schema import schema, SIGNATURE, PUBKEY, TIMESTAMP, U8, U32, HASH, List
+from transaction.signed_by import SignedBy
 
 """
 Gossip message used for on/off chain data transfer.
@@ -32,7 +32,15 @@ send positive gossip+ rule
 
 
 # negative gossip base class
+@schema([("signature", SIGNATURE),
+         ("pubkey", PUBKEY),
+         ("timestamp", TIMESTAMP),
+         ("number_of_block", U32)],
+        hashed=["pubkey", "timestamp", "number_of_block"])
 class NegativeGossipTransaction:
+    __slots__ = ("signature", "pubkey", "timestamp", "number_of_block")
+    SIGNED_BY = SignedBy.SENDER
+
     def __init__(self):
         # node signature
         self.signature = None
@@ -42,35 +50,18 @@ class NegativeGossipTransaction:
         self.timestamp = None
         # expected block number
         self.number_of_block = None
-        # tx length
-        self.len = None
-
-    def parse(self, raw_data):
-        deserializer = Deserializer(raw_data)
-        self.signature = deserializer.parse_signature()
-        self.pubkey = deserializer.parse_pubkey()
-        self.timestamp = deserializer.parse_timestamp()
-        self.number_of_block = deserializer.parse_u32()
-        self.len = deserializer.get_len()
-
-    def pack(self):
-        return Serializer.write_signature(self.signature) + \
-               self.pack_fields()
-
-    def pack_fields(self):
-        return self.pubkey + \
-               Serializer.write_timestamp(self.timestamp) + \
-               Serializer.write_u32(self.number_of_block)
-
-    def get_len(self):
-        return self.len
-
-    def get_hash(self):
-        return sha256(self.pack_fields()).digest()
 
 
 # positive gossip base class
+@schema([("signature", SIGNATURE),
+         ("pubkey", PUBKEY),
+         ("timestamp", TIMESTAMP),
+         ("block_hash", HASH)],
+        hashed=["pubkey", "timestamp", "block_hash"])
 class PositiveGossipTransaction:
+    __slots__ = ("signature", "pubkey", "timestamp", "block_hash")
+    SIGNED_BY = SignedBy.SENDER
+
     def __init__(self):
         # node signature
         self.signature = None
@@ -80,69 +71,19 @@ class PositiveGossipTransaction:
         self.timestamp = None
         # returned block hash by number
         self.block_hash = None
-        # tx length
-        self.len = None
-
-    def parse(self, raw_data):
-        deserializer = Deserializer(raw_data)
-        self.signature = deserializer.parse_signature()
-        self.pubkey = deserializer.parse_pubkey()
-        self.timestamp = deserializer.parse_timestamp()
-        self.block_hash = deserializer.parse_hash()
-        self.len = deserializer.get_len()
-
-    def pack(self):
-        return Serializer.write_signature(self.signature) + \
-               self.pack_fields()
-
-    def pack_fields(self):
-        return self.pubkey + \
-               Serializer.write_timestamp(self.timestamp) + \
-               self.block_hash
-
-    def get_hash(self):
-        return sha256(self.pack_fields()).digest()
-
-    def get_len(self):
-        return self.len
 
 
 # penalty gossip base class
+@schema([("conflicts", List(HASH, count=U8)),
+         ("signature", SIGNATURE),
+         ("timestamp", TIMESTAMP)],
+        hashed=["conflicts"])
 class PenaltyGossipTransaction:
+    __slots__ = ("conflicts", "signature", "timestamp")
+    SIGNED_BY = SignedBy.NOBODY
 
     def __init__(self):
         self.conflicts = []
         self.signature = None
         # current timestamp
         self.timestamp = None
-        self.len = None
-
-    def parse(self, raw_data):
-        deserializer = Deserializer(raw_data)
-        conflict_count = deserializer.parse_u8()
-        self.conflicts = []
-        for _ in range(0, conflict_count):
-            conflict = deserializer.parse_hash()
-            self.conflicts.append(conflict)
-        self.signature = deserializer.parse_signature()
-        self.timestamp = deserializer.parse_timestamp()
-        self.len = deserializer.len
-
-    def pack(self):
-        raw = self.pack_conflicts()
-        raw += Serializer.write_signature(self.signature) + \
-               Serializer.write_timestamp(self.timestamp)
-        return raw
-
-    def pack_conflicts(self):
-        raw = Serializer.write_u8(len(self.conflicts))
-        for conflict in self.conflicts:
-            raw += conflict
-        return raw
-
-    def get_len(self):
-        return self.len
-
-    def get_hash(self):
-        return sha256(self.pack_conflicts()).digest()
-
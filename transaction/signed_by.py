@@ -0,0 +1,7 @@
+# Whose key signs a transaction, every transaction class declares it as SIGNED_BY
+# acceptors build signature checks (signed hash, signature, public key) from it,
+# so checks verified in advance are exactly the ones validation does
+class SignedBy:
+    NOBODY = 0  # transaction has no signature or it isn't checked
+    SENDER = 1  # key in pubkey field of transaction, signed hash is get_hash
+    RANDOMIZER = 2  # randomizer of current round at pubkey_index, signed hash is get_signing_hash of epoch hash
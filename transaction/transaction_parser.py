@@ -5,7 +5,7 @@ from transaction.stake_transaction import StakeHoldTransaction, PenaltyTransacti
 from transaction.secret_sharing_transactions import PublicKeyTransaction, PrivateKeyTransaction, SplitRandomTransaction
 from transaction.payment_transaction import PaymentTransaction
 
-from serialization.serializer import Serializer, Deserializer
+from serialization.serializer import Serializer, Deserializer, U8
 
 
 class Type:
@@ -23,79 +23,55 @@ class Type:
 
     PAYMENT = 11
 
-class TransactionParser:
 
-    @staticmethod
-    def parse(raw_data):
-        deserializer = Deserializer(raw_data)
-        tx_type = deserializer.parse_u8()
-        if tx_type == Type.PUBLIC:
-            tx = PublicKeyTransaction()
-        elif tx_type == Type.RANDOM:
-            tx = SplitRandomTransaction()
-        elif tx_type == Type.PRIVATE:
-            tx = PrivateKeyTransaction()
-        elif tx_type == Type.COMMIT:
-            tx = CommitRandomTransaction()
-        elif tx_type == Type.REVEAL:
-            tx = RevealRandomTransaction()
+# type byte dispatch tables, every transaction class has codec generated from its schema
+TX_CLASSES_BY_TYPE = {
+    Type.PUBLIC: PublicKeyTransaction,
+    Type.RANDOM: SplitRandomTransaction,
+    Type.PRIVATE: PrivateKeyTransaction,
+    Type.COMMIT: CommitRandomTransaction,
+    Type.REVEAL: RevealRandomTransaction,
 
-        elif tx_type == Type.STAKEHOLD:
-            tx = StakeHoldTransaction()
-        elif tx_type == Type.STAKERELEASE:
-            tx = StakeReleaseTransaction()
-        elif tx_type == Type.PENALTY:
-            tx = PenaltyTransaction()
+    Type.STAKEHOLD: StakeHoldTransaction,
+    Type.STAKERELEASE: StakeReleaseTransaction,
+    Type.PENALTY: PenaltyTransaction,
 
-        elif tx_type == Type.NEGATIVE_GOSSIP:
-            tx = NegativeGossipTransaction()
-        elif tx_type == Type.POSITIVE_GOSSIP:
-            tx = PositiveGossipTransaction()
-        elif tx_type == Type.PENALTY_GOSSIP:
-            tx = PenaltyGossipTransaction()
-        
-        elif tx_type == Type.PAYMENT:
-            tx = PaymentTransaction()
-        else:
-            assert False, "Cannot parse unknown transaction type"
-        tx.parse(deserializer.data)
-        return tx
+    Type.NEGATIVE_GOSSIP: NegativeGossipTransaction,
+    Type.POSITIVE_GOSSIP: PositiveGossipTransaction,
+    Type.PENALTY_GOSSIP: PenaltyGossipTransaction,
 
-    @staticmethod
-    def pack(tx):
-        raw = b''
-        if isinstance(tx, PublicKeyTransaction):
-            raw += Serializer.write_u8(Type.PUBLIC)
-        elif isinstance(tx, SplitRandomTransaction):
-            raw += Serializer.write_u8(Type.RANDOM)
-        elif isinstance(tx, PrivateKeyTransaction):
-            raw += Serializer.write_u8(Type.PRIVATE)
+    Type.PAYMENT: PaymentTransaction
+}
+TX_TYPES_BY_CLASS = {tx_class: tx_type for tx_type, tx_class in TX_CLASSES_BY_TYPE.items()}
+TX_TYPE_BYTES_BY_CLASS = {tx_class: Serializer.write_u8(tx_type) for tx_class, tx_type in TX_TYPES_BY_CLASS.items()}
 
-        elif isinstance(tx, CommitRandomTransaction):
-            raw += Serializer.write_u8(Type.COMMIT)
-        elif isinstance(tx, RevealRandomTransaction):
-            raw += Serializer.write_u8(Type.REVEAL)
 
-        elif isinstance(tx, StakeHoldTransaction):
-            raw += Serializer.write_u8(Type.STAKEHOLD)
-        elif isinstance(tx, StakeReleaseTransaction):
-            raw += Serializer.write_u8(Type.STAKERELEASE)
-        elif isinstance(tx, PenaltyTransaction):
-            raw += Serializer.write_u8(Type.PENALTY)
+class TransactionParser:
 
-        elif isinstance(tx, NegativeGossipTransaction):
-            raw += Serializer.write_u8(Type.NEGATIVE_GOSSIP)
-        elif isinstance(tx, PositiveGossipTransaction):
-            raw += Serializer.write_u8(Type.POSITIVE_GOSSIP)
-        elif isinstance(tx, PenaltyGossipTransaction):
-            raw += Serializer.write_u8(Type.PENALTY_GOSSIP)
-        
-        elif isinstance(tx, PaymentTransaction):
-            raw += Serializer.write_u8(Type.PAYMENT)
+    @staticmethod
+    def parse(raw_data):
+        return TransactionParser.parse_from(Deserializer(raw_data))
 
-        else:
-            assert False, "Cannot pack unknown transaction type"
-        raw += tx.pack()
-        return raw
+    # reads type byte and transaction from shared deserializer
+    @staticmethod
+    def parse_from(deserializer):
+        tx_class = TX_CLASSES_BY_TYPE.get(U8.unpack_from(deserializer.view, deserializer.offset)[0])
+        assert tx_class, "Cannot parse unknown transaction type"
+        deserializer.offset += 1
+        tx = tx_class.__new__(tx_class)  # every field is assigned by codec, so __init__ is skipped
+        tx_class.CODEC.parse_from(deserializer, tx)
+        return tx
 
+    @staticmethod
+    def pack(tx):
+        type_byte = TX_TYPE_BYTES_BY_CLASS.get(tx.__class__)
+        assert type_byte, "Cannot pack unknown transaction type"
+        return type_byte + tx.CODEC.pack_all(tx)
 
+    # writes type byte and transaction into shared serializer
+    @staticmethod
+    def pack_into(serializer, tx):
+        tx_type = TX_TYPES_BY_CLASS.get(tx.__class__)
+        assert tx_type is not None, "Cannot pack unknown transaction type"
+        serializer.put_u8(tx_type)
+        tx.CODEC.pack_into(serializer, tx)
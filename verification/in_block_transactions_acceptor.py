@@ -2,35 +2,85 @@ from verification.acceptor import Acceptor, AcceptionException
 
 from transaction.secret_sharing_transactions import PublicKeyTransaction
 from transaction.commit_transactions import RevealRandomTransaction
+from transaction.gossip_transaction import PenaltyGossipTransaction
+from transaction.signed_by import SignedBy
 
+from chain.epoch import Epoch
 from chain.params import Round
 
+from node.stake_manager import StakeManager
+
 from crypto.keys import Keys
+from crypto.public import Public
 
 
 class InBlockTransactionsAcceptor(Acceptor):
 
-    def __init__(self, epoch, permissions, logger):
+    # block is needed to accept penalty gossips, they may refer only to gossips of block itself
+    # or of its first parent chain in the same epoch, which is where permissions look them up
+    def __init__(self, epoch, permissions, logger, block=None):
         super().__init__(logger)
         self.epoch = epoch
         self.permissions = permissions
+        self.block = block
+        self.block_gossips = None  # gossips penalty gossips of block may refer to, collected on first use
 
     def validate(self, transaction):
         self.is_signature_valid_for_at_least_one_epoch(transaction)
         self.is_sender_valid_for_current_round(transaction)
+        self.is_penalty_gossip_conflict_resolvable(transaction)
+
+    # returns (signed hash, signature, pubkey) of every signature check validation may do
+    # so they can be verified in parallel in advance and validation itself finds them in cache
+    # checks are built from SIGNED_BY declared by transaction class, the same way validation builds them
+    def get_signature_checks(self, transaction):
+        if transaction.SIGNED_BY == SignedBy.SENDER:
+            return [InBlockTransactionsAcceptor.get_sender_signature_check(transaction)]
 
+        checks = []
+        current_round = self.epoch.get_current_round()
+        if transaction.SIGNED_BY == SignedBy.RANDOMIZER and current_round < Round.FINAL:
+            for _top, epoch_hash in self.epoch.get_epoch_hashes().items():
+                validators = self.permissions.get_ordered_randomizers_pubkeys_for_round(epoch_hash, current_round)
+                if transaction.pubkey_index < len(validators):
+                    checks.append(InBlockTransactionsAcceptor.get_randomizer_signature_check(transaction, epoch_hash,
+                                                                                             validators))
+        return checks
+
+    @staticmethod
+    def get_sender_signature_check(transaction):
+        return transaction.get_hash(), transaction.signature, Keys.from_bytes(transaction.pubkey)
+
+    @staticmethod
+    def get_randomizer_signature_check(transaction, epoch_hash, validators):
+        return transaction.get_signing_hash(epoch_hash), transaction.signature, \
+               validators[transaction.pubkey_index].public_key
+
+    # signature of sender doesn't depend on epoch hash, so one check covers every epoch
     def is_signature_valid_for_at_least_one_epoch(self, transaction):
-        if hasattr(transaction, "pubkey"):
-            public_key = Keys.from_bytes(transaction.pubkey)
-            signature_valid_for_at_least_one_epoch = False
-            epoch_hashes = self.epoch.get_epoch_hashes()
-            for _top, epoch_hash in epoch_hashes.items():
-                if Acceptor.check_transaction_signature(transaction, public_key, epoch_hash):
-                    signature_valid_for_at_least_one_epoch = True
-                    break
-
-            if not signature_valid_for_at_least_one_epoch:
-                raise AcceptionException("Signature is not valid for any epoch!")
+        if transaction.SIGNED_BY != SignedBy.SENDER:
+            return
+        if not self.epoch.get_epoch_hashes() or \
+                not Public.verify(*InBlockTransactionsAcceptor.get_sender_signature_check(transaction)):
+            raise AcceptionException("Signature is not valid for any epoch!")
+
+    # penalty gossip releases stake of culprit, so every node should find the same culprit
+    def is_penalty_gossip_conflict_resolvable(self, transaction):
+        if not isinstance(transaction, PenaltyGossipTransaction):
+            return
+        assert self.block, "Penalty gossip can be accepted only together with its block!"
+        if self.block_gossips is None:
+            self.block_gossips = self.get_block_gossips()
+        if not self.permissions.get_conflict_gossip_sender(transaction, self.block_gossips):
+            raise AcceptionException("Penalty gossip doesn't refer to conflicting gossips of its chain!")
+
+    def get_block_gossips(self):
+        gossips = StakeManager.add_gossips({}, self.block.system_txs)
+        block_number = self.epoch.get_block_number_from_timestamp(self.block.timestamp)
+        epoch_start = Epoch.get_epoch_start_block_number(Epoch.get_epoch_number(block_number))
+        chain_gossips = self.permissions.stake_manager.get_chain_gossips(self.block.prev_hashes[0], epoch_start)
+        chain_gossips.update(gossips)
+        return chain_gossips
 
     def is_sender_valid_for_current_round(self, transaction):
 
@@ -50,18 +100,15 @@ class InBlockTransactionsAcceptor(Acceptor):
 
             validators = self.permissions.get_ordered_randomizers_pubkeys_for_round(epoch_hash, current_round)
 
-            # if has index, use index to
-            if hasattr(transaction, 'pubkey_index'):
-                if len(validators) <= transaction.pubkey_index:
-                    raise AcceptionException("Public key index out of bounds!")
-
-                validator = validators[transaction.pubkey_index]
-                if Acceptor.check_transaction_signature(transaction, validator.public_key, epoch_hash):
-                    signature_valid_for_at_least_one_valid_publickey = True
-                    break
+            assert transaction.SIGNED_BY == SignedBy.RANDOMIZER, \
+                "System randomizer transaction must have a public_index property!"
+            if len(validators) <= transaction.pubkey_index:
+                raise AcceptionException("Public key index out of bounds!")
 
-            else:
-                assert False, "System randomizer transaction must have a public_index property!"
+            check = InBlockTransactionsAcceptor.get_randomizer_signature_check(transaction, epoch_hash, validators)
+            if Public.verify(*check):
+                signature_valid_for_at_least_one_valid_publickey = True
+                break
 
         if not signature_valid_for_at_least_one_valid_publickey:
-            raise AcceptionException("Transaction was not signed by a valid public key for this round!")
\ No newline at end of file
+            raise AcceptionException("Transaction was not signed by a valid public key for this round!")